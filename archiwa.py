@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Konwersja plików DjVu prosto z archiwów ZIP i TAR, bez rozpakowywania całości.
+
+Pliki DjVu z archiwum są wypakowywane pojedynczo, w kolejności zapisu w
+archiwum, do katalogu roboczego i konwertowane przez kilka wątków. Wątek
+wypakowujący wyprzedza wątki konwertujące najwyżej o kilka plików, a każdy
+plik jest usuwany zaraz po konwersji, więc zajęte miejsce na dysku zależy od
+liczby wątków, a nie od rozmiaru archiwum. Archiwa TAR (także skompresowane)
+są czytane strumieniowo, od początku do końca, bez przewijania.
+
+Pliki PDF trafiają do katalogu wyjściowego (z zachowaniem podkatalogów z
+archiwum) albo do archiwum wynikowego ZIP lub TAR.
+
+Dokumenty wieloplikowe („indirect”) nie są konwertowane: ich strony są w
+osobnych plikach, więc takie archiwa należy najpierw rozpakować. Pliki
+indeksu i współdzielone pliki DJVI są pomijane, a pliki składowe - ustalone
+narzędziem `djvused` z listy w indeksie - także. W archiwum ZIP indeksy są
+wyszukywane przed konwersją; archiwum TAR jest czytane strumieniowo, więc
+składniki zapisane przed swoim indeksem zostaną skonwertowane jako osobne
+strony (z ostrzeżeniem). Bez `djvused` składników nie da się rozpoznać.
+
+Użycie:
+    python archiwa.py ARCHIWUM [--wyjscie KATALOG|WYNIK.zip] [--jakosc normal] [--watki 2]
+"""
+
+import os
+import sys
+import posixpath
+import time
+import queue
+import shutil
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import threading
+
+import djvu_core
+import historia
+from sonda_djvu import sonduj, sonduj_dane
+
+# Rozszerzenia rozpoznawane jako archiwa z plikami DjVu
+ROZSZERZENIA_ARCHIWOW = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Rozszerzenia archiwów wynikowych (PDF jest już skompresowany, więc bez kompresji)
+ROZSZERZENIA_WYNIKOWE = ('.zip', '.tar')
+
+# Liczba plików wypakowywanych na zapas, ponad liczbę wątków konwertujących
+WYPRZEDZENIE = 2
+
+
+def jest_archiwum(sciezka):
+    """Sprawdza, czy plik jest obsługiwanym archiwum (po rozszerzeniu)."""
+    return os.path.isfile(sciezka) and sciezka.lower().endswith(ROZSZERZENIA_ARCHIWOW)
+
+
+def jest_djvu(nazwa):
+    """Sprawdza, czy nazwa członka archiwum ma rozszerzenie pliku DjVu."""
+    return nazwa.lower().endswith(('.djvu', '.djv'))
+
+
+def bezpieczna_nazwa(nazwa):
+    """Zamienia nazwę członka archiwum na bezpieczną ścieżkę względną.
+
+    Usuwane są litery dysków, ukośniki początkowe oraz składniki '.' i '..',
+    więc wynik nie może wskazywać poza katalog wyjściowy.
+
+    Args:
+        nazwa (str): Nazwa członka archiwum.
+
+    Zwraca:
+        str: Ścieżka względna z ukośnikami '/' (pusta, jeśli nic nie zostało).
+    """
+    czesci = []
+    for czesc in nazwa.replace('\\', '/').split('/'):
+        if czesc in ('', '.', '..') or czesc.endswith(':'):
+            continue
+        czesci.append(czesc)
+    return '/'.join(czesci)
+
+
+def _rodzaj_czlonka(zip_, info):
+    """Rozpoznaje rodzaj pliku DjVu w archiwum ZIP po początku jego danych."""
+    with zip_.open(info) as f:
+        return sonduj_dane(f.read(64)).rodzaj
+
+
+def _czlonkowie(archiwum):
+    """Generuje (nazwa, otwarty plik) kolejnych plików DjVu z archiwum.
+
+    Plik członka jest ważny tylko do pobrania następnego elementu.
+    """
+    if archiwum.lower().endswith('.zip'):
+        with zipfile.ZipFile(archiwum) as zip_:
+            for info in zip_.infolist():
+                if not info.is_dir() and jest_djvu(info.filename):
+                    with zip_.open(info) as f:
+                        yield info.filename, f
+    else:
+        # Tryb strumieniowy: archiwum jest czytane raz, od początku do końca
+        with tarfile.open(archiwum, 'r|*') as tar:
+            for czlonek in tar:
+                if czlonek.isfile() and jest_djvu(czlonek.name):
+                    f = tar.extractfile(czlonek)
+                    yield czlonek.name, f
+
+
+def rozmiary_plikow_djvu(archiwum):
+    """Zwraca rozmiary plików DjVu w archiwum ZIP lub None dla TAR.
+
+    Spis archiwum ZIP jest na jego końcu, więc jest odczytywany od razu;
+    archiwum TAR trzeba by przeczytać w całości.
+
+    Zwraca:
+        dict[str, int] | None: Rozmiar po rozpakowaniu według bezpiecznej nazwy.
+    """
+    if not archiwum.lower().endswith('.zip'):
+        return None
+    with zipfile.ZipFile(archiwum) as zip_:
+        return {bezpieczna_nazwa(info.filename): info.file_size for info in zip_.infolist()
+                if not info.is_dir() and jest_djvu(info.filename)}
+
+
+class StrumienArchiwum:
+    """Wypakowuje pliki DjVu z archiwum w wątku tła, z ograniczonym zapasem.
+
+    Na dysku znajduje się jednocześnie najwyżej `limit` wypakowanych plików:
+    wątek wypakowujący czeka, aż konsument zwolni miejsce metodą `zwolnij`.
+
+    Pliki indeksu dokumentów wieloplikowych, współdzielone pliki DJVI i pliki
+    składowe rozpoznanych dokumentów wieloplikowych są pomijane.
+
+    Atrybuty:
+        archiwum (str): Ścieżka do archiwum.
+        katalog (str): Katalog roboczy z wypakowanymi plikami.
+        blad (str | None): Opis błędu odczytu archiwum, jeśli wystąpił.
+        pominiete (list[tuple[str, str]]): Pominięte członki (nazwa, powód).
+        ostrzezenia (list[tuple[str, str]]): Członki wydane do konwersji, które
+            mogą być składnikami dokumentu wieloplikowego (nazwa, opis).
+    """
+    def __init__(self, archiwum, limit, katalog_roboczy=None, sciezka_djvused=None, przy_pominieciu=None):
+        """Uruchamia wypakowywanie.
+
+        Args:
+            archiwum (str): Ścieżka do archiwum ZIP lub TAR.
+            limit (int): Maksymalna liczba plików wypakowanych jednocześnie.
+            katalog_roboczy (str, optional): Katalog, w którym tworzony jest
+                katalog tymczasowy. Domyślnie katalog tymczasowy systemu.
+            sciezka_djvused (str, optional): Ścieżka do djvused, którym
+                odczytywane są pliki składowe dokumentów wieloplikowych.
+            przy_pominieciu (callable, optional): Wywoływana z wątku
+                wypakowującego z nazwą i powodem każdego pominiętego członka.
+        """
+        self.archiwum = archiwum
+        self.katalog = tempfile.mkdtemp(prefix='djvu_archiwum_', dir=katalog_roboczy)
+        self.sciezka_djvused = sciezka_djvused
+        self.przy_pominieciu = przy_pominieciu
+        self.blad = None
+        self.pominiete = []
+        self.ostrzezenia = []
+        self._skladniki = set()
+        self._wydane = set()
+        self._miejsca = threading.BoundedSemaphore(max(1, limit))
+        self._gotowe = queue.Queue()
+        self._przerwano = threading.Event()
+        self._watek = threading.Thread(target=self._wypakowuj, daemon=True)
+        self._watek.start()
+
+    def _pomin(self, nazwa, powod):
+        self.pominiete.append((nazwa, powod))
+        if self.przy_pominieciu:
+            self.przy_pominieciu(nazwa, powod)
+
+    def _wypakuj(self, numer, bezpieczna, zrodlo):
+        """Zapisuje członka w osobnym podkatalogu katalogu roboczego i zwraca ścieżkę pliku."""
+        # Osobny podkatalog zachowuje oryginalną nazwę pliku (np. w raportach kwarantanny)
+        katalog = os.path.join(self.katalog, str(numer))
+        os.makedirs(katalog)
+        sciezka = os.path.join(katalog, os.path.basename(bezpieczna))
+        with open(sciezka, 'wb') as f:
+            shutil.copyfileobj(zrodlo, f, 1024 * 1024)
+        return sciezka
+
+    def _zarejestruj_indeks(self, bezpieczna, sciezka):
+        """Dopisuje pliki składowe indeksu (jako bezpieczne nazwy w archiwum) do pomijanych."""
+        lista = None
+        if self.sciezka_djvused:
+            lista = djvu_core.skladniki_indeksu(sciezka, self.sciezka_djvused)
+        if lista is None:
+            self.ostrzezenia.append((bezpieczna, "nie można odczytać plików składowych (brak djvused) - "
+                                                 "zostaną skonwertowane jako osobne strony"))
+            return
+        katalog_indeksu = os.path.dirname(os.path.abspath(sciezka))
+        for skladnik in lista:
+            wzgledna = os.path.relpath(skladnik, katalog_indeksu).replace(os.sep, '/')
+            nazwa = bezpieczna_nazwa(posixpath.join(posixpath.dirname(bezpieczna), wzgledna))
+            if nazwa in self._wydane:
+                self.ostrzezenia.append((nazwa, "plik składowy skonwertowany jako osobna strona - "
+                                                "indeks był dalej w archiwum"))
+            self._skladniki.add(nazwa)
+
+    def _przeszukaj_zip(self):
+        """Rejestruje pliki składowe wszystkich indeksów w archiwum ZIP przed wypakowywaniem."""
+        with zipfile.ZipFile(self.archiwum) as zip_:
+            for info in zip_.infolist():
+                if info.is_dir() or not jest_djvu(info.filename) or _rodzaj_czlonka(zip_, info) != 'indeks':
+                    continue
+                bezpieczna = bezpieczna_nazwa(info.filename)
+                if bezpieczna:
+                    with zip_.open(info) as zrodlo:
+                        sciezka = self._wypakuj('indeks', bezpieczna, zrodlo)
+                    try:
+                        self._zarejestruj_indeks(bezpieczna, sciezka)
+                    finally:
+                        shutil.rmtree(os.path.dirname(sciezka), ignore_errors=True)
+
+    def _wypakowuj(self):
+        try:
+            zip_ = self.archiwum.lower().endswith('.zip')
+            if zip_:
+                self._przeszukaj_zip()
+            for numer, (nazwa, zrodlo) in enumerate(_czlonkowie(self.archiwum), 1):
+                bezpieczna = bezpieczna_nazwa(nazwa)
+                if not bezpieczna:
+                    self._pomin(nazwa, "nieprawidłowa nazwa")
+                    continue
+                if bezpieczna in self._skladniki:
+                    self._pomin(bezpieczna, "plik składowy dokumentu wieloplikowego")
+                    continue
+                while not self._miejsca.acquire(timeout=0.5):
+                    if self._przerwano.is_set():
+                        return
+                if self._przerwano.is_set():
+                    return
+                sciezka = self._wypakuj(numer, bezpieczna, zrodlo)
+                rodzaj = sonduj(sciezka).rodzaj
+                if rodzaj in ('indeks', 'dolaczany'):
+                    if rodzaj == 'indeks' and not zip_:
+                        self._zarejestruj_indeks(bezpieczna, sciezka)
+                    self.zwolnij(sciezka)
+                    self._pomin(bezpieczna, "dokument wieloplikowy - wymaga rozpakowania archiwum"
+                                if rodzaj == 'indeks' else "współdzielony plik składowy (DJVI)")
+                    continue
+                self._wydane.add(bezpieczna)
+                self._gotowe.put((bezpieczna, sciezka))
+        except (OSError, zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            self.blad = str(e)
+        except (RuntimeError, NotImplementedError) as e:
+            # zipfile: członek zaszyfrowany lub nieobsługiwana metoda kompresji
+            self.blad = str(e) or e.__class__.__name__
+        finally:
+            self._gotowe.put(None)
+
+    def pobierz(self):
+        """Czeka na następny wypakowany plik.
+
+        Zwraca:
+            tuple[str, str] | None: Bezpieczna nazwa w archiwum i ścieżka
+            wypakowanego pliku lub None, gdy archiwum się skończyło.
+        """
+        element = self._gotowe.get()
+        if element is None:
+            # Koniec widzą wszystkie wątki konsumentów
+            self._gotowe.put(None)
+        return element
+
+    def zwolnij(self, sciezka):
+        """Usuwa wypakowany plik (wraz z plikami obok niego) i zwalnia miejsce na następny."""
+        shutil.rmtree(os.path.dirname(sciezka), ignore_errors=True)
+        self._miejsca.release()
+
+    def zamknij(self):
+        """Przerywa wypakowywanie i usuwa katalog roboczy."""
+        self._przerwano.set()
+        self._watek.join()
+        shutil.rmtree(self.katalog, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *wyjatek):
+        self.zamknij()
+
+
+class ArchiwumWynikowe:
+    """Archiwum ZIP lub TAR, do którego dopisywane są gotowe pliki PDF.
+
+    Archiwum jest zapisywane do unikalnego pliku `.part` i dopiero przy zamknięciu
+    zastępuje plik docelowy, więc przerwana konwersja nie zostawia
+    niekompletnego archiwum pod docelową nazwą.
+    """
+    def __init__(self, sciezka):
+        """Tworzy archiwum wynikowe.
+
+        Args:
+            sciezka (str): Ścieżka archiwum z rozszerzeniem `.zip` lub `.tar`.
+
+        Wyjątki:
+            ValueError: Gdy rozszerzenie nie jest obsługiwane.
+        """
+        if not sciezka.lower().endswith(ROZSZERZENIA_WYNIKOWE):
+            raise ValueError(f"Nieobsługiwany format archiwum wynikowego: {sciezka}")
+        self.sciezka = sciezka
+        self.liczba_plikow = 0
+        self._tymczasowe = djvu_core.plik_tymczasowy(sciezka)
+        self._blokada = threading.Lock()
+        if sciezka.lower().endswith('.zip'):
+            self._zip = zipfile.ZipFile(self._tymczasowe, 'w', zipfile.ZIP_STORED, allowZip64=True)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(self._tymczasowe, 'w')
+
+    def dodaj(self, plik, nazwa):
+        """Dopisuje plik do archiwum pod podaną nazwą (bezpieczne wątkowo)."""
+        with self._blokada:
+            if self._zip:
+                self._zip.write(plik, nazwa)
+            else:
+                self._tar.add(plik, nazwa)
+            self.liczba_plikow += 1
+
+    def zamknij(self, opublikuj=True):
+        """Zamyka archiwum i publikuje je pod docelową nazwą.
+
+        Args:
+            opublikuj (bool, optional): False - pozostaw niekompletne archiwum
+                jako plik `.part` (np. po przerwaniu konwersji). Domyślnie True.
+        """
+        with self._blokada:
+            (self._zip or self._tar).close()
+            if opublikuj:
+                os.replace(self._tymczasowe, self.sciezka)
+
+
+def konwertuj_archiwum(sciezka_ddjvu, archiwum, wyjscie, jakosc='normal', timeout_s=300, polityka=None,
+                       liczba_watkow=1, historia_konwersji=None, komunikat=print, katalog_roboczy=None):
+    """Konwertuje wszystkie pliki DjVu z archiwum do PDF.
+
+    Args:
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+        archiwum (str): Ścieżka do archiwum ZIP lub TAR.
+        wyjscie (str): Katalog wyjściowy lub ścieżka archiwum wynikowego (`.zip`, `.tar`).
+            Raporty kwarantanny trafiają do katalogu wyjściowego lub katalogu archiwum wynikowego.
+        jakosc (str, optional): Jakość konwersji. Domyślnie 'normal'.
+        timeout_s (int, optional): Timeout konwersji pliku w sekundach. Domyślnie 300.
+        polityka (djvu_core.PolitykaPonowien, optional): Polityka ponowień.
+        liczba_watkow (int, optional): Liczba równoległych konwersji. Domyślnie 1.
+        historia_konwersji (historia.Historia, optional): Historia czasów konwersji.
+        komunikat (callable, optional): Funkcja wypisująca komunikaty. Domyślnie print.
+        katalog_roboczy (str, optional): Miejsce na wypakowywane pliki.
+
+    Zwraca:
+        tuple[int, int]: Liczba udanych i nieudanych konwersji (bez pominiętych
+        plików dokumentów wieloplikowych).
+
+    Wyjątki:
+        ValueError: Gdy rozszerzenie archiwum wynikowego nie jest obsługiwane.
+    """
+    backend = djvu_core.pobierz_backend(sciezka_ddjvu)
+    wynikowe = ArchiwumWynikowe(wyjscie) if wyjscie.lower().endswith(ROZSZERZENIA_WYNIKOWE) else None
+    katalog_wyjsciowy = os.path.dirname(os.path.abspath(wyjscie)) if wynikowe else wyjscie
+    os.makedirs(katalog_wyjsciowy, exist_ok=True)
+    rozmiary = rozmiary_plikow_djvu(archiwum)
+    wszystkich = len(rozmiary) if rozmiary is not None else None
+    eta = None
+    if historia_konwersji and rozmiary:
+        # Liczba stron nie jest znana przed wypakowaniem, szacunek opiera się na rozmiarach
+        eta = historia.ETA(historia_konwersji.szacunek(jakosc), liczba_watkow)
+        for nazwa, bajty in rozmiary.items():
+            eta.dodaj(nazwa, bajty)
+    liczniki = {'ok': 0, 'bledy': 0, 'pominiete': 0}
+    blokada = threading.Lock()
+
+    def pominiety(nazwa, powod):
+        with blokada:
+            liczniki['pominiete'] += 1
+        if eta and nazwa in rozmiary:
+            eta.zakonczono(nazwa, rozmiary[nazwa])
+
+    def konwertuj(nazwa, plik_djvu):
+        nazwa_pdf = os.path.splitext(nazwa)[0] + '.pdf'
+        if wynikowe:
+            plik_pdf = os.path.splitext(plik_djvu)[0] + '.pdf'
+        else:
+            plik_pdf = os.path.join(katalog_wyjsciowy, *nazwa_pdf.split('/'))
+            os.makedirs(os.path.dirname(plik_pdf), exist_ok=True)
+        komunikat(f"🔄 Konwertuję: {nazwa} -> {nazwa_pdf}")
+        wynik = djvu_core.konwertuj_z_ponowieniami(backend, plik_djvu, plik_pdf, jakosc, timeout_s, polityka,
+                                                   komunikat=komunikat)
+        if historia_konwersji:
+            historia_konwersji.zapisz(plik_djvu, wynik)
+        if eta:
+            eta.zakonczono(nazwa, rozmiary.get(nazwa, 0))
+        if wynik.ok and wynikowe:
+            try:
+                wynikowe.dodaj(plik_pdf, nazwa_pdf)
+            except OSError as e:
+                wynik.ok, wynik.opis = False, f"zapis do archiwum wynikowego: {e}"
+        if wynik.raport and wynikowe:
+            # Raport z katalogu roboczego zostałby usunięty razem z plikiem
+            katalog_kwarantanny = os.path.join(katalog_wyjsciowy, djvu_core.KATALOG_KWARANTANNY)
+            os.makedirs(katalog_kwarantanny, exist_ok=True)
+            wynik.raport = shutil.move(wynik.raport,
+                                       os.path.join(katalog_kwarantanny, os.path.basename(wynik.raport)))
+
+        with blokada:
+            liczniki['ok' if wynik.ok else 'bledy'] += 1
+            gotowe = liczniki['ok'] + liczniki['bledy']
+        if wynik.ok:
+            komunikat(f"✅ {nazwa_pdf}" + (f" (obniżona jakość: {wynik.jakosc})" if wynik.jakosc != jakosc else ""))
+        else:
+            komunikat(f"❌ {nazwa}: {wynik.opis or wynik.blad}")
+            if wynik.raport:
+                komunikat(f"🚫 Kwarantanna po {wynik.proby} próbach, raport: {wynik.raport}")
+        postep = f"{gotowe}/{wszystkich - liczniki['pominiete']}" if wszystkich else str(gotowe)
+        komunikat(f"⏳ {postep}" + (f", {eta.opis()}" if eta else ""))
+
+    def watek(strumien):
+        while True:
+            element = strumien.pobierz()
+            if element is None:
+                break
+            try:
+                konwertuj(*element)
+            except Exception as e:
+                # Np. błąd zapisu historii lub przeniesienia raportu - wątek konwertuje dalej
+                with blokada:
+                    liczniki['bledy'] += 1
+                komunikat(f"❌ {element[0]}: {e}")
+            finally:
+                strumien.zwolnij(element[1])
+
+    udane = False
+    try:
+        sciezka_djvused = djvu_core.znajdz_narzedzie('djvused', sciezka_ddjvu)
+        with StrumienArchiwum(archiwum, liczba_watkow + WYPRZEDZENIE, katalog_roboczy, sciezka_djvused,
+                              pominiety) as strumien:
+            watki = [threading.Thread(target=watek, args=(strumien,), daemon=True)
+                     for _ in range(max(1, liczba_watkow))]
+            for w in watki:
+                w.start()
+            for w in watki:
+                w.join()
+            if strumien.blad:
+                # Pozostałe pliki archiwum nie zostały skonwertowane - to nie może wyglądać na sukces
+                liczniki['bledy'] += 1
+                komunikat(f"❌ Błąd odczytu archiwum {os.path.basename(archiwum)}: {strumien.blad}")
+            for nazwa, powod in strumien.pominiete:
+                komunikat(f"⚠️  Pominięto {nazwa}: {powod}")
+            for nazwa, opis in strumien.ostrzezenia:
+                komunikat(f"⚠️  {nazwa}: {opis}")
+        udane = True
+    finally:
+        if wynikowe:
+            wynikowe.zamknij(udane)
+            if udane:
+                komunikat(f"📦 Archiwum wynikowe: {wynikowe.sciezka} ({wynikowe.liczba_plikow} plików)")
+    return liczniki['ok'], liczniki['bledy']
+
+
+def main():
+    """Konwertuje pliki DjVu z archiwum podanego w wierszu poleceń."""
+    parser = argparse.ArgumentParser(description="Konwersja plików DjVu z archiwów ZIP/TAR bez rozpakowywania.")
+    parser.add_argument('archiwum', help="archiwum ZIP lub TAR (także .tar.gz, .tar.bz2, .tar.xz)")
+    parser.add_argument('--wyjscie', help="katalog na pliki PDF lub archiwum wynikowe .zip/.tar "
+                                          "(domyślnie katalog o nazwie archiwum)")
+    parser.add_argument('--jakosc', choices=['low', 'normal', 'high'], default='normal')
+    parser.add_argument('--timeout', type=int, default=300, help="timeout konwersji pliku w sekundach")
+    parser.add_argument('--watki', type=int, default=1, help="liczba równoległych konwersji")
+    parser.add_argument('--proby', type=int, default=3, help="liczba prób dla nieudanych plików")
+    parser.add_argument('--roboczy', help="katalog na wypakowywane pliki (domyślnie katalog tymczasowy)")
+    argumenty = parser.parse_args()
+
+    if not jest_archiwum(argumenty.archiwum):
+        print(f"❌ To nie jest obsługiwane archiwum: {argumenty.archiwum}")
+        sys.exit(1)
+    sciezka_ddjvu = djvu_core.znajdz_ddjvu()
+    if not sciezka_ddjvu:
+        print("❌ Nie znaleziono programu ddjvu.")
+        sys.exit(1)
+
+    wyjscie = argumenty.wyjscie
+    if not wyjscie:
+        nazwa = os.path.basename(argumenty.archiwum)
+        for rozszerzenie in ROZSZERZENIA_ARCHIWOW:
+            if nazwa.lower().endswith(rozszerzenie):
+                nazwa = nazwa[:-len(rozszerzenie)]
+                break
+        wyjscie = os.path.join(os.path.dirname(os.path.abspath(argumenty.archiwum)), nazwa)
+
+    historia_konwersji = historia.otworz_historie()
+    start = time.time()
+    try:
+        ok, bledy = konwertuj_archiwum(sciezka_ddjvu, argumenty.archiwum, wyjscie, argumenty.jakosc,
+                                       argumenty.timeout, djvu_core.PolitykaPonowien(argumenty.proby),
+                                       argumenty.watki, historia_konwersji, katalog_roboczy=argumenty.roboczy)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if historia_konwersji:
+            historia_konwersji.zamknij()
+    print(f"\n✅ Skonwertowano: {ok}, ❌ błędy: {bledy}, czas: {historia.formatuj_czas(time.time() - start)}")
+    if bledy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+@echo off
+echo ========================================
+echo  Budowanie wersji onedir (szybszy start)
+echo  Konwerter DjVu -> PDF
+echo ========================================
+echo.
+
+REM Sprawdź czy PyInstaller jest zainstalowany
+python -c "import PyInstaller" 2>nul
+if errorlevel 1 (
+    echo PyInstaller nie jest zainstalowany!
+    echo Instaluję PyInstaller...
+    pip install pyinstaller
+)
+
+echo.
+echo Budowanie aplikacji (katalog zamiast pojedynczego pliku)...
+pyinstaller --onedir --windowed --noconfirm --name "DJVU_Converter" djvu_to_pdf_gui.py
+
+echo.
+if exist "dist\DJVU_Converter\DJVU_Converter.exe" (
+    echo ✅ SUKCES! Program utworzony w katalogu dist\DJVU_Converter
+    echo Skopiuj cały katalog - plik .exe nie działa bez pozostałych plików.
+) else (
+    echo ❌ Błąd - plik nie został utworzony.
+)
+
+echo.
+echo Naciśnij dowolny klawisz aby zakończyć...
+pause >nul
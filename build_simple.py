@@ -2,6 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 Uproszczony skrypt do budowania pliku wykonywalnego
+
+Domyślnie tworzy pojedynczy plik (--onefile). Z opcją --onedir tworzy katalog
+z programem, który startuje szybciej, bo nie jest rozpakowywany przy każdym
+uruchomieniu:
+    python build_simple.py --onedir
 """
 
 import os
@@ -44,14 +49,14 @@ def install_pyinstaller():
             print(f"   ❌ Błąd instalacji: {e}")
             return False
 
-def build_executable():
+def build_executable(onedir=False):
     """Zbuduj plik wykonywalny z prostymi opcjami"""
     print("🔨 Budowanie aplikacji...")
     
     # Prosta komenda PyInstaller
     cmd = [
         "pyinstaller",
-        "--onefile",
+        "--onedir" if onedir else "--onefile",
         "--windowed", 
         "--name", "DJVU_Converter",
         "--clean",
@@ -77,9 +82,15 @@ def build_executable():
             print("   STDERR:", e.stderr[-500:])
         return False
 
-def check_result():
+def get_exe_path(onedir=False):
+    """Ścieżka do zbudowanego pliku wykonywalnego"""
+    if onedir:
+        return "dist/DJVU_Converter/DJVU_Converter.exe"
+    return "dist/DJVU_Converter.exe"
+
+def check_result(onedir=False):
     """Sprawdź czy plik został utworzony"""
-    exe_path = "dist/DJVU_Converter.exe"
+    exe_path = get_exe_path(onedir)
     
     if os.path.exists(exe_path):
         size = os.path.getsize(exe_path) / (1024 * 1024)  # MB
@@ -92,9 +103,10 @@ def check_result():
 
 def main():
     """Główna funkcja"""
+    onedir = "--onedir" in sys.argv[1:]
     print("=" * 60)
     print("�� BUDOWANIE PLIKU WYKONYWALNEGO")
-    print("   Konwerter DjVu → PDF (uproszczone)")
+    print(f"   Konwerter DjVu → PDF (uproszczone, {'onedir' if onedir else 'onefile'})")
     print("=" * 60)
     print()
     
@@ -111,15 +123,19 @@ def main():
     print()
     
     # Krok 3: Zbuduj aplikację
-    if build_executable():
+    if build_executable(onedir):
         print()
-        if check_result():
+        if check_result(onedir):
             print()
             print("=" * 60)
             print("🎉 SUKCES!")
             print("=" * 60)
-            print("📁 Plik wykonywalny: dist/DJVU_Converter.exe")
-            print("💡 Możesz go skopiować do dowolnego katalogu")
+            print(f"📁 Plik wykonywalny: {get_exe_path(onedir)}")
+            if onedir:
+                print("💡 Skopiuj cały katalog dist/DJVU_Converter")
+            else:
+                print("💡 Możesz go skopiować do dowolnego katalogu")
+            print("⏱️ Czas startu: python pomiar_startu.py --etykieta <wersja> " + get_exe_path(onedir))
             print()
         else:
             print("\n❌ Budowanie nie powiodło się - sprawdź błędy powyżej")
@@ -0,0 +1,953 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wspólny rdzeń konwersji DjVu -> PDF dla wersji konsolowej i GUI.
+
+Moduł zawiera wyszukiwanie narzędzi i plików DjVu oraz wymienne silniki
+konwersji (backendy):
+
+- `BackendDdjvu` - uruchamia narzędzie wiersza poleceń `ddjvu` dla każdego pliku,
+- `BackendDjvuLibre` - renderuje strony w bieżącym procesie przy użyciu
+  powiązań `python-djvulibre` (moduł `djvu.decode`) i biblioteki Pillow,
+  bez uruchamiania nowych procesów i z otwartymi dokumentami w pamięci.
+
+`pobierz_backend()` wybiera automatycznie najszybszy dostępny silnik, a w razie
+błędu silnika wbudowanego przełącza się na `ddjvu`. Wybór można wymusić
+zmienną środowiskową DJVU_BACKEND ('auto', 'ddjvu' lub 'djvulibre').
+
+`konwertuj_z_ponowieniami()` dodaje do dowolnego silnika politykę ponowień
+(`PolitykaPonowien`): błędy przejściowe są powtarzane z rosnącym opóźnieniem,
+po przekroczeniu limitu czasu konwersja jest ponawiana w tańszym profilu
+jakości, a pliki, których nie udało się skonwertować, trafiają do kwarantanny
+z raportem błędu. Wynik jest publikowany atomowo, więc szybki szkic PDF może
+być później zastąpiony wersją w pełnej jakości (`KATALOG_SZKICOW`).
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import datetime
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+from sonda_djvu import sonduj
+
+# Parametry ddjvu dla poziomów jakości
+PARAMETRY_JAKOSCI = {
+    'low': ['-quality=25', '-smooth'],
+    'normal': ['-quality=75'],
+    'high': ['-quality=100', '-smooth'],
+    # Profil awaryjny: połowa rozdzielczości, używany przy ponawianiu po timeoucie
+    'draft': ['-quality=20', '-subsample=2']
+}
+
+# Jakość kompresji JPEG dla poziomów jakości przy kodowaniu przez Pillow
+JAKOSC_JPEG = {
+    'low': 25,
+    'normal': 75,
+    'high': 95,
+    'draft': 20
+}
+
+def podprobkowanie(jakosc):
+    """Zwraca współczynnik zmniejszenia rozdzielczości (`-subsample`) profilu jakości."""
+    for parametr in PARAMETRY_JAKOSCI.get(jakosc, ()):
+        if parametr.startswith('-subsample='):
+            return int(parametr.split('=', 1)[1])
+    return 1
+
+
+# Rozszerzenia plików DjVu wyszukiwane w katalogach
+WZORCE_DJVU = ['*.djvu', '*.djv', '*.DJVU', '*.DJV']
+
+# Tańszy profil jakości używany przy ponowieniu po przekroczeniu limitu czasu. Niższa
+# jakość JPEG nie skraca dekodowania, dlatego od razu przechodzimy do połowy rozdzielczości.
+TANSZY_PROFIL = {
+    'high': 'draft',
+    'normal': 'draft',
+    'low': 'draft'
+}
+
+# Błędy, których ponawianie nie ma sensu (i które nie trafiają do kwarantanny)
+BLEDY_BEZ_PONOWIEN = ('brak_programu', 'brak_zaleznosci')
+
+# Podkatalog katalogu wyjściowego z raportami plików, których nie udało się skonwertować
+KATALOG_KWARANTANNY = '_kwarantanna'
+
+# Podkatalog katalogu wyjściowego ze znacznikami plików PDF, które są jeszcze szkicami
+KATALOG_SZKICOW = '_szkice'
+
+# Maska uprawnień procesu - pliki tymczasowe dostają po publikacji zwykłe uprawnienia
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def katalog_pamieci_podrecznej(podkatalog=''):
+    """Zwraca katalog pamięci podręcznej aplikacji dla bieżącego systemu.
+
+    Args:
+        podkatalog (str, optional): Podkatalog wewnątrz katalogu aplikacji.
+
+    Zwraca:
+        str: %LOCALAPPDATA%\\konwerter_djvutopdf w Windows lub
+            $XDG_CACHE_HOME/konwerter_djvutopdf (domyślnie ~/.cache) w pozostałych.
+    """
+    if os.name == 'nt':
+        baza = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        baza = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(baza, 'konwerter_djvutopdf', podkatalog)
+
+
+def plik_tymczasowy(plik_docelowy, przyrostek='.part'):
+    """Tworzy unikalny plik tymczasowy obok pliku docelowego.
+
+    Plik jest w tym samym katalogu, więc można go opublikować przez
+    `os.replace`, a unikalna nazwa pozwala kilku próbom lub procesom pisać
+    wynik tego samego pliku bez nadpisywania sobie nawzajem danych.
+
+    Args:
+        plik_docelowy (str): Ścieżka, pod którą plik zostanie opublikowany.
+        przyrostek (str, optional): Końcówka nazwy pliku. Domyślnie '.part'.
+
+    Zwraca:
+        str: Ścieżka do utworzonego (pustego) pliku tymczasowego.
+    """
+    katalog, nazwa = os.path.split(os.path.abspath(plik_docelowy))
+    uchwyt, sciezka = tempfile.mkstemp(prefix=nazwa + '.', suffix=przyrostek, dir=katalog)
+    os.close(uchwyt)
+    # mkstemp tworzy plik z uprawnieniami 0600 - po publikacji ma wyglądać jak zwykły plik
+    os.chmod(sciezka, 0o666 & ~_UMASK)
+    return sciezka
+
+
+def znajdz_narzedzie(nazwa, sciezka_ddjvu=None):
+    """Znajduje ścieżkę do narzędzia z pakietu DjVuLibre (np. 'djvutxt').
+
+    Sprawdza najpierw katalog, w którym znajduje się ddjvu, a następnie PATH.
+
+    Args:
+        nazwa (str): Nazwa narzędzia bez rozszerzenia.
+        sciezka_ddjvu (str, optional): Ścieżka do ddjvu z tej samej instalacji.
+
+    Zwraca:
+        str: Pełna ścieżka do narzędzia lub None, jeśli nie znaleziono.
+    """
+    if sciezka_ddjvu:
+        kandydat = os.path.join(os.path.dirname(sciezka_ddjvu), nazwa + ('.exe' if os.name == 'nt' else ''))
+        if os.path.isfile(kandydat) and os.access(kandydat, os.X_OK):
+            return kandydat
+    for kandydat in (nazwa, nazwa + '.exe'):
+        sciezka = shutil.which(kandydat)
+        if sciezka:
+            return sciezka
+    return None
+
+
+def znajdz_ddjvu():
+    """Znajduje ścieżkę do pliku wykonywalnego ddjvu.
+
+    Sprawdza najpierw zmienną środowiskową DJVU_PATH. Jeśli nie zostanie znaleziona,
+    przeszukuje systemową zmienną PATH w poszukiwaniu 'ddjvu' lub 'ddjvu.exe'.
+
+    Zwraca:
+        str: Pełna ścieżka do pliku wykonywalnego ddjvu lub None, jeśli nie znaleziono.
+    """
+    env_path = os.environ.get('DJVU_PATH')
+    if env_path:
+        if os.path.isfile(env_path) and os.access(env_path, os.X_OK):
+            return env_path
+        # Jeśli podano katalog, spróbuj znaleźć w nim ddjvu
+        if os.path.isdir(env_path):
+            candidate = os.path.join(env_path, 'ddjvu.exe' if os.name == 'nt' else 'ddjvu')
+            if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                return candidate
+
+    return znajdz_narzedzie('ddjvu')
+
+
+def wersja_ddjvu(sciezka_ddjvu, timeout_s=10):
+    """Odczytuje wersję DjVuLibre z komunikatu pomocy ddjvu.
+
+    Zwraca:
+        str | None: Wersja (np. '3.5.28') lub None, jeśli nie udało się jej ustalić.
+    """
+    try:
+        wynik = subprocess.run([sciezka_ddjvu, '--help'], capture_output=True, text=True, timeout=timeout_s)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    dopasowanie = re.search(r'DjVuLibre-([\w.]+)', wynik.stdout + wynik.stderr)
+    return dopasowanie.group(1) if dopasowanie else None
+
+
+def sprawdz_ddjvu(uzyj_pamieci=True):
+    """Znajduje ddjvu i ustala jego wersję, zapamiętując wynik między uruchomieniami.
+
+    Zapamiętany wynik jest używany, dopóki plik ddjvu istnieje, nie zmienił się
+    jego czas modyfikacji ani wartości zmiennych DJVU_PATH i PATH. Pozwala to
+    pominąć przeszukiwanie PATH i uruchamianie ddjvu przy każdym starcie.
+
+    Args:
+        uzyj_pamieci (bool, optional): Czy korzystać z zapamiętanego wyniku. Domyślnie True.
+
+    Zwraca:
+        dict: {'sciezka': str | None, 'wersja': str | None}.
+    """
+    plik_pamieci = os.path.join(katalog_pamieci_podrecznej(), 'ddjvu.json')
+    srodowisko = [os.environ.get('DJVU_PATH', ''), os.environ.get('PATH', '')]
+
+    if uzyj_pamieci:
+        try:
+            with open(plik_pamieci, encoding='utf-8') as f:
+                zapis = json.load(f)
+            if zapis['srodowisko'] == srodowisko and os.stat(zapis['sciezka']).st_mtime_ns == zapis['mtime']:
+                return {'sciezka': zapis['sciezka'], 'wersja': zapis['wersja']}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    sciezka = znajdz_ddjvu()
+    wersja = wersja_ddjvu(sciezka) if sciezka else None
+    if sciezka:
+        try:
+            os.makedirs(os.path.dirname(plik_pamieci), exist_ok=True)
+            with open(plik_pamieci, 'w', encoding='utf-8') as f:
+                json.dump({'sciezka': sciezka, 'mtime': os.stat(sciezka).st_mtime_ns,
+                           'wersja': wersja, 'srodowisko': srodowisko}, f)
+        except OSError:
+            pass
+    return {'sciezka': sciezka, 'wersja': wersja}
+
+
+def rodzaj_djvu(plik_djvu):
+    """Rozpoznaje rodzaj pliku DjVu na podstawie nagłówka IFF.
+
+    Rodzaj jest ustalany przez `sonda_djvu.sonduj` bez dekodowania stron; dla
+    dokumentów wielostronicowych (DJVM) decyduje flaga katalogu DIRM mówiąca,
+    czy strony są zapisane w tym samym pliku (bundled), czy w osobnych plikach
+    składowych (indirect).
+
+    Args:
+        plik_djvu (str): Ścieżka do pliku.
+
+    Zwraca:
+        str | None: 'strona' (dokument jednostronicowy), 'dokument' (wielostronicowy,
+        spakowany), 'indeks' (plik indeksu dokumentu wieloplikowego), 'dolaczany'
+        (współdzielony plik składowy DJVI) lub None, jeśli nagłówek jest nieczytelny.
+    """
+    return sonduj(plik_djvu).rodzaj
+
+
+def skladniki_indeksu(plik_indeksu, sciezka_djvused, timeout_s=30):
+    """Zwraca pliki składowe dokumentu wieloplikowego (indirect).
+
+    Nazwy składników w katalogu DIRM są skompresowane (BZZ), dlatego są
+    odczytywane narzędziem `djvused` z pakietu DjVuLibre.
+
+    Args:
+        plik_indeksu (str): Ścieżka do pliku indeksu.
+        sciezka_djvused (str): Ścieżka do pliku wykonywalnego djvused.
+        timeout_s (int, optional): Limit czasu w sekundach. Domyślnie 30.
+
+    Zwraca:
+        list[str] | None: Bezwzględne ścieżki składników lub None, jeśli nie
+        udało się ich odczytać.
+    """
+    try:
+        wynik = subprocess.run([sciezka_djvused, plik_indeksu, '-e', 'ls'],
+                               capture_output=True, text=True, timeout=timeout_s)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if wynik.returncode != 0:
+        return None
+    katalog = os.path.dirname(os.path.abspath(plik_indeksu))
+    skladniki = []
+    for wiersz in wynik.stdout.splitlines():
+        # Format wiersza: [numer strony] typ (P/I/A/T) rozmiar identyfikator [T=tytuł]
+        dopasowanie = re.match(r'\s*(?:\d+\s+)?[PIAT]\s+\d+\s+(.+?)(?:\s+T=.*)?$', wiersz)
+        if dopasowanie:
+            skladniki.append(os.path.join(katalog, dopasowanie.group(1)))
+    return skladniki
+
+
+def podziel_pliki_djvu(pliki, sciezka_ddjvu=None, nieodczytane=None):
+    """Oddziela dokumenty do konwersji od plików składowych dokumentów wieloplikowych.
+
+    Dokument wieloplikowy (indirect) składa się z pliku indeksu i osobnych
+    plików stron, więc konwertowany jest tylko indeks. Pliki składowe (oraz
+    współdzielone pliki DJVI, które nie są samodzielnymi dokumentami) są
+    pomijane. Jeśli listy składników nie da się odczytać (np. brak `djvused`),
+    żaden plik nie jest pomijany jako składnik - indeks trafia do `nieodczytane`.
+
+    Args:
+        pliki (list[str]): Ścieżki plików DjVu.
+        sciezka_ddjvu (str, optional): Ścieżka do ddjvu, przy którym szukany jest djvused.
+        nieodczytane (list, optional): Lista, do której dopisywane są pliki
+            indeksu, których składników nie udało się odczytać.
+
+    Zwraca:
+        tuple[list[str], list[str]]: Pliki do konwersji i pominięte pliki składowe.
+    """
+    rodzaje = {plik: rodzaj_djvu(plik) for plik in pliki}
+    indeksy = [plik for plik, rodzaj in rodzaje.items() if rodzaj == 'indeks']
+    skladniki = set()
+    if indeksy:
+        sciezka_djvused = znajdz_narzedzie('djvused', sciezka_ddjvu)
+        for indeks in indeksy:
+            lista = skladniki_indeksu(indeks, sciezka_djvused) if sciezka_djvused else None
+            if lista is None:
+                if nieodczytane is not None:
+                    nieodczytane.append(indeks)
+                continue
+            skladniki.update(os.path.normcase(os.path.abspath(plik)) for plik in lista)
+
+    dokumenty, pominiete = [], []
+    for plik in pliki:
+        if rodzaje[plik] == 'dolaczany' or (rodzaje[plik] != 'indeks'
+                                             and os.path.normcase(os.path.abspath(plik)) in skladniki):
+            pominiete.append(plik)
+        else:
+            dokumenty.append(plik)
+    return dokumenty, pominiete
+
+
+def znajdz_pliki_djvu(katalog, sciezka_ddjvu=None, pominiete=None, nieodczytane=None):
+    """Znajduje wszystkie dokumenty DjVu w podanym katalogu.
+
+    Pliki składowe dokumentów wieloplikowych są pomijane - konwertowany jest
+    tylko ich plik indeksu (patrz `podziel_pliki_djvu`).
+
+    Args:
+        katalog (str): Ścieżka do katalogu do przeszukania.
+        sciezka_ddjvu (str, optional): Ścieżka do ddjvu, przy którym szukany jest djvused.
+        pominiete (list, optional): Lista, do której dopisywane są pominięte pliki składowe.
+        nieodczytane (list, optional): Lista, do której dopisywane są pliki
+            indeksu, których składników nie udało się odczytać.
+
+    Zwraca:
+        list[str]: Posortowana lista ścieżek do znalezionych dokumentów DjVu.
+    """
+    pliki = []
+    for wzorzec in WZORCE_DJVU:
+        pliki.extend(glob.glob(os.path.join(katalog, wzorzec)))
+    # W systemach bez rozróżniania wielkości liter wzorce mogą dopasować ten sam plik
+    dokumenty, skladniki = podziel_pliki_djvu(sorted(set(pliki)), sciezka_ddjvu, nieodczytane)
+    if pominiete is not None:
+        pominiete.extend(skladniki)
+    return dokumenty
+
+
+def sciezka_pdf(plik_djvu, katalog_wyjsciowy):
+    """Zwraca ścieżkę pliku PDF odpowiadającego plikowi DjVu w katalogu wyjściowym."""
+    nazwa_bazowa = os.path.splitext(os.path.basename(plik_djvu))[0]
+    return os.path.join(katalog_wyjsciowy, f"{nazwa_bazowa}.pdf")
+
+
+class WynikKonwersji:
+    """Wynik konwersji pojedynczego pliku zwracany przez backendy.
+
+    Atrybuty:
+        ok (bool): True, jeśli konwersja się powiodła.
+        plik_wyjsciowy (str): Ścieżka do docelowego pliku PDF.
+        blad (str | None): Rodzaj błędu: 'kod' (niezerowy kod wyjścia),
+            'timeout', 'brak_programu', 'brak_zaleznosci' (brak biblioteki
+            Pillow), 'wyjatek' lub 'uszkodzony' (plik odrzucony przed
+            konwersją); None przy sukcesie.
+        kod (int | None): Kod wyjścia procesu ddjvu (dla błędu 'kod').
+        stdout (str): Standardowe wyjście procesu.
+        stderr (str): Standardowe wyjście błędów procesu.
+        opis (str): Opis błędu dla błędów typu 'wyjatek' i 'uszkodzony'.
+        czas_s (float): Czas trwania konwersji w sekundach.
+        backend (str): Nazwa silnika, który wykonał konwersję.
+        jakosc (str | None): Profil jakości ostatniej próby (ustawiany przez
+            `konwertuj_z_ponowieniami`).
+        proby (int): Liczba wykonanych prób.
+        raport (str | None): Ścieżka raportu w kwarantannie, jeśli plik tam trafił.
+    """
+    def __init__(self, ok, plik_wyjsciowy, blad=None, kod=None, stdout='', stderr='',
+                 opis='', czas_s=0.0, backend='', jakosc=None, proby=1, raport=None):
+        self.ok = ok
+        self.plik_wyjsciowy = plik_wyjsciowy
+        self.blad = blad
+        self.kod = kod
+        self.stdout = stdout
+        self.stderr = stderr
+        self.opis = opis
+        self.czas_s = czas_s
+        self.backend = backend
+        self.jakosc = jakosc
+        self.proby = proby
+        self.raport = raport
+
+    def __bool__(self):
+        return self.ok
+
+
+def zapisz_pdf(plik_pdf, strony, liczba_stron, jakosc='normal'):
+    """Zapisuje obrazy stron do pliku PDF jednym wywołaniem Pillow.
+
+    Dopisywanie stron po jednej (`append=True`) za każdym razem ponownie
+    parsuje cały plik PDF, więc czas rośnie kwadratowo z liczbą stron. Tutaj
+    strony są zapisywane jednym przebiegiem `save_all`, a pobierane z
+    iteratora dopiero wtedy, gdy koder ich potrzebuje - w pamięci jest
+    jednocześnie tylko jedna strona.
+
+    Rozmiar strony w PDF wynika z rozdzielczości pierwszej strony; strony
+    o innej rozdzielczości są przeskalowywane, aby zachować ich wymiary.
+
+    Args:
+        plik_pdf (str): Ścieżka do docelowego pliku PDF.
+        strony (iterable[tuple[PIL.Image.Image, int]]): Obrazy kolejnych stron
+            i ich rozdzielczość w dpi.
+        liczba_stron (int): Liczba stron (musi być znana przed zapisem).
+        jakosc (str, optional): Jakość JPEG stron kolorowych i w skali szarości
+            (patrz `JAKOSC_JPEG`); strony dwukolorowe są kodowane bezstratnie (CCITT).
+
+    Wyjątki:
+        RuntimeError: Gdy iterator zwróci mniej stron niż `liczba_stron`.
+        Wyjątki zgłoszone przez iterator (np. `subprocess.TimeoutExpired`) są przekazywane dalej.
+    """
+    if liczba_stron < 1:
+        raise RuntimeError("Dokument nie ma stron")
+    strony = _klasa_stron_pdf()(strony, liczba_stron, JAKOSC_JPEG.get(jakosc, 75))
+    strony.save(plik_pdf, 'PDF', save_all=True, resolution=strony.dpi)
+
+
+_KlasaStronPdf = None
+
+
+def _klasa_stron_pdf():
+    """Tworzy (raz) klasę wielostronicowego obrazu Pillow renderowanego na żądanie.
+
+    Pillow jest importowana dopiero tutaj, aby nie spowalniać startu programu.
+    """
+    global _KlasaStronPdf
+    if _KlasaStronPdf is not None:
+        return _KlasaStronPdf
+    from PIL import Image
+
+    class StronyPdf(Image.Image):
+        """Obraz wieloklatkowy, którego klatki są pobierane z iteratora przy `seek`."""
+        def __init__(self, strony, liczba_stron, jakosc):
+            super().__init__()
+            self._strony = iter(strony)
+            self._jakosc = jakosc
+            self._numer = -1
+            self.n_frames = liczba_stron
+            self.is_animated = liczba_stron > 1
+            self.dpi = None
+            self.seek(0)
+
+        def seek(self, numer):
+            if numer != self._numer:
+                self._wczytaj(numer)
+            # Ustawienia kodera są kopiowane przez Pillow przed zapisem pierwszej klatki
+            if hasattr(self, 'encoderinfo'):
+                if self.mode == '1':
+                    # Strony dwukolorowe są kodowane bezstratnie (CCITT) - bez jakości JPEG
+                    self.encoderinfo.pop('quality', None)
+                else:
+                    self.encoderinfo['quality'] = self._jakosc
+
+        def _wczytaj(self, numer):
+            if numer != self._numer + 1 or numer >= self.n_frames:
+                raise EOFError(numer)
+            try:
+                obraz, dpi = next(self._strony)
+            except StopIteration:
+                raise RuntimeError(f"Brak strony {numer + 1} z {self.n_frames}") from None
+            if obraz.mode not in ('1', 'L', 'RGB', 'CMYK'):
+                obraz = obraz.convert('RGB')
+            if self.dpi is None:
+                self.dpi = dpi
+            elif dpi != self.dpi:
+                obraz = obraz.resize((max(1, round(obraz.width * self.dpi / dpi)),
+                                      max(1, round(obraz.height * self.dpi / dpi))))
+            obraz.load()
+            self.im = obraz.im
+            self._mode = obraz.mode
+            self._size = obraz.size
+            self._numer = numer
+
+        def tell(self):
+            return self._numer
+
+    _KlasaStronPdf = StronyPdf
+    return StronyPdf
+
+
+class Backend:
+    """Interfejs silnika konwersji.
+
+    Atrybuty:
+        nazwa (str): Krótka nazwa silnika wyświetlana użytkownikowi.
+    """
+    nazwa = ''
+
+    def konwertuj(self, plik_djvu, plik_pdf, jakosc='normal', timeout_s=300):
+        """Konwertuje plik DjVu do PDF.
+
+        Args:
+            plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+            plik_pdf (str): Ścieżka do docelowego pliku PDF.
+            jakosc (str, optional): 'low', 'normal' lub 'high'. Domyślnie 'normal'.
+            timeout_s (int, optional): Timeout konwersji w sekundach. Domyślnie 300.
+
+        Zwraca:
+            WynikKonwersji: Wynik konwersji.
+        """
+        raise NotImplementedError
+
+    def renderuj_strone(self, plik_djvu, strona, rozmiar, plik_ppm, timeout_s=60):
+        """Renderuje jedną stronę, pomniejszoną do podanego rozmiaru, do pliku PPM.
+
+        Args:
+            plik_djvu (str): Ścieżka do pliku DjVu.
+            strona (int): Numer strony (od 1).
+            rozmiar (tuple[int, int]): Maksymalna szerokość i wysokość.
+            plik_ppm (str): Ścieżka do docelowego pliku PPM.
+            timeout_s (int, optional): Limit czasu w sekundach. Domyślnie 60.
+
+        Wyjątki:
+            RuntimeError: Gdy nie udało się wyrenderować strony.
+        """
+        raise NotImplementedError
+
+
+class BackendDdjvu(Backend):
+    """Silnik uruchamiający `ddjvu` w osobnym procesie dla każdego pliku.
+
+    Atrybuty:
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+    """
+    nazwa = 'ddjvu'
+
+    def __init__(self, sciezka_ddjvu):
+        self.sciezka_ddjvu = sciezka_ddjvu
+
+    def konwertuj(self, plik_djvu, plik_pdf, jakosc='normal', timeout_s=300):
+        params = PARAMETRY_JAKOSCI.get(jakosc, ['-quality=75'])
+        cmd = [self.sciezka_ddjvu, '-format=pdf'] + params + [plik_djvu, plik_pdf]
+        start = time.monotonic()
+        try:
+            wynik = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
+        except subprocess.TimeoutExpired:
+            return WynikKonwersji(False, plik_pdf, 'timeout', czas_s=time.monotonic() - start, backend=self.nazwa)
+        except FileNotFoundError:
+            return WynikKonwersji(False, plik_pdf, 'brak_programu', backend=self.nazwa)
+        except Exception as e:
+            return WynikKonwersji(False, plik_pdf, 'wyjatek', opis=str(e), backend=self.nazwa)
+        czas_s = time.monotonic() - start
+        if wynik.returncode == 0:
+            return WynikKonwersji(True, plik_pdf, czas_s=czas_s, backend=self.nazwa)
+        return WynikKonwersji(False, plik_pdf, 'kod', wynik.returncode, wynik.stdout, wynik.stderr,
+                              czas_s=czas_s, backend=self.nazwa)
+
+    def renderuj_strone(self, plik_djvu, strona, rozmiar, plik_ppm, timeout_s=60):
+        cmd = [self.sciezka_ddjvu, '-format=ppm', f'-page={strona}', f'-size={rozmiar[0]}x{rozmiar[1]}',
+               '-aspect=yes', plik_djvu, plik_ppm]
+        wynik = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
+        if wynik.returncode != 0 or not os.path.exists(plik_ppm) or os.path.getsize(plik_ppm) == 0:
+            raise RuntimeError(wynik.stderr.strip() or f"ddjvu zakończył się kodem {wynik.returncode}")
+
+
+class BackendDjvuLibre(Backend):
+    """Silnik renderujący strony w bieżącym procesie przez `python-djvulibre`.
+
+    Każdy wątek ma własny kontekst DjVuLibre i pamięć ostatnio otwartych
+    dokumentów, dzięki czemu kolejne operacje na tym samym pliku (np. podgląd
+    kilku stron) nie otwierają go ponownie. Gdy renderowanie się nie powiedzie,
+    konwersja jest powtarzana silnikiem rezerwowym (zwykle `BackendDdjvu`).
+
+    Atrybuty:
+        rezerwa (Backend | None): Silnik używany po błędzie renderowania.
+        max_dokumentow (int): Liczba otwartych dokumentów trzymanych na wątek.
+    """
+    nazwa = 'djvulibre'
+
+    def __init__(self, rezerwa=None, max_dokumentow=4):
+        import djvu.decode
+        from PIL import Image
+        self._decode = djvu.decode
+        self._Image = Image
+        self.rezerwa = rezerwa
+        self.max_dokumentow = max_dokumentow
+        self._watki = threading.local()
+
+    @staticmethod
+    def dostepny():
+        """Zwraca True, jeśli zainstalowano `python-djvulibre` i Pillow.
+
+        Sprawdzenie nie importuje tych bibliotek, aby nie spowalniać startu.
+        """
+        import importlib.util
+        try:
+            return all(importlib.util.find_spec(nazwa) is not None for nazwa in ('djvu.decode', 'PIL'))
+        except ImportError:
+            return False
+
+    def _dokument(self, plik_djvu):
+        """Zwraca otwarty dokument, korzystając z pamięci bieżącego wątku."""
+        stan = self._watki
+        if not hasattr(stan, 'kontekst'):
+            stan.kontekst = self._decode.Context()
+            stan.dokumenty = OrderedDict()
+
+        klucz = os.path.abspath(plik_djvu)
+        mtime = os.stat(klucz).st_mtime_ns
+        wpis = stan.dokumenty.pop(klucz, None)
+        if wpis and wpis[0] == mtime:
+            dokument = wpis[1]
+        else:
+            dokument = stan.kontekst.new_document(self._decode.FileURI(klucz))
+            dokument.decoding_job.wait()
+            if dokument.decoding_job.status != self._decode.JobOK:
+                raise RuntimeError(f"Nie można otworzyć dokumentu: {os.path.basename(plik_djvu)}")
+        stan.dokumenty[klucz] = (mtime, dokument)
+        while len(stan.dokumenty) > self.max_dokumentow:
+            stan.dokumenty.popitem(last=False)
+        return dokument
+
+    def _renderuj(self, strona, rozmiar=None, dpi=None, podprobkowanie=1):
+        """Renderuje stronę do obrazu Pillow.
+
+        Args:
+            strona: Strona dokumentu `djvu.decode`.
+            rozmiar (tuple[int, int], optional): Maksymalny rozmiar pomniejszonego obrazu.
+            dpi (int, optional): Docelowa rozdzielczość; strona jest renderowana
+                w skali, która zachowuje jej wymiary. Domyślnie rozdzielczość strony.
+            podprobkowanie (int): Dzielnik rozdzielczości strony, gdy nie podano
+                `dpi` (odpowiednik `-subsample` w ddjvu).
+
+        Zwraca:
+            tuple[PIL.Image.Image, int]: Obraz i jego rozdzielczość.
+        """
+        zadanie = strona.decode(wait=True)
+        szerokosc, wysokosc = zadanie.size
+        dpi_strony = zadanie.dpi or 300
+        skala = 1.0
+        if rozmiar:
+            skala = min(rozmiar[0] / szerokosc, rozmiar[1] / wysokosc, 1.0)
+        elif dpi:
+            skala, dpi_strony = dpi / dpi_strony, dpi
+        elif podprobkowanie > 1:
+            skala, dpi_strony = 1 / podprobkowanie, max(1, round(dpi_strony / podprobkowanie))
+        if skala != 1.0:
+            szerokosc, wysokosc = max(1, int(szerokosc * skala)), max(1, int(wysokosc * skala))
+        prostokat = (0, 0, szerokosc, wysokosc)
+
+        if zadanie.type == self._decode.PAGE_TYPE_BITONAL:
+            format_pikseli, tryb = self._decode.PixelFormatGrey(), 'L'
+        else:
+            format_pikseli, tryb = self._decode.PixelFormatRgb(), 'RGB'
+        format_pikseli.rows_top_to_bottom = 1
+        format_pikseli.y_top_to_bottom = 0
+        dane = zadanie.render(self._decode.RENDER_COLOR, prostokat, prostokat, format_pikseli, 1)
+        obraz = self._Image.frombuffer(tryb, (szerokosc, wysokosc), dane, 'raw', tryb, 0, 1)
+        # Strona dwukolorowa w oryginalnej rozdzielczości - po skalowaniu zostaje w skali szarości
+        if tryb == 'L' and skala == 1.0:
+            obraz = obraz.convert('1', dither=self._Image.Dither.NONE)
+        return obraz, dpi_strony
+
+    def konwertuj(self, plik_djvu, plik_pdf, jakosc='normal', timeout_s=300):
+        start = time.monotonic()
+        katalog = os.path.dirname(os.path.abspath(plik_pdf))
+        uchwyt, plik_tymczasowy = tempfile.mkstemp(suffix='.pdf.tmp', dir=katalog)
+        os.close(uchwyt)
+        try:
+            dokument = self._dokument(plik_djvu)
+            dzielnik = podprobkowanie(jakosc)
+
+            def strony():
+                dpi = None
+                for strona in dokument.pages:
+                    if time.monotonic() - start > timeout_s:
+                        raise subprocess.TimeoutExpired(plik_djvu, timeout_s)
+                    # Kolejne strony w rozdzielczości pierwszej (jedna rozdzielczość na cały PDF)
+                    obraz, dpi = self._renderuj(strona, dpi=dpi, podprobkowanie=dzielnik)
+                    yield obraz, dpi
+
+            zapisz_pdf(plik_tymczasowy, strony(), len(dokument.pages), jakosc)
+            os.replace(plik_tymczasowy, plik_pdf)
+        except subprocess.TimeoutExpired:
+            return WynikKonwersji(False, plik_pdf, 'timeout', czas_s=time.monotonic() - start, backend=self.nazwa)
+        except Exception as e:
+            if self.rezerwa:
+                return self.rezerwa.konwertuj(plik_djvu, plik_pdf, jakosc,
+                                              max(1, timeout_s - int(time.monotonic() - start)))
+            return WynikKonwersji(False, plik_pdf, 'wyjatek', opis=str(e) or e.__class__.__name__,
+                                  czas_s=time.monotonic() - start, backend=self.nazwa)
+        finally:
+            if os.path.exists(plik_tymczasowy):
+                os.remove(plik_tymczasowy)
+        return WynikKonwersji(True, plik_pdf, czas_s=time.monotonic() - start, backend=self.nazwa)
+
+    def renderuj_strone(self, plik_djvu, strona, rozmiar, plik_ppm, timeout_s=60):
+        try:
+            dokument = self._dokument(plik_djvu)
+            if not 1 <= strona <= len(dokument.pages):
+                raise RuntimeError(f"Brak strony {strona}")
+            obraz, _ = self._renderuj(dokument.pages[strona - 1], rozmiar)
+            obraz.save(plik_ppm, 'PPM')
+        except Exception:
+            if self.rezerwa:
+                return self.rezerwa.renderuj_strone(plik_djvu, strona, rozmiar, plik_ppm, timeout_s)
+            raise
+
+
+def wybierz_backend(sciezka_ddjvu=None, preferowany=None):
+    """Tworzy silnik konwersji, wybierając najszybszy dostępny.
+
+    Args:
+        sciezka_ddjvu (str, optional): Ścieżka do ddjvu dla silnika procesowego
+            i jako rezerwa silnika wbudowanego.
+        preferowany (str, optional): 'auto', 'ddjvu' lub 'djvulibre'.
+            Domyślnie wartość zmiennej DJVU_BACKEND lub 'auto'.
+
+    Zwraca:
+        Backend | None: Wybrany silnik lub None, jeśli żaden nie jest dostępny.
+    """
+    preferowany = (preferowany or os.environ.get('DJVU_BACKEND') or 'auto').lower()
+    rezerwa = BackendDdjvu(sciezka_ddjvu) if sciezka_ddjvu else None
+    if preferowany != 'ddjvu' and BackendDjvuLibre.dostepny():
+        try:
+            return BackendDjvuLibre(rezerwa)
+        except ImportError:
+            pass
+    return rezerwa
+
+
+_backendy = {}
+_blokada_backendow = threading.Lock()
+
+
+def pobierz_backend(sciezka_ddjvu=None):
+    """Zwraca współdzielony silnik konwersji dla danej ścieżki ddjvu.
+
+    Silnik jest tworzony raz (przez `wybierz_backend`) i używany ponownie,
+    aby silnik wbudowany mógł utrzymywać otwarte dokumenty między wywołaniami.
+
+    Zwraca:
+        Backend | None: Silnik lub None, jeśli żaden nie jest dostępny.
+    """
+    with _blokada_backendow:
+        if sciezka_ddjvu not in _backendy:
+            _backendy[sciezka_ddjvu] = wybierz_backend(sciezka_ddjvu)
+        return _backendy[sciezka_ddjvu]
+
+
+class PolitykaPonowien:
+    """Polityka ponawiania nieudanych konwersji.
+
+    Atrybuty:
+        max_prob (int): Maksymalna liczba prób jednego pliku (1 = bez ponowień).
+        opoznienie_s (float): Opóźnienie przed pierwszym ponowieniem błędu przejściowego.
+        mnoznik (float): Mnożnik opóźnienia dla kolejnych ponowień.
+        tanszy_profil (bool): Czy po timeoucie ponawiać w tańszym profilu (`TANSZY_PROFIL`).
+        kwarantanna (bool): Czy zapisywać raport plików, których nie udało się skonwertować.
+    """
+    def __init__(self, max_prob=3, opoznienie_s=2.0, mnoznik=2.0, tanszy_profil=True, kwarantanna=True):
+        self.max_prob = max(1, max_prob)
+        self.opoznienie_s = opoznienie_s
+        self.mnoznik = mnoznik
+        self.tanszy_profil = tanszy_profil
+        self.kwarantanna = kwarantanna
+
+    def opoznienie(self, proba):
+        """Zwraca opóźnienie (w sekundach) po nieudanej próbie o podanym numerze (od 1)."""
+        return self.opoznienie_s * self.mnoznik ** (proba - 1)
+
+    def nastepna_proba(self, wynik, proby, jakosc):
+        """Decyduje, czy i jak ponowić nieudaną próbę.
+
+        - timeout: ponowienie od razu, w tańszym profilu jakości (`TANSZY_PROFIL`),
+        - inne błędy: ponowienie po opóźnieniu rosnącym wykładniczo,
+        - błędy z `BLEDY_BEZ_PONOWIEN`: bez ponowień.
+
+        Args:
+            wynik (WynikKonwersji): Wynik ostatniej próby.
+            proby (int): Liczba wykonanych prób.
+            jakosc (str): Profil jakości ostatniej próby.
+
+        Zwraca:
+            tuple[str, float, str] | None: Profil jakości i opóźnienie (w sekundach)
+            następnej próby oraz opis powodu albo None, jeśli nie należy ponawiać.
+        """
+        if wynik.ok or wynik.blad in BLEDY_BEZ_PONOWIEN or proby >= self.max_prob:
+            return None
+        if wynik.blad == 'timeout' and self.tanszy_profil:
+            jakosc = TANSZY_PROFIL.get(jakosc, jakosc)
+            return jakosc, 0, f"przekroczono limit czasu, profil {jakosc}"
+        opoznienie = self.opoznienie(proby)
+        return jakosc, opoznienie, f"błąd {wynik.blad}, ponowienie za {opoznienie:g}s"
+
+
+def ogon(tekst, linie=20):
+    """Zwraca ostatnie `linie` niepustych wierszy tekstu."""
+    return '\n'.join([wiersz for wiersz in (tekst or '').splitlines() if wiersz.strip()][-linie:])
+
+
+def zapisz_raport_kwarantanny(plik_djvu, katalog_wyjsciowy, proby):
+    """Zapisuje raport pliku, którego nie udało się skonwertować.
+
+    Raport trafia do podkatalogu `KATALOG_KWARANTANNY` katalogu wyjściowego i
+    zawiera przebieg wszystkich prób oraz końcówkę komunikatów błędów. Plik
+    źródłowy nie jest przenoszony.
+
+    Args:
+        plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+        katalog_wyjsciowy (str): Katalog wyjściowy konwersji.
+        proby (list[WynikKonwersji]): Wyniki kolejnych prób.
+
+    Zwraca:
+        str: Ścieżka do zapisanego raportu.
+    """
+    katalog = os.path.join(katalog_wyjsciowy, KATALOG_KWARANTANNY)
+    os.makedirs(katalog, exist_ok=True)
+    raport = os.path.join(katalog, os.path.basename(plik_djvu) + '.txt')
+    wiersze = [f"Plik: {os.path.abspath(plik_djvu)}",
+               f"Data: {datetime.datetime.now().isoformat(timespec='seconds')}",
+               f"Próby: {len(proby)}", ""]
+    for numer, wynik in enumerate(proby, 1):
+        kod = f", kod {wynik.kod}" if wynik.kod is not None else ""
+        wiersze.append(f"Próba {numer}: silnik {wynik.backend}, jakość {wynik.jakosc}, "
+                       f"błąd {wynik.blad}{kod}, czas {wynik.czas_s:.1f}s")
+        szczegoly = ogon(wynik.stderr) or ogon(wynik.stdout) or wynik.opis
+        if szczegoly:
+            wiersze += ['    ' + wiersz for wiersz in szczegoly.splitlines()]
+    with open(raport, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(wiersze) + '\n')
+    return raport
+
+
+def oznacz_szkic(plik_pdf, szkic=True):
+    """Zapisuje lub usuwa znacznik szkicu dla pliku PDF.
+
+    Znaczniki są pustymi plikami w podkatalogu `KATALOG_SZKICOW` katalogu
+    pliku PDF, więc działają także przy kilku równoległych procesach.
+
+    Args:
+        plik_pdf (str): Ścieżka do pliku PDF.
+        szkic (bool, optional): True - oznacz jako szkic, False - usuń znacznik.
+    """
+    katalog = os.path.join(os.path.dirname(os.path.abspath(plik_pdf)), KATALOG_SZKICOW)
+    znacznik = os.path.join(katalog, os.path.basename(plik_pdf))
+    if szkic:
+        os.makedirs(katalog, exist_ok=True)
+        open(znacznik, 'w').close()
+    elif os.path.exists(znacznik):
+        os.remove(znacznik)
+        try:
+            os.rmdir(katalog)
+        except OSError:
+            pass
+
+
+def lista_szkicow(katalog_wyjsciowy):
+    """Zwraca pliki PDF z katalogu wyjściowego, które wciąż są szkicami.
+
+    Args:
+        katalog_wyjsciowy (str): Katalog wyjściowy konwersji.
+
+    Zwraca:
+        list[str]: Posortowane ścieżki plików PDF oznaczonych jako szkic.
+    """
+    katalog = os.path.join(katalog_wyjsciowy, KATALOG_SZKICOW)
+    try:
+        nazwy = os.listdir(katalog)
+    except OSError:
+        return []
+    return sorted(os.path.join(katalog_wyjsciowy, nazwa) for nazwa in nazwy
+                  if os.path.exists(os.path.join(katalog_wyjsciowy, nazwa)))
+
+
+def konwertuj_z_ponowieniami(backend, plik_djvu, plik_pdf, jakosc='normal', timeout_s=300,
+                             polityka=None, komunikat=None, szkic=False):
+    """Konwertuje plik, ponawiając nieudane próby zgodnie z polityką.
+
+    O ponowieniach decyduje `PolitykaPonowien.nastepna_proba`:
+
+    - timeout: ponowienie od razu, w tańszym profilu jakości (`TANSZY_PROFIL`),
+    - niezerowy kod wyjścia lub wyjątek: ponowienie po opóźnieniu rosnącym wykładniczo,
+    - brak programu ddjvu: bez ponowień.
+
+    Przed pierwszą próbą struktura pliku jest sprawdzana przez `sonduj`, więc
+    pliki obcięte lub uszkodzone trafiają do kwarantanny bez uruchamiania silnika.
+
+    Silnik zapisuje wynik do unikalnego pliku tymczasowego (`plik_tymczasowy`), który zastępuje plik PDF
+    (`os.replace`) dopiero po udanej konwersji - wcześniejsza wersja, np.
+    szkic, jest dostępna do tego momentu i nie jest tracona po błędzie. Jeśli
+    wszystkie próby się nie powiodą, (o ile polityka na to pozwala) zapisywany
+    jest raport w kwarantannie.
+
+    Args:
+        backend (Backend): Silnik konwersji.
+        plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+        plik_pdf (str): Ścieżka do docelowego pliku PDF.
+        jakosc (str, optional): Początkowy profil jakości. Domyślnie 'normal'.
+        timeout_s (int, optional): Timeout jednej próby w sekundach. Domyślnie 300.
+        polityka (PolitykaPonowien, optional): Polityka ponowień. Domyślnie `PolitykaPonowien()`.
+        komunikat (callable, optional): Funkcja przyjmująca tekst komunikatu o ponowieniu.
+        szkic (bool, optional): Czy oznaczyć wynik jako szkic (patrz `oznacz_szkic`).
+            Udana konwersja bez tej flagi usuwa znacznik szkicu.
+
+    Zwraca:
+        WynikKonwersji: Wynik ostatniej próby, z uzupełnionymi polami `jakosc`,
+        `proby` i `raport`.
+    """
+    polityka = polityka or PolitykaPonowien()
+    informacje = sonduj(plik_djvu)
+    if not informacje.poprawny:
+        wynik = WynikKonwersji(False, plik_pdf, 'uszkodzony', opis=informacje.blad, backend=backend.nazwa,
+                               jakosc=jakosc)
+        if polityka.kwarantanna:
+            try:
+                wynik.raport = zapisz_raport_kwarantanny(plik_djvu, os.path.dirname(os.path.abspath(plik_pdf)),
+                                                         [wynik])
+            except OSError:
+                pass
+        return wynik
+    proby = []
+    try:
+        tymczasowy = plik_tymczasowy(plik_pdf, '.pdf.part')
+    except OSError as e:
+        return WynikKonwersji(False, plik_pdf, 'wyjatek', opis=str(e), backend=backend.nazwa, jakosc=jakosc)
+    while True:
+        wynik = backend.konwertuj(plik_djvu, tymczasowy, jakosc, timeout_s)
+        wynik.jakosc = jakosc
+        proby.append(wynik)
+        nastepna = polityka.nastepna_proba(wynik, len(proby), jakosc)
+        if nastepna is None:
+            break
+        jakosc, opoznienie, powod = nastepna
+        if komunikat:
+            komunikat(f"🔁 Ponawiam {os.path.basename(plik_djvu)} "
+                      f"(próba {len(proby) + 1}/{polityka.max_prob}: {powod})")
+        time.sleep(opoznienie)
+
+    wynik.proby = len(proby)
+    wynik.plik_wyjsciowy = plik_pdf
+    if wynik.ok:
+        try:
+            os.replace(tymczasowy, plik_pdf)
+            oznacz_szkic(plik_pdf, szkic)
+        except OSError as e:
+            # Np. plik PDF otwarty w przeglądarce w Windows
+            wynik.ok, wynik.blad, wynik.opis = False, 'wyjatek', str(e)
+    if not wynik.ok:
+        if os.path.exists(tymczasowy):
+            try:
+                os.remove(tymczasowy)
+            except OSError:
+                pass
+        if polityka.kwarantanna and wynik.blad not in BLEDY_BEZ_PONOWIEN:
+            try:
+                wynik.raport = zapisz_raport_kwarantanny(plik_djvu, os.path.dirname(os.path.abspath(plik_pdf)),
+                                                         proby)
+            except OSError:
+                pass
+    return wynik
@@ -11,51 +11,16 @@ o łatwości obsługi i dobrze działa w systemie Windows, gdzie `ddjvu.exe` jes
 import os
 import sys
 import subprocess
-import glob
+import time
 from pathlib import Path
-import shutil
 
-def znajdz_ddjvu():
-    """Znajduje ścieżkę do pliku wykonywalnego ddjvu.
-
-    Sprawdza najpierw zmienną środowiskową DJVU_PATH. Jeśli nie zostanie znaleziona,
-    przeszukuje systemową zmienną PATH w poszukiwaniu 'ddjvu' lub 'ddjvu.exe'.
-
-    Zwraca:
-        str: Pełna ścieżka do pliku wykonywalnego ddjvu lub None, jeśli nie znaleziono.
-    """
-    env_path = os.environ.get('DJVU_PATH')
-    if env_path:
-        if os.path.isfile(env_path) and os.access(env_path, os.X_OK):
-            return env_path
-        # Jeśli podano katalog, spróbuj znaleźć w nim ddjvu
-        if os.path.isdir(env_path):
-            candidate = os.path.join(env_path, 'ddjvu.exe' if os.name == 'nt' else 'ddjvu')
-            if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
-                return candidate
-
-    # Szukaj w PATH
-    for name in ('ddjvu', 'ddjvu.exe'):
-        path = shutil.which(name)
-        if path:
-            return path
-
-    return None
-
-def znajdz_pliki_djvu(katalog):
-    """Znajduje wszystkie pliki DjVu w podanym katalogu.
-
-    Args:
-        katalog (str): Ścieżka do katalogu do przeszukania.
-
-    Zwraca:
-        list[str]: Posortowana lista ścieżek do znalezionych plików DjVu.
-    """
-    wzorce = ['*.djvu', '*.djv', '*.DJVU', '*.DJV']
-    pliki = []
-    for wzorzec in wzorce:
-        pliki.extend(glob.glob(os.path.join(katalog, wzorzec)))
-    return sorted(pliki)
+import archiwa
+import djvu_core
+import historia
+import sonda_djvu
+import wiele_formatow
+import indeks_tekstu
+from djvu_core import znajdz_ddjvu, znajdz_pliki_djvu
 
 def wyswietl_pliki(pliki):
     """Wyświetla numerowaną listę plików wraz z ich rozmiarami.
@@ -75,7 +40,9 @@ def wyswietl_pliki(pliki):
             rozmiar_str = f"{rozmiar_mb:.1f} MB"
         except Exception:
             rozmiar_str = "??"
-        print(f"{i:2d}. {nazwa_pliku} ({rozmiar_str})")
+        informacje = sonda_djvu.sonduj(sciezka_pliku)
+        znacznik = "" if informacje.poprawny else "⚠️  "
+        print(f"{i:2d}. {znacznik}{nazwa_pliku} ({rozmiar_str}, {informacje.opis()})")
 
 def wybierz_konkretne_pliki(pliki):
     """Prosi użytkownika o wybranie konkretnych plików z listy po numerach.
@@ -156,9 +123,124 @@ def wybierz_jakosc():
         else:
             print("❌ Wybierz 1, 2 lub 3.")
 
-def konwertuj_plik(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, jakosc='normal', timeout_s=300):
+def wybierz_formaty():
+    """Prosi użytkownika o wybór formatów wyjściowych.
+
+    Zwraca:
+        tuple[str]: Wybrane formaty (patrz `wiele_formatow.FORMATY`).
+    """
+    while True:
+        wybor = input(f"\nFormaty wyjściowe ({', '.join(wiele_formatow.FORMATY)}; Enter = pdf): ").strip()
+        try:
+            return wiele_formatow.normalizuj_formaty(wybor or 'pdf')
+        except ValueError as e:
+            print(f"❌ {e}. Podaj formaty oddzielone przecinkami (np. pdf,tiff,png).")
+
+def konwertuj_wiele_formatow(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, formaty, jakosc='normal', timeout_s=300,
+                             polityka=None):
+    """Konwertuje plik DjVu do kilku formatów naraz, dekodując go tylko raz.
+
+    Jak w `djvu_core.konwertuj_z_ponowieniami` struktura pliku jest najpierw
+    sprawdzana przez `sonduj`, a uszkodzone pliki trafiają od razu do
+    kwarantanny. Nieudane próby są ponawiane zgodnie z
+    `PolitykaPonowien.nastepna_proba` (po timeoucie dekodowanie w profilu
+    szkicu ma połowę rozdzielczości), a po wyczerpaniu prób raport trafia do
+    kwarantanny. Czas konwersji nie jest zapisywany w historii - dotyczy ona
+    samej konwersji do PDF.
+
+    Args:
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+        plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+        katalog_wyjsciowy (str): Katalog na pliki wynikowe.
+        formaty (tuple[str]): Formaty wyjściowe.
+        jakosc (str, optional): Jakość konwersji. Domyślnie 'normal'.
+        timeout_s (int, optional): Timeout jednej próby w sekundach. Domyślnie 300.
+        polityka (djvu_core.PolitykaPonowien, optional): Polityka ponowień.
+            Domyślnie 3 próby z kwarantanną.
+
+    Zwraca:
+        bool: True, jeśli konwersja się powiodła, w przeciwnym razie False.
+    """
+    polityka = polityka or djvu_core.PolitykaPonowien()
+    print(f"🔄 Konwertuję: {os.path.basename(plik_djvu)} -> {', '.join(formaty)}")
+    informacje = sonda_djvu.sonduj(plik_djvu)
+    if not informacje.poprawny:
+        print(f"❌ Pominięto uszkodzony plik {os.path.basename(plik_djvu)}: {informacje.blad}")
+        if polityka.kwarantanna:
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'uszkodzony', opis=informacje.blad, backend='ddjvu',
+                                             jakosc=jakosc)
+            try:
+                raport = djvu_core.zapisz_raport_kwarantanny(plik_djvu, katalog_wyjsciowy, [wynik])
+                print(f"🚫 Kwarantanna, raport: {raport}")
+            except OSError:
+                pass
+        return False
+    proby = []
+    jakosc_poczatkowa = jakosc
+    while True:
+        start = time.monotonic()
+        try:
+            utworzone = wiele_formatow.konwertuj_wiele(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy,
+                                                       formaty, jakosc, timeout_s)
+            break
+        except wiele_formatow.BrakZaleznosci as e:
+            print(f"❌ {e}")
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'brak_zaleznosci', opis=str(e))
+        except wiele_formatow.BladKonwersji as e:
+            print(f"❌ Błąd konwersji: {e}")
+            if e.stdout:
+                print("---- STDOUT ----")
+                print(e.stdout)
+            if e.stderr:
+                print("---- STDERR ----")
+                print(e.stderr)
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'kod', kod=e.kod, stdout=e.stdout, stderr=e.stderr,
+                                             opis=str(e))
+        except subprocess.TimeoutExpired:
+            print(f"❌ Przekroczono limit czasu ({timeout_s}s) dla pliku: {os.path.basename(plik_djvu)}")
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'timeout')
+        except FileNotFoundError:
+            print("❌ Nie znaleziono ddjvu — sprawdź czy ddjvu.exe jest w PATH lub DJVU_PATH.")
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'brak_programu')
+        except Exception as e:
+            print(f"❌ Nieoczekiwany błąd: {e}")
+            wynik = djvu_core.WynikKonwersji(False, plik_djvu, 'wyjatek', opis=str(e) or e.__class__.__name__)
+        wynik.czas_s = time.monotonic() - start
+        wynik.backend = 'ddjvu'
+        wynik.jakosc = jakosc
+        proby.append(wynik)
+        nastepna = polityka.nastepna_proba(wynik, len(proby), jakosc)
+        if nastepna is None:
+            if polityka.kwarantanna and wynik.blad not in djvu_core.BLEDY_BEZ_PONOWIEN:
+                try:
+                    raport = djvu_core.zapisz_raport_kwarantanny(plik_djvu, katalog_wyjsciowy, proby)
+                    print(f"🚫 Kwarantanna po {len(proby)} próbach, raport: {raport}")
+                except OSError:
+                    pass
+            return False
+        jakosc, opoznienie, powod = nastepna
+        print(f"🔁 Ponawiam {os.path.basename(plik_djvu)} (próba {len(proby) + 1}/{polityka.max_prob}: {powod})")
+        time.sleep(opoznienie)
+    pliki_stron = [p for p in utworzone if not p.endswith(('.pdf', '.tif'))]
+    for sciezka in utworzone:
+        if sciezka not in pliki_stron:
+            print(f"✅ Utworzono: {os.path.basename(sciezka)}")
+    if pliki_stron:
+        print(f"✅ Utworzono {len(pliki_stron)} obrazów stron w: {os.path.dirname(pliki_stron[0])}")
+    if jakosc != jakosc_poczatkowa:
+        print(f"⚠️  Pliki zapisano w obniżonej jakości ({jakosc})")
+    return True
+
+def konwertuj_plik(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, jakosc='normal', timeout_s=300, formaty=None,
+                   polityka=None, historia_konwersji=None, szkic=False):
     """Konwertuje pojedynczy plik DjVu do formatu PDF za pomocą narzędzia ddjvu.
 
+    Nieudane konwersje są ponawiane zgodnie z polityką ponowień (patrz
+    `djvu_core.konwertuj_z_ponowieniami`). Jeśli podano `formaty` inne niż sam
+    PDF, plik jest dekodowany raz i rozsyłany do wszystkich wybranych formatów
+    (patrz `konwertuj_wiele_formatow`) - wtedy czas konwersji nie trafia do
+    historii, a `szkic` jest ignorowany.
+
     Args:
         sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
         plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
@@ -167,47 +249,106 @@ def konwertuj_plik(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, jakosc='normal',
             Może być 'low', 'normal' lub 'high'. Domyślnie 'normal'.
         timeout_s (int, optional): Timeout konwersji w sekundach.
             Domyślnie 300.
+        formaty (tuple[str], optional): Formaty wyjściowe. Domyślnie tylko PDF.
+        polityka (djvu_core.PolitykaPonowien, optional): Polityka ponowień.
+            Domyślnie 3 próby z kwarantanną.
+        historia_konwersji (historia.Historia, optional): Historia, w której
+            zapisywany jest czas konwersji PDF.
+        szkic (bool, optional): Czy oznaczyć wynik jako szkic, który zastąpi
+            późniejsza konwersja w pełnej jakości. Domyślnie False.
 
     Zwraca:
         bool: True, jeśli konwersja się powiodła, w przeciwnym razie False.
     """
-    nazwa_bazowa = os.path.splitext(os.path.basename(plik_djvu))[0]
-    plik_pdf = os.path.join(katalog_wyjsciowy, f"{nazwa_bazowa}.pdf")
-    parametry_jakosci = {
-        'low': ['-quality=25', '-smooth'],
-        'normal': ['-quality=75'],
-        'high': ['-quality=100', '-smooth']
-    }
-    params = parametry_jakosci.get(jakosc, ['-quality=75'])
-    cmd = [sciezka_ddjvu, '-format=pdf'] + params + [plik_djvu, plik_pdf]
-    print(f"🔄 Konwertuję: {os.path.basename(plik_djvu)} -> {os.path.basename(plik_pdf)}")
-    try:
-        wynik = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
-        if wynik.returncode == 0:
-            try:
-                rozmiar_mb = os.path.getsize(plik_pdf) / (1024 * 1024)
-                print(f"✅ Utworzono: {os.path.basename(plik_pdf)} ({rozmiar_mb:.1f} MB)")
-            except Exception:
-                print(f"✅ Utworzono: {os.path.basename(plik_pdf)}")
-            return True
-        else:
-            print(f"❌ Błąd konwersji (kod {wynik.returncode}). stdout/stderr:")
-            if wynik.stdout:
-                print("---- STDOUT ----")
-                print(wynik.stdout)
-            if wynik.stderr:
-                print("---- STDERR ----")
-                print(wynik.stderr)
-            return False
-    except subprocess.TimeoutExpired:
+    if formaty and tuple(formaty) != ('pdf',):
+        return konwertuj_wiele_formatow(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, formaty, jakosc, timeout_s,
+                                        polityka)
+    plik_pdf = djvu_core.sciezka_pdf(plik_djvu, katalog_wyjsciowy)
+    print(f"{'📝 Szkic' if szkic else '🔄 Konwertuję'}: {os.path.basename(plik_djvu)} -> {os.path.basename(plik_pdf)}")
+    backend = djvu_core.pobierz_backend(sciezka_ddjvu)
+    wynik = djvu_core.konwertuj_z_ponowieniami(backend, plik_djvu, plik_pdf, jakosc, timeout_s,
+                                               polityka, komunikat=print, szkic=szkic)
+    if historia_konwersji:
+        historia_konwersji.zapisz(plik_djvu, wynik)
+    if wynik.ok:
+        try:
+            rozmiar_mb = os.path.getsize(plik_pdf) / (1024 * 1024)
+            print(f"✅ Utworzono: {os.path.basename(plik_pdf)} ({rozmiar_mb:.1f} MB)")
+        except Exception:
+            print(f"✅ Utworzono: {os.path.basename(plik_pdf)}")
+        if wynik.jakosc != jakosc:
+            print(f"⚠️  Plik zapisano w obniżonej jakości ({wynik.jakosc})")
+        return True
+    if wynik.blad == 'kod':
+        print(f"❌ Błąd konwersji (kod {wynik.kod}). stdout/stderr:")
+        if wynik.stdout:
+            print("---- STDOUT ----")
+            print(wynik.stdout)
+        if wynik.stderr:
+            print("---- STDERR ----")
+            print(wynik.stderr)
+    elif wynik.blad == 'timeout':
         print(f"❌ Przekroczono limit czasu ({timeout_s}s) dla pliku: {os.path.basename(plik_djvu)}")
-        return False
-    except FileNotFoundError:
+    elif wynik.blad == 'brak_programu':
         print("❌ Nie znaleziono ddjvu — sprawdź czy ddjvu.exe jest w PATH lub DJVU_PATH.")
-        return False
-    except Exception as e:
-        print(f"❌ Nieoczekiwany błąd: {e}")
-        return False
+    elif wynik.blad == 'uszkodzony':
+        print(f"❌ Pominięto uszkodzony plik {os.path.basename(plik_djvu)}: {wynik.opis}")
+    else:
+        print(f"❌ Nieoczekiwany błąd: {wynik.opis}")
+    if wynik.raport:
+        print(f"🚫 Kwarantanna po {wynik.proby} próbach, raport: {wynik.raport}")
+    return False
+
+def konwertuj_archiwum_interaktywnie(sciezka_ddjvu, archiwum):
+    """Pyta o ustawienia i konwertuje pliki DjVu z archiwum ZIP/TAR bez rozpakowywania całości.
+
+    Args:
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+        archiwum (str): Ścieżka do archiwum.
+    """
+    rozmiary = archiwa.rozmiary_plikow_djvu(archiwum)
+    if rozmiary is not None:
+        print(f"\n📦 Archiwum zawiera {len(rozmiary)} plików DjVu "
+              f"({historia.formatuj_rozmiar(sum(rozmiary.values()))} po rozpakowaniu)")
+    else:
+        print("\n📦 Archiwum TAR - pliki DjVu zostaną znalezione podczas czytania archiwum")
+
+    domyslne = os.path.splitext(os.path.abspath(archiwum))[0] + '_pdf'
+    wyjscie = input(f"Katalog docelowy lub archiwum wynikowe .zip/.tar (Enter = {domyslne}): ").strip() or domyslne
+    jakosc = wybierz_jakosc()
+    try:
+        timeout_s = int(input("\nTimeout konwersji w sekundach (Enter = 300): ").strip() or "300")
+    except ValueError:
+        timeout_s = 300
+    try:
+        max_prob = int(input("Liczba prób dla nieudanych plików (Enter = 3): ").strip() or "3")
+    except ValueError:
+        max_prob = 3
+    try:
+        liczba_watkow = max(1, int(input("Liczba równoległych konwersji (Enter = 1): ").strip() or "1"))
+    except ValueError:
+        liczba_watkow = 1
+
+    if not input("\nRozpocząć konwersję? (t/n): ").lower().startswith('t'):
+        return
+    historia_konwersji = historia.otworz_historie()
+    try:
+        ok, bledy = archiwa.konwertuj_archiwum(sciezka_ddjvu, archiwum, wyjscie, jakosc, timeout_s,
+                                               djvu_core.PolitykaPonowien(max_prob), liczba_watkow,
+                                               historia_konwersji)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        if historia_konwersji:
+            historia_konwersji.zamknij()
+
+    print("\n" + "=" * 60)
+    print("📊 PODSUMOWANIE")
+    print("=" * 60)
+    print(f"✅ Pomyślnie skonwertowano: {ok}")
+    print(f"❌ Błędy: {bledy}")
+    print(f"📁 Pliki wynikowe zapisano w: {wyjscie}")
 
 def main():
     """Główna funkcja uruchamiająca interaktywny konwerter DjVu na PDF."""
@@ -223,18 +364,31 @@ def main():
         sys.exit(1)
     else:
         print(f"ℹ️  Wykryto ddjvu: {sciezka_ddjvu}")
+        print(f"ℹ️  Silnik konwersji: {djvu_core.pobierz_backend(sciezka_ddjvu).nazwa}")
 
     while True:
         print(f"\n📂 Aktualny katalog: {os.getcwd()}")
-        katalog = input("Podaj ścieżkę do katalogu z plikami DjVu (Enter = aktualny): ").strip()
+        katalog = input("Podaj ścieżkę do katalogu z plikami DjVu lub archiwum ZIP/TAR (Enter = aktualny): ").strip()
         if not katalog:
             katalog = os.getcwd()
+        if archiwa.jest_archiwum(katalog):
+            konwertuj_archiwum_interaktywnie(sciezka_ddjvu, katalog)
+            if not input("\nKonwertować kolejne pliki? (t/n): ").lower().startswith('t'):
+                break
+            continue
         if not os.path.isdir(katalog):
             print("❌ Podany katalog nie istnieje!")
             continue
 
-        pliki_djvu = znajdz_pliki_djvu(katalog)
+        pominiete, nieodczytane = [], []
+        pliki_djvu = znajdz_pliki_djvu(katalog, sciezka_ddjvu, pominiete, nieodczytane)
         wyswietl_pliki(pliki_djvu)
+        if pominiete:
+            print(f"ℹ️  Pominięto {len(pominiete)} plików składowych dokumentów wieloplikowych "
+                  f"(konwertowany jest tylko plik indeksu).")
+        for indeks in nieodczytane:
+            print(f"⚠️  Nie można odczytać plików składowych {os.path.basename(indeks)} narzędziem djvused - "
+                  f"pliki jednostronicowe z jego katalogu zostaną skonwertowane osobno.")
         if not pliki_djvu:
             if input("\nSpróbować inny katalog? (t/n): ").lower().startswith('t'):
                 continue
@@ -251,35 +405,116 @@ def main():
         Path(katalog_wyjsciowy).mkdir(parents=True, exist_ok=True)
 
         jakosc = wybierz_jakosc()
+        formaty = wybierz_formaty()
+        if tuple(formaty) != ('pdf',):
+            print("ℹ️  Czasy konwersji do wielu formatów nie są zapisywane w historii "
+                  "(szacunki czasu dotyczą samego PDF).")
 
         try:
             timeout_s = int(input("\nTimeout konwersji w sekundach (Enter = 300): ").strip() or "300")
         except ValueError:
             timeout_s = 300
 
+        try:
+            max_prob = int(input("Liczba prób dla nieudanych plików (Enter = 3): ").strip() or "3")
+        except ValueError:
+            max_prob = 3
+        polityka = djvu_core.PolitykaPonowien(max_prob)
+
+        # Szkice mają sens tylko dla PDF (w trybie wielu formatów plik i tak jest dekodowany raz)
+        dwa_przebiegi = (tuple(formaty) == ('pdf',) and
+                         input("Tryb dwuprzebiegowy: najpierw szybkie szkice PDF, potem pełna jakość? (t/n): ")
+                         .lower().startswith('t'))
+
+        sciezka_djvutxt = None
+        if input("\nBudować indeks pełnotekstowy z warstwy tekstowej? (t/n): ").lower().startswith('t'):
+            sciezka_djvutxt = indeks_tekstu.znajdz_djvutxt(sciezka_ddjvu)
+            if not sciezka_djvutxt:
+                print("⚠️  Nie znaleziono djvutxt — indeks nie zostanie zbudowany.")
+        sciezka_indeksu = os.path.join(katalog_wyjsciowy, indeks_tekstu.NAZWA_BAZY)
+
+        historia_konwersji = historia.otworz_historie()
+        plan = historia.zaplanuj(wybrane_pliki, jakosc, 1, historia_konwersji) if historia_konwersji else None
+
         print(f"\n📋 Podsumowanie:")
         print(f"   Plików do konwersji: {len(wybrane_pliki)}")
         print(f"   Katalog docelowy: {katalog_wyjsciowy}")
         print(f"   Jakość: {jakosc}")
+        print(f"   Formaty: {', '.join(formaty)}")
         print(f"   Timeout: {timeout_s}s")
-
-        if not input("\nRozpocząć konwersję? (t/n): ").lower().startswith('t'):
+        print(f"   Próby: {polityka.max_prob}")
+        if dwa_przebiegi:
+            print("   Tryb: najpierw szkice, potem pełna jakość")
+        if plan:
+            print(f"   Szacowany czas: {plan.opis()}")
+        if sciezka_djvutxt:
+            print(f"   Indeks tekstu: {sciezka_indeksu}")
+
+        wybor = input("\nRozpocząć konwersję? (t/n" + (", p = tylko plan" if plan else "") + "): ").lower()
+        while plan and wybor.startswith('p'):
+            historia.wypisz_plan(plan)
+            wybor = input("\nRozpocząć konwersję? (t/n): ").lower()
+        if not wybor.startswith('t'):
+            if historia_konwersji:
+                historia_konwersji.zamknij()
             continue
 
+        indeksowanie = None
+        if sciezka_djvutxt:
+            indeksowanie = indeks_tekstu.IndeksowanieWTle(sciezka_indeksu, sciezka_djvutxt, timeout_s=timeout_s)
+
         licznik_sukcesow = 0
         licznik_bledow = 0
-        for sciezka_pliku in wybrane_pliki:
-            if konwertuj_plik(sciezka_ddjvu, sciezka_pliku, katalog_wyjsciowy, jakosc, timeout_s):
-                licznik_sukcesow += 1
-            else:
-                licznik_bledow += 1
+        # Przebieg szkiców jest szybki i bez ponowień - błędy ponowi przebieg końcowy
+        przebiegi = [(jakosc, False, polityka)]
+        if dwa_przebiegi:
+            przebiegi.insert(0, ('draft', True, djvu_core.PolitykaPonowien(1, kwarantanna=False)))
+        for numer_przebiegu, (jakosc_przebiegu, szkic, polityka_przebiegu) in enumerate(przebiegi):
+            if dwa_przebiegi:
+                print(f"\n{'📝 Przebieg 1: szkice' if szkic else '🔄 Przebieg 2: pełna jakość'}")
+            eta = None
+            if historia_konwersji:
+                eta = historia.ETA(historia_konwersji.szacunek(jakosc_przebiegu), 1, wybrane_pliki)
+            for numer, sciezka_pliku in enumerate(wybrane_pliki, 1):
+                if indeksowanie and numer_przebiegu == 0:
+                    indeksowanie.zlec(sciezka_pliku)
+                ok = konwertuj_plik(sciezka_ddjvu, sciezka_pliku, katalog_wyjsciowy, jakosc_przebiegu, timeout_s,
+                                    formaty, polityka_przebiegu, historia_konwersji, szkic)
+                if not szkic:
+                    if ok:
+                        licznik_sukcesow += 1
+                    else:
+                        licznik_bledow += 1
+                if eta:
+                    eta.zakonczono(sciezka_pliku)
+                if numer < len(wybrane_pliki):
+                    print(f"⏳ {numer}/{len(wybrane_pliki)}" + (f", {eta.opis()}" if eta else ""))
+        if historia_konwersji:
+            historia_konwersji.zamknij()
+
+        if indeksowanie:
+            print("⏳ Kończę indeksowanie tekstu...")
+            indeksowanie.zakoncz()
 
         print("\n" + "=" * 60)
         print("📊 PODSUMOWANIE")
         print("=" * 60)
         print(f"✅ Pomyślnie skonwertowano: {licznik_sukcesow}")
         print(f"❌ Błędy: {licznik_bledow}")
-        print(f"📁 Pliki PDF zapisano w: {katalog_wyjsciowy}")
+        print(f"📁 Pliki wynikowe zapisano w: {katalog_wyjsciowy}")
+        katalog_kwarantanny = os.path.join(katalog_wyjsciowy, djvu_core.KATALOG_KWARANTANNY)
+        if licznik_bledow and os.path.isdir(katalog_kwarantanny):
+            print(f"🚫 Raporty nieudanych plików: {katalog_kwarantanny}")
+        szkice = djvu_core.lista_szkicow(katalog_wyjsciowy)
+        if szkice:
+            print(f"📝 Wciąż szkice (nie udała się konwersja w pełnej jakości): {len(szkice)}")
+            for plik_pdf in szkice:
+                print(f"   {os.path.basename(plik_pdf)}")
+        if indeksowanie:
+            print(f"🔍 Zindeksowano {indeksowanie.liczba_dokumentow} dokumentów "
+                  f"({indeksowanie.liczba_stron} stron z tekstem) w: {sciezka_indeksu}")
+            for plik, blad in indeksowanie.bledy:
+                print(f"   ⚠️  {os.path.basename(plik)}: {blad}")
 
         if not input("\nKonwertować kolejne pliki? (t/n): ").lower().startswith('t'):
             break
@@ -10,14 +10,21 @@ wiersza poleceń `ddjvu`.
 
 import os
 import sys
-import subprocess
-import glob
+import sqlite3
+import time
 import threading
 from pathlib import Path
-import shutil
 from tkinter import *
 from tkinter import ttk, filedialog, messagebox
 
+import djvu_core
+import historia
+from job_queue import JobQueue
+from sonda_djvu import sonduj
+
+# Maksymalny rozmiar miniatury w panelu podglądu (szerokość, wysokość)
+THUMBNAIL_SIZE = (180, 240)
+
 class DjVuToPDFGUI:
     """
     Zarządza główną aplikacją GUI do konwersji DjVu na PDF.
@@ -28,18 +35,30 @@ class DjVuToPDFGUI:
 
     Atrybuty:
         root (Tk): Główne okno tkinter.
-        selected_files (list[str]): Lista absolutnych ścieżek do plików DjVu
-            wybranych przez użytkownika.
+        job_queue (JobQueue): Trwała kolejka plików do konwersji, z której
+            wątki konwertujące pobierają kolejne zadania.
+        listed_files (list[str]): Pliki wyświetlane na liście (najpierw
+            konwertowane, potem oczekujące), w kolejności wierszy listboxa.
         ddjvu_path (str | None): Ścieżka do pliku wykonywalnego `ddjvu`.
+        ddjvu_checked (bool): True po zakończeniu sprawdzania ddjvu w tle.
+        backend (djvu_core.Backend | None): Silnik konwersji wybrany przez `djvu_core`.
         output_directory (StringVar): Zmienna tkinter przechowująca ścieżkę
             do katalogu wyjściowego.
         quality (StringVar): Zmienna tkinter dla wybranej jakości konwersji
             ('low', 'normal', 'high').
+        workers (IntVar): Zmienna tkinter z liczbą równoległych konwersji.
+        retries (IntVar): Zmienna tkinter z maksymalną liczbą prób jednego pliku.
+        two_pass (BooleanVar): Czy najpierw tworzyć szybki szkic PDF, a wersję
+            w pełnej jakości konwertować później, z niższym priorytetem.
         timeout (IntVar): Zmienna tkinter dla limitu czasu konwersji w sekundach.
         same_directory (BooleanVar): Zmienna tkinter, która jest True, jeśli pliki
             mają być zapisywane w tym samym katalogu co pliki źródłowe.
         is_converting (bool): Flaga wskazująca, czy proces konwersji jest
             aktualnie aktywny.
+        preview_file (str | None): Plik wyświetlany w panelu podglądu.
+        preview_page (int): Numer strony wyświetlanej w panelu podglądu.
+        thumbnail_worker (ThumbnailWorker | None): Wątek renderujący miniatury
+            w tle, tworzony po sprawdzeniu ddjvu.
     """
     def __init__(self, root):
         """
@@ -54,17 +73,35 @@ class DjVuToPDFGUI:
         self.root.minsize(700, 500)
 
         # Zmienne
-        self.selected_files = []
+        self.job_queue = JobQueue(os.path.join(djvu_core.katalog_pamieci_podrecznej(), 'kolejka.json'),
+                                  on_change=self.queue_changed)
+        self.listed_files = []
+        self.list_refresh_pending = False
         self.ddjvu_path = None
+        self.ddjvu_checked = False
+        self.backend = None
         self.output_directory = StringVar()
         self.quality = StringVar(value='normal')
         self.timeout = IntVar(value=300)
+        self.workers = IntVar(value=1)
+        self.retries = IntVar(value=3)
         self.same_directory = BooleanVar(value=True)
+        self.two_pass = BooleanVar(value=False)
         self.is_converting = False
+        self.preview_file = None
+        self.preview_page = 1
+        self.preview_image = None
+        self.thumbnail_worker = None
+        self.history = None
+        self.eta = None
 
         self.setup_ui()
+        self.update_files_list()
+        self.quality.trace_add('write', lambda *args: self.update_files_list())
+        self.workers.trace_add('write', lambda *args: self.update_files_list())
         self.center_window()
-        self.check_ddjvu()
+        # Sprawdzanie ddjvu i podsystemy pomocnicze startują dopiero po pokazaniu okna
+        self.root.after_idle(self.check_ddjvu)
 
     def center_window(self):
         """Wyśrodkowuje główne okno aplikacji na ekranie."""
@@ -114,6 +151,22 @@ class DjVuToPDFGUI:
         ttk.Button(buttons_frame, text="Wyczyść listę",
                   command=self.clear_files).pack(side=LEFT)
 
+        # Przyciski zarządzania kolejką
+        queue_frame = ttk.Frame(files_frame)
+        queue_frame.grid(row=3, column=0, columnspan=2, sticky=(W, E), pady=(10, 0))
+
+        ttk.Button(queue_frame, text="Na początek",
+                  command=self.bump_selected).pack(side=LEFT, padx=(0, 10))
+        ttk.Button(queue_frame, text="▲", width=3,
+                  command=lambda: self.move_selected(-1)).pack(side=LEFT, padx=(0, 5))
+        ttk.Button(queue_frame, text="▼", width=3,
+                  command=lambda: self.move_selected(1)).pack(side=LEFT, padx=(0, 10))
+        ttk.Button(queue_frame, text="Usuń z kolejki",
+                  command=self.remove_selected).pack(side=LEFT, padx=(0, 10))
+        self.pause_button = ttk.Button(queue_frame, text="Wstrzymaj kolejkę",
+                                       command=self.toggle_pause)
+        self.pause_button.pack(side=LEFT)
+
         # Etykieta z informacją o plikach
         self.files_info_label = ttk.Label(files_frame, text="Nie wybrano plików")
         self.files_info_label.grid(row=1, column=0, columnspan=2, sticky=W, pady=(0, 5))
@@ -124,13 +177,29 @@ class DjVuToPDFGUI:
         list_frame.columnconfigure(0, weight=1)
         list_frame.rowconfigure(0, weight=1)
 
-        self.files_listbox = Listbox(list_frame, height=6)
+        self.files_listbox = Listbox(list_frame, height=6, selectmode=EXTENDED)
         self.files_listbox.grid(row=0, column=0, sticky=(W, E, N, S), padx=(0, 10))
 
         # Pasek przewijania dla listy
         scrollbar = ttk.Scrollbar(list_frame, orient=VERTICAL, command=self.files_listbox.yview)
         scrollbar.grid(row=0, column=1, sticky=(N, S))
         self.files_listbox.configure(yscrollcommand=scrollbar.set)
+        self.files_listbox.bind('<<ListboxSelect>>', self.on_file_select)
+
+        # Panel podglądu wybranego pliku
+        preview_frame = ttk.LabelFrame(list_frame, text="Podgląd", padding="5")
+        preview_frame.grid(row=0, column=2, sticky=(N, S), padx=(10, 0))
+
+        self.preview_label = ttk.Label(preview_frame, text="Wybierz plik z listy",
+                                       anchor=CENTER, justify=CENTER, width=26)
+        self.preview_label.grid(row=0, column=0, columnspan=3, pady=(0, 5))
+
+        ttk.Button(preview_frame, text="◀", width=3,
+                  command=lambda: self.change_preview_page(-1)).grid(row=1, column=0)
+        self.preview_page_label = ttk.Label(preview_frame, text="")
+        self.preview_page_label.grid(row=1, column=1)
+        ttk.Button(preview_frame, text="▶", width=3,
+                  command=lambda: self.change_preview_page(1)).grid(row=1, column=2)
 
         # Sekcja ustawień
         settings_frame = ttk.LabelFrame(main_frame, text="Ustawienia konwersji", padding="10")
@@ -159,6 +228,26 @@ class DjVuToPDFGUI:
         self.timeout_spinbox.pack(side=LEFT, padx=(0, 10))
         ttk.Label(timeout_frame, text="(30-3600 sekund)").pack(side=LEFT)
 
+        # Liczba równoległych konwersji
+        ttk.Label(settings_frame, text="Równoległe konwersje:").grid(row=4, column=0, sticky=W, padx=(0, 10), pady=(10, 0))
+        self.workers_spinbox = ttk.Spinbox(settings_frame, from_=1, to=max(1, os.cpu_count() or 1),
+                                          width=10, textvariable=self.workers)
+        self.workers_spinbox.grid(row=4, column=1, sticky=W, pady=(10, 0))
+
+        # Ponawianie nieudanych konwersji
+        ttk.Label(settings_frame, text="Próby na plik:").grid(row=5, column=0, sticky=W, padx=(0, 10), pady=(10, 0))
+        retries_frame = ttk.Frame(settings_frame)
+        retries_frame.grid(row=5, column=1, sticky=W, pady=(10, 0))
+
+        self.retries_spinbox = ttk.Spinbox(retries_frame, from_=1, to=5,
+                                          width=10, textvariable=self.retries)
+        self.retries_spinbox.pack(side=LEFT, padx=(0, 10))
+        ttk.Label(retries_frame, text="(po timeoucie ponowienie w niższej jakości)").pack(side=LEFT)
+
+        # Tryb dwuprzebiegowy
+        ttk.Checkbutton(settings_frame, text="Najpierw szybki szkic PDF, potem pełna jakość",
+                       variable=self.two_pass).grid(row=6, column=0, columnspan=2, sticky=W, pady=(10, 0))
+
         # Katalog wyjściowy
         ttk.Checkbutton(settings_frame, text="Zapisz w tym samym katalogu co pliki źródłowe",
                        variable=self.same_directory,
@@ -202,10 +291,15 @@ class DjVuToPDFGUI:
         log_scrollbar.grid(row=0, column=1, sticky=(N, S))
         self.log_text.configure(yscrollcommand=log_scrollbar.set)
 
-        # Przycisk konwersji
-        self.convert_button = ttk.Button(convert_frame, text="Rozpocznij konwersję",
+        # Przyciski konwersji i planu
+        actions_frame = ttk.Frame(convert_frame)
+        actions_frame.grid(row=3, column=0, pady=(0, 10))
+
+        self.convert_button = ttk.Button(actions_frame, text="Rozpocznij konwersję",
                                         command=self.start_conversion)
-        self.convert_button.grid(row=3, column=0, pady=(0, 10))
+        self.convert_button.pack(side=LEFT, padx=(0, 10))
+        ttk.Button(actions_frame, text="Pokaż plan",
+                  command=self.show_plan).pack(side=LEFT)
 
         # Konfiguracja wag dla responsywności
         main_frame.rowconfigure(2, weight=1)
@@ -221,47 +315,165 @@ class DjVuToPDFGUI:
         Zwraca:
             str: Pełna ścieżka do pliku wykonywalnego ddjvu lub None, jeśli nie znaleziono.
         """
-        env_path = os.environ.get('DJVU_PATH')
-        if env_path:
-            if os.path.isfile(env_path) and os.access(env_path, os.X_OK):
-                return env_path
-            if os.path.isdir(env_path):
-                candidate = os.path.join(env_path, 'ddjvu.exe' if os.name == 'nt' else 'ddjvu')
-                if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
-                    return candidate
+        return djvu_core.znajdz_ddjvu()
 
-        for name in ('ddjvu', 'ddjvu.exe'):
-            path = shutil.which(name)
-            if path:
-                return path
+    def check_ddjvu(self):
+        """
+        Sprawdza dostępność pliku wykonywalnego ddjvu w wątku w tle.
 
-        return None
+        Lokalizacja i wersja ddjvu są zapamiętywane między uruchomieniami
+        (`djvu_core.sprawdz_ddjvu`), więc zwykle sprawdzenie sprowadza się do
+        odczytu małego pliku. W tym samym wątku otwierana jest historia
+        konwersji używana do szacowania czasu. Wynik trafia do GUI przez
+        `ddjvu_check_finished` zawsze, także gdy sprawdzenie się nie powiedzie.
+        """
+        def probe():
+            info, backend = {'sciezka': None, 'wersja': None}, None
+            try:
+                info = djvu_core.sprawdz_ddjvu()
+                backend = djvu_core.pobierz_backend(info['sciezka']) if info['sciezka'] else None
+            except Exception as e:
+                info = {'sciezka': None, 'wersja': None, 'blad': str(e) or e.__class__.__name__}
+            finally:
+                try:
+                    self.history = historia.Historia()
+                except (OSError, sqlite3.Error):
+                    self.history = None
+                self.root.after(0, self.ddjvu_check_finished, info, backend)
 
-    def check_ddjvu(self):
+        thread = threading.Thread(target=probe)
+        thread.daemon = True
+        thread.start()
+
+    def ddjvu_check_finished(self, info, backend):
         """
-        Sprawdza dostępność pliku wykonywalnego ddjvu i aktualizuje etykietę statusu w GUI.
+        Aktualizuje etykietę statusu po sprawdzeniu ddjvu i uruchamia podgląd miniatur.
+
+        Args:
+            info (dict): Wynik `djvu_core.sprawdz_ddjvu` ('sciezka', 'wersja'),
+                z kluczem 'blad', jeśli sprawdzenie się nie powiodło.
+            backend (djvu_core.Backend | None): Wybrany silnik konwersji.
         """
-        self.ddjvu_path = self.find_ddjvu()
+        self.ddjvu_path = info['sciezka']
+        self.backend = backend
+        self.ddjvu_checked = True
         if self.ddjvu_path:
-            self.ddjvu_status_label.config(text=f"✅ ddjvu znaleziony: {os.path.basename(self.ddjvu_path)}", foreground='green')
+            version = f" {info['wersja']}" if info['wersja'] else ""
+            self.ddjvu_status_label.config(text=f"✅ ddjvu znaleziony: {os.path.basename(self.ddjvu_path)}{version} "
+                                                f"(silnik: {self.backend.nazwa})", foreground='green')
+        elif info.get('blad'):
+            self.ddjvu_status_label.config(text=f"❌ Nie udało się sprawdzić ddjvu: {info['blad']}", foreground='red')
         else:
             self.ddjvu_status_label.config(text="❌ ddjvu nie znaleziony - sprawdź PATH lub DJVU_PATH", foreground='red')
+        self.setup_thumbnails()
+        self.update_files_list()
+
+    def setup_thumbnails(self):
+        """
+        Tworzy pamięć podręczną miniatur i wątek renderujący je w tle.
+
+        Jeśli domyślnego katalogu pamięci podręcznej nie da się utworzyć,
+        miniatury są przechowywane w katalogu tymczasowym.
+        """
+        from thumbnail_cache import ThumbnailCache, ThumbnailWorker
+
+        try:
+            cache = ThumbnailCache()
+        except OSError:
+            import tempfile
+            cache = ThumbnailCache(os.path.join(tempfile.gettempdir(), 'konwerter_djvutopdf_miniatury'))
+        self.thumbnail_worker = ThumbnailWorker(
+            cache, self.backend, THUMBNAIL_SIZE,
+            lambda *args: self.root.after(0, self.show_thumbnail, *args))
+        if self.listed_files:
+            self.thumbnail_worker.prefetch(self.listed_files)
+
+    def on_file_select(self, event=None):
+        """Wyświetla podgląd pierwszej strony pliku zaznaczonego na liście."""
+        selection = self.files_listbox.curselection()
+        if not selection or selection[0] >= len(self.listed_files):
+            return
+        self.preview_file = self.listed_files[selection[0]]
+        self.preview_page = 1
+        self.request_preview()
+
+    def change_preview_page(self, delta):
+        """
+        Przełącza podgląd na inną stronę bieżącego pliku.
+
+        Args:
+            delta (int): Przesunięcie numeru strony (np. -1 lub 1).
+        """
+        if not self.preview_file:
+            return
+        self.preview_page = max(1, self.preview_page + delta)
+        self.request_preview()
+
+    def request_preview(self):
+        """Zleca wątkowi w tle wyrenderowanie bieżącej strony podglądu."""
+        self.preview_page_label.config(text=f"Strona {self.preview_page}")
+        self.preview_label.config(image='', text="Wczytywanie...")
+        if self.thumbnail_worker:
+            self.thumbnail_worker.request(self.preview_file, self.preview_page)
+
+    def show_thumbnail(self, djvu_file, page, path, error):
+        """
+        Wyświetla wyrenderowaną miniaturę w panelu podglądu.
+
+        Wyniki dotyczące pliku lub strony, które nie są już wybrane, są pomijane.
+
+        Args:
+            djvu_file (str): Plik, którego dotyczy miniatura.
+            page (int): Numer strony.
+            path (str | None): Ścieżka do pliku PPM z miniaturą.
+            error (str | None): Opis błędu, jeśli renderowanie się nie powiodło.
+        """
+        if djvu_file != self.preview_file or page != self.preview_page:
+            return
+        if error:
+            self.preview_image = None
+            self.preview_label.config(image='', text=f"Brak podglądu:\n{error[:80]}")
+            return
+        try:
+            self.preview_image = PhotoImage(file=path)
+        except TclError as e:
+            self.preview_label.config(image='', text=f"Brak podglądu:\n{e}")
+            return
+        self.preview_label.config(image=self.preview_image, text='')
 
     def find_djvu_files(self, directory):
         """
-        Znajduje wszystkie pliki DjVu w podanym katalogu.
+        Znajduje wszystkie dokumenty DjVu w podanym katalogu.
+
+        Pliki składowe dokumentów wieloplikowych są pomijane (konwertowany jest
+        tylko ich plik indeksu), a ich liczba jest zapisywana w logu.
 
         Args:
             directory (str): Ścieżka do katalogu do przeszukania.
 
         Zwraca:
-            list[str]: Posortowana lista ścieżek do znalezionych plików DjVu.
+            list[str]: Posortowana lista ścieżek do znalezionych dokumentów DjVu.
         """
-        patterns = ['*.djvu', '*.djv', '*.DJVU', '*.DJV']
-        files = []
-        for pattern in patterns:
-            files.extend(glob.glob(os.path.join(directory, pattern)))
-        return sorted(files)
+        skipped, unread = [], []
+        files = djvu_core.znajdz_pliki_djvu(directory, self.ddjvu_path, skipped, unread)
+        self.log_skipped_components(skipped, unread)
+        return files
+
+    def log_skipped_components(self, skipped, unread=()):
+        """
+        Zapisuje w logu informację o pominiętych plikach składowych.
+
+        Args:
+            skipped (list[str]): Pominięte pliki składowe dokumentów wieloplikowych.
+            unread (list[str], optional): Pliki indeksu, których składników nie
+                udało się odczytać.
+        """
+        if skipped:
+            self.log_message(f"ℹ️ Pominięto {len(skipped)} plików składowych dokumentów wieloplikowych "
+                             f"(konwertowany jest tylko plik indeksu)")
+        for index in unread:
+            self.log_message(f"⚠️ Nie można odczytać plików składowych {os.path.basename(index)} narzędziem djvused - "
+                             f"pliki jednostronicowe z jego katalogu zostaną skonwertowane osobno")
 
     def toggle_output_directory(self):
         """
@@ -282,10 +494,11 @@ class DjVuToPDFGUI:
             filetypes=[("Pliki DjVu", "*.djvu *.djv *.DJVU *.DJV"), ("Wszystkie pliki", "*.*")]
         )
 
-        for file in files:
-            if file not in self.selected_files:
-                self.selected_files.append(file)
-        self.update_files_list()
+        if files:
+            unread = []
+            files, skipped = djvu_core.podziel_pliki_djvu(list(files), self.ddjvu_path, unread)
+            self.log_skipped_components(skipped, unread)
+            self.job_queue.add(files)
 
     def select_directory(self):
         """
@@ -302,37 +515,127 @@ class DjVuToPDFGUI:
                                      f"Nie znaleziono plików DjVu w katalogu:\n{directory}")
                 return
 
-            for file in djvu_files:
-                if file not in self.selected_files:
-                    self.selected_files.append(file)
-
-            self.update_files_list()
+            self.job_queue.add(djvu_files)
 
     def clear_files(self):
-        """Czyści listę wybranych plików."""
-        self.selected_files.clear()
-        self.update_files_list()
+        """Usuwa z kolejki wszystkie oczekujące pliki."""
+        self.job_queue.clear()
+
+    def get_selected_pending(self):
+        """
+        Zwraca zaznaczone na liście pliki, które czekają w kolejce.
+
+        Zwraca:
+            list[str]: Ścieżki zaznaczonych plików oczekujących (bez konwertowanych).
+        """
+        pending = set(self.job_queue.pending()) | set(self.job_queue.deferred())
+        return [self.listed_files[i] for i in self.files_listbox.curselection()
+                if i < len(self.listed_files) and self.listed_files[i] in pending]
+
+    def bump_selected(self):
+        """Przenosi zaznaczone pliki na początek kolejki."""
+        self.job_queue.bump(self.get_selected_pending())
+
+    def move_selected(self, delta):
+        """
+        Przesuwa zaznaczone pliki w kolejce.
+
+        Args:
+            delta (int): -1, aby przesunąć w górę, lub 1, aby przesunąć w dół.
+        """
+        self.job_queue.move(self.get_selected_pending(), delta)
+
+    def remove_selected(self):
+        """Usuwa zaznaczone pliki z kolejki."""
+        self.job_queue.remove(self.get_selected_pending())
+
+    def toggle_pause(self):
+        """Wstrzymuje lub wznawia wydawanie plików z kolejki do konwersji."""
+        if self.job_queue.paused:
+            self.job_queue.resume()
+        else:
+            self.job_queue.pause()
+
+    def queue_changed(self):
+        """
+        Zleca odświeżenie listy po zmianie kolejki (wywoływana także z wątków konwertujących).
+
+        Kolejne zmiany przed odświeżeniem są łączone w jedno odświeżenie.
+        Kolejka wywołuje tę metodę po zwolnieniu swojej blokady, więc
+        oczekiwanie na wątek Tk nie może się zakleszczyć.
+        """
+        if self.list_refresh_pending:
+            return
+        self.list_refresh_pending = True
+        self.root.after(0, self.update_files_list)
 
     def update_files_list(self):
         """
         Aktualizuje listę plików w listboxie oraz etykietę informacyjną
-        z bieżącą listą wybranych plików i ich łącznym rozmiarem.
+        z bieżącym stanem kolejki i łącznym rozmiarem oczekujących plików.
+
+        Konwertowane pliki są wyświetlane na górze listy, a odłożone konwersje
+        w pełnej jakości (tryb dwuprzebiegowy) na dole. Zaznaczenie jest
+        zachowywane po zmianie kolejności.
         """
+        self.list_refresh_pending = False
+        running = self.job_queue.running()
+        pending = self.job_queue.pending()
+        deferred = self.job_queue.deferred()
+        selected = {self.listed_files[i] for i in self.files_listbox.curselection()
+                    if i < len(self.listed_files)}
+        self.listed_files = running + pending + deferred
+
         self.files_listbox.delete(0, END)
-        if self.selected_files:
+        for file in running:
+            self.files_listbox.insert(END, f"⏳ {os.path.basename(file)}")
+        damaged = 0
+        for file in pending:
+            # Metadane z nagłówków pliku (zapamiętywane, więc odświeżanie listy jest tanie)
+            info = sonduj(file)
+            if info.poprawny:
+                self.files_listbox.insert(END, f"{os.path.basename(file)} ({info.opis()})")
+            else:
+                damaged += 1
+                self.files_listbox.insert(END, f"⚠️ {os.path.basename(file)} ({info.opis()})")
+                self.files_listbox.itemconfig(END, foreground='red')
+        for file in deferred:
+            self.files_listbox.insert(END, f"📝 {os.path.basename(file)} (szkic gotowy, czeka na pełną jakość)")
+            self.files_listbox.itemconfig(END, foreground='gray')
+        for index, file in enumerate(self.listed_files):
+            if file in selected:
+                self.files_listbox.selection_set(index)
+
+        self.pause_button.config(text="Wznów kolejkę" if self.job_queue.paused else "Wstrzymaj kolejkę")
+        if self.listed_files:
             total_size = 0
-            for file in self.selected_files:
-                filename = os.path.basename(file)
-                self.files_listbox.insert(END, filename)
+            for file in pending:
                 try:
                     total_size += os.path.getsize(file)
                 except:
                     pass
             size_mb = total_size / (1024 * 1024)
-            self.files_info_label.config(text=f"Wybrano {len(self.selected_files)} plików ({size_mb:.1f} MB)")
+            paused = " - wstrzymana" if self.job_queue.paused else ""
+            damaged_info = f", uszkodzone: {damaged}" if damaged else ""
+            estimate = ""
+            if self.history and pending and not self.is_converting:
+                plan = historia.zaplanuj(pending, self.quality.get(), self.get_workers(), self.history)
+                estimate = f", {plan.strony} stron, szacunek: {plan.opis()}"
+            deferred_info = f", odłożone do pełnej jakości: {len(deferred)}" if deferred else ""
+            self.files_info_label.config(text=f"W kolejce {len(pending)} plików ({size_mb:.1f} MB), "
+                                              f"w trakcie {len(running)}{deferred_info}{paused}{damaged_info}{estimate}")
         else:
             self.files_info_label.config(text="Nie wybrano plików")
 
+        # Wstępnie wyrenderuj pierwsze strony, aby przeglądanie listy było natychmiastowe
+        if self.thumbnail_worker:
+            self.thumbnail_worker.prefetch(pending)
+        if self.preview_file not in self.listed_files:
+            self.preview_file = None
+            self.preview_image = None
+            self.preview_label.config(image='', text="Wybierz plik z listy")
+            self.preview_page_label.config(text="")
+
     def select_output_directory(self):
         """Otwiera okno dialogowe wyboru katalogu wyjściowego."""
         directory = filedialog.askdirectory(title="Wybierz katalog wyjściowy")
@@ -343,18 +646,25 @@ class DjVuToPDFGUI:
         """
         Dołącza wiadomość do widżetu logu konwersji.
 
+        Można ją wywoływać z dowolnego wątku - wywołania z wątków roboczych są
+        przekazywane do wątku Tk przez `root.after`.
+
         Args:
             message (str): Wiadomość do zalogowania.
         """
+        if threading.current_thread() is not threading.main_thread():
+            self.root.after(0, self.log_message, message)
+            return
         self.log_text.insert(END, f"{message}\n")
         self.log_text.see(END)
         self.root.update_idletasks()
 
-    def convert_file(self, djvu_file, output_dir, quality='normal', timeout_s=300):
+    def convert_file(self, djvu_file, output_dir, quality='normal', timeout_s=300, policy=None, draft=False):
         """
         Konwertuje pojedynczy plik DjVu na PDF.
 
-        Ta metoda uruchamia polecenie `ddjvu` i loguje jego wynik.
+        Ta metoda zleca konwersję silnikowi z `djvu_core` (z ponawianiem
+        nieudanych prób zgodnie z `policy`) i loguje jej wynik.
 
         Args:
             djvu_file (str): Ścieżka do źródłowego pliku DjVu.
@@ -363,48 +673,86 @@ class DjVuToPDFGUI:
                 lub 'high'). Domyślnie 'normal'.
             timeout_s (int, optional): Timeout konwersji w sekundach.
                 Domyślnie 300.
+            policy (djvu_core.PolitykaPonowien, optional): Polityka ponowień.
+                Domyślnie 3 próby z kwarantanną.
+            draft (bool, optional): Czy wynik jest szkicem, który zostanie później
+                zastąpiony wersją w pełnej jakości. Domyślnie False.
 
         Zwraca:
             bool: True, jeśli konwersja się powiodła, w przeciwnym razie False.
         """
         filename = os.path.basename(djvu_file)
-        name_without_ext = os.path.splitext(filename)[0]
-        pdf_file = os.path.join(output_dir, f"{name_without_ext}.pdf")
-
-        quality_params = {
-            'low': ['-quality=25', '-smooth'],
-            'normal': ['-quality=75'],
-            'high': ['-quality=100', '-smooth']
-        }
-
-        params = quality_params.get(quality, ['-quality=75'])
-        cmd = [self.ddjvu_path, '-format=pdf'] + params + [djvu_file, pdf_file]
+        pdf_file = djvu_core.sciezka_pdf(djvu_file, output_dir)
+
+        self.log_message(f"{'📝 Szkic' if draft else '🔄 Konwertowanie'}: {filename}")
+
+        result = djvu_core.konwertuj_z_ponowieniami(self.backend, djvu_file, pdf_file, quality, timeout_s,
+                                                    policy, komunikat=self.log_message, szkic=draft)
+        if self.history:
+            self.history.zapisz(djvu_file, result)
+        if result.ok:
+            try:
+                size_mb = os.path.getsize(pdf_file) / (1024 * 1024)
+                self.log_message(f"✅ Utworzono: {os.path.basename(pdf_file)} ({size_mb:.1f} MB)")
+            except:
+                self.log_message(f"✅ Utworzono: {os.path.basename(pdf_file)}")
+            if result.jakosc != quality:
+                self.log_message(f"⚠️ {filename} zapisano w obniżonej jakości ({result.jakosc})")
+            elif draft:
+                self.log_message(f"📝 {os.path.basename(pdf_file)} to szkic - pełna jakość zostanie dodana później")
+            return True
+
+        if result.blad == 'kod':
+            self.log_message(f"❌ Błąd konwersji {filename} (kod {result.kod})")
+            if result.stdout:
+                self.log_message(f"STDOUT: {result.stdout.strip()}")
+            if result.stderr:
+                self.log_message(f"STDERR: {result.stderr.strip()}")
+        elif result.blad == 'timeout':
+            self.log_message(f"❌ Przekroczono limit czasu ({timeout_s}s) dla: {filename}")
+        elif result.blad == 'brak_programu':
+            self.log_message(f"❌ Błąd: {filename} - nie znaleziono ddjvu")
+        elif result.blad == 'uszkodzony':
+            self.log_message(f"❌ Pominięto uszkodzony plik {filename}: {result.opis}")
+        else:
+            self.log_message(f"❌ Błąd: {filename} - {result.opis}")
+        if result.raport:
+            self.log_message(f"🚫 Kwarantanna po {result.proby} próbach, raport: {result.raport}")
+        return False
 
-        self.log_message(f"🔄 Konwertowanie: {filename}")
+    def get_workers(self):
+        """
+        Zwraca liczbę równoległych konwersji z ustawień.
 
+        Zwraca:
+            int: Liczba wątków konwertujących (co najmniej 1).
+        """
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
-            if result.returncode == 0:
-                try:
-                    size_mb = os.path.getsize(pdf_file) / (1024 * 1024)
-                    self.log_message(f"✅ Utworzono: {name_without_ext}.pdf ({size_mb:.1f} MB)")
-                except:
-                    self.log_message(f"✅ Utworzono: {name_without_ext}.pdf")
-                return True
-            else:
-                self.log_message(f"❌ Błąd konwersji {filename} (kod {result.returncode})")
-                if result.stdout:
-                    self.log_message(f"STDOUT: {result.stdout.strip()}")
-                if result.stderr:
-                    self.log_message(f"STDERR: {result.stderr.strip()}")
-                return False
-
-        except subprocess.TimeoutExpired:
-            self.log_message(f"❌ Przekroczono limit czasu ({timeout_s}s) dla: {filename}")
-            return False
-        except Exception as e:
-            self.log_message(f"❌ Błąd: {filename} - {e}")
-            return False
+            return max(1, self.workers.get())
+        except TclError:
+            return 1
+
+    def show_plan(self):
+        """
+        Pokazuje plan konwersji kolejki (szacowany czas i rozmiar wyników)
+        bez uruchamiania konwersji.
+        """
+        pending = self.job_queue.pending()
+        if not pending:
+            messagebox.showwarning("Ostrzeżenie", "Nie wybrano żadnych plików do konwersji!")
+            return
+        plan = historia.zaplanuj(pending, self.quality.get(), self.get_workers(), self.history)
+        longest = sorted(plan.pliki, key=lambda item: item[2], reverse=True)[:5]
+        lines = [f"Plików: {len(plan.pliki)} ({historia.formatuj_rozmiar(plan.bajty_wejscia)})",
+                 f"Równoległe konwersje: {plan.liczba_watkow}",
+                 f"Szacowany czas: {historia.formatuj_czas(plan.czas_s)}",
+                 f"Szacowany rozmiar wyników: {historia.formatuj_rozmiar(plan.bajty_wyjscia)}",
+                 "",
+                 "Najdłuższe pliki:"]
+        lines += [f"  {os.path.basename(file)} ~ {historia.formatuj_czas(seconds)}" for file, _, seconds in longest]
+        if not plan.szacunek.liczba_probek:
+            lines += ["", "Brak historii konwersji - szacunek orientacyjny."]
+        messagebox.showinfo("Plan konwersji", "\n".join(lines))
 
     def start_conversion(self):
         """
@@ -413,11 +761,15 @@ class DjVuToPDFGUI:
         Przeprowadza wstępne sprawdzenia, aby upewnić się, że `ddjvu` jest dostępne,
         pliki są wybrane, a katalog wyjściowy jest określony, jeśli jest to wymagane.
         """
+        if not self.ddjvu_checked:
+            messagebox.showinfo("Informacja", "Trwa sprawdzanie ddjvu - spróbuj ponownie za chwilę.")
+            return
+
         if not self.ddjvu_path:
             messagebox.showerror("Błąd", "Brak dostępu do ddjvu!\n\nDodaj ddjvu.exe do PATH lub ustaw zmienną środowiskową DJVU_PATH.")
             return
 
-        if not self.selected_files:
+        if not self.job_queue.pending():
             messagebox.showwarning("Ostrzeżenie", "Nie wybrano żadnych plików do konwersji!")
             return
 
@@ -435,55 +787,127 @@ class DjVuToPDFGUI:
 
     def convert_files(self):
         """
-        Główna pętla konwersji, która przetwarza wszystkie wybrane pliki.
+        Główna pętla konwersji, która przetwarza pliki z kolejki.
+
+        Uruchamia tyle wątków konwertujących, ile wskazuje ustawienie
+        `workers`. Każdy z nich pobiera kolejne pliki z `job_queue`, więc pliki
+        dodane lub przesunięte w trakcie konwersji są od razu uwzględniane.
+        Konwersja kończy się, gdy kolejka jest pusta i żaden plik nie jest
+        konwertowany.
+
+        W trybie dwuprzebiegowym każdy plik jest najpierw szybko konwertowany
+        do szkicu PDF, a konwersja w pełnej jakości trafia na koniec kolejki
+        jako zadanie odłożone i po zakończeniu atomowo zastępuje szkic.
 
         Ta metoda jest zaprojektowana do uruchamiania w osobnym wątku, aby uniknąć
         zamrażania GUI. Okresowo aktualizuje interfejs użytkownika za pomocą `root.after`.
         """
         self.is_converting = True
-        total_files = len(self.selected_files)
-        successful = 0
+        self.processed = 0
+        self.successful = 0
+        self.drafts = 0
+        jobs_done = 0
+        output_dirs = set()
+        counter_lock = threading.Lock()
+
+        # Ustawienia są odczytywane raz, na początku konwersji
+        quality = self.quality.get()
+        timeout_s = self.timeout.get()
+        same_directory = self.same_directory.get()
+        output_directory = self.output_directory.get()
+        workers = self.get_workers()
+        try:
+            policy = djvu_core.PolitykaPonowien(self.retries.get())
+        except TclError:
+            policy = djvu_core.PolitykaPonowien()
+        two_pass = self.two_pass.get()
+        # Szkic ma być gotowy szybko - bez ponowień i kwarantanny (zrobi to przebieg końcowy)
+        draft_policy = djvu_core.PolitykaPonowien(1, kwarantanna=False)
 
         # Przygotuj katalog wyjściowy, jeśli wybrano niestandardowy
-        if not self.same_directory.get():
-            output_dir = Path(self.output_directory.get())
-            output_dir.mkdir(parents=True, exist_ok=True)
+        if not same_directory:
+            Path(output_directory).mkdir(parents=True, exist_ok=True)
 
         # Zaktualizuj interfejs użytkownika
         self.root.after(0, lambda: self.convert_button.config(state=DISABLED, text="Konwertowanie..."))
-        self.root.after(0, lambda: self.progress.config(maximum=total_files, value=0))
+        self.root.after(0, lambda: self.progress.config(maximum=len(self.job_queue.pending()), value=0))
         self.root.after(0, lambda: self.log_text.delete(1.0, END))
 
-        self.root.after(0, lambda: self.log_message(f"📋 Rozpoczynam konwersję {total_files} plików"))
-        self.root.after(0, lambda: self.log_message(f"📁 Wyjście: {'Ten sam co źródłowy' if self.same_directory.get() else self.output_directory.get()}"))
-        self.root.after(0, lambda: self.log_message(f"🎨 Jakość: {self.quality.get()}"))
-        self.root.after(0, lambda: self.log_message(f"⏱️ Timeout: {self.timeout.get()}s"))
+        self.root.after(0, lambda: self.log_message(f"📋 Rozpoczynam konwersję kolejki ({len(self.job_queue.pending())} plików)"))
+        self.root.after(0, lambda: self.log_message(f"📁 Wyjście: {'Ten sam co źródłowy' if same_directory else output_directory}"))
+        self.root.after(0, lambda: self.log_message(f"🎨 Jakość: {quality}"))
+        self.root.after(0, lambda: self.log_message(f"⏱️ Timeout: {timeout_s}s"))
+        self.root.after(0, lambda: self.log_message(f"🧵 Równoległe konwersje: {workers}"))
+        self.root.after(0, lambda: self.log_message(f"🔁 Próby na plik: {policy.max_prob}"))
+        if two_pass:
+            self.root.after(0, lambda: self.log_message("📝 Tryb dwuprzebiegowy: najpierw szkice, potem pełna jakość"))
+        if self.history:
+            plan = historia.zaplanuj(self.job_queue.pending(), quality, workers, self.history)
+            self.eta = historia.ETA(plan.szacunek, workers, self.job_queue.pending())
+            self.root.after(0, lambda: self.log_message(f"🗓️ Szacunek: {plan.opis()}"))
         self.root.after(0, lambda: self.log_message("=" * 50))
 
-        for i, file_path in enumerate(self.selected_files):
-            if not self.is_converting:  # Sprawdź, czy konwersja została anulowana
-                break
-
-            filename = os.path.basename(file_path)
-            self.root.after(0, lambda f=filename: self.status_label.config(text=f"Konwertowanie: {f}"))
+        def worker():
+            nonlocal jobs_done
+            while self.is_converting:
+                job = self.job_queue.get()
+                if job is None:
+                    break
+                file_path, final_pass = job
+                draft = two_pass and not final_pass
 
-            # Określ katalog wyjściowy dla bieżącego pliku
-            if self.same_directory.get():
-                output_dir = os.path.dirname(file_path)
-            else:
-                output_dir = self.output_directory.get()
+                filename = os.path.basename(file_path)
+                self.root.after(0, lambda f=filename: self.status_label.config(text=f"Konwertowanie: {f}"))
 
-            # Konwertuj plik
-            if self.convert_file(file_path, output_dir, self.quality.get(), self.timeout.get()):
-                successful += 1
+                # Określ katalog wyjściowy dla bieżącego pliku
+                output_dir = os.path.dirname(file_path) if same_directory else output_directory
 
-            # Zaktualizuj pasek postępu
-            self.root.after(0, lambda v=i+1: self.progress.config(value=v))
+                # Konwertuj plik
+                try:
+                    if draft:
+                        ok = self.convert_file(file_path, output_dir, 'draft', timeout_s, draft_policy, draft=True)
+                    else:
+                        ok = self.convert_file(file_path, output_dir, quality, timeout_s, policy)
+                finally:
+                    # Konwersja w pełnej jakości czeka, aż wszystkie pliki będą miały szkice
+                    if draft:
+                        self.job_queue.add([file_path], deferred=True)
+                    self.job_queue.done(file_path, final_pass)
+
+                with counter_lock:
+                    output_dirs.add(output_dir)
+                    jobs_done += 1
+                    if draft:
+                        self.drafts += ok
+                    else:
+                        self.processed += 1
+                        self.successful += ok
+                    done = jobs_done
+
+                # Zaktualizuj pasek postępu (kolejka może rosnąć w trakcie konwersji)
+                remaining_files = self.job_queue.running() + self.job_queue.pending() + self.job_queue.deferred()
+                remaining = len(remaining_files)
+                self.root.after(0, lambda v=done, m=done + remaining: self.progress.config(maximum=m, value=v))
+
+                # Zaktualizuj ETA na podstawie bieżącej zawartości kolejki
+                if self.eta and remaining:
+                    self.eta.zakonczono(file_path)
+                    self.eta.ustaw_pozostale(remaining_files)
+                    self.root.after(0, lambda v=done, t=self.eta.opis():
+                                    self.status_label.config(text=f"Przetworzono {v} zadań, {t}"))
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
 
         # Zakończ konwersję
-        self.root.after(0, self.conversion_finished, successful, total_files)
+        drafts_left = [pdf for directory in sorted(output_dirs) for pdf in djvu_core.lista_szkicow(directory)]
+        self.root.after(0, self.conversion_finished, self.successful, self.processed, drafts_left)
 
-    def conversion_finished(self, successful, total):
+    def conversion_finished(self, successful, total, drafts_left=()):
         """
         Finalizuje proces konwersji i aktualizuje interfejs użytkownika.
 
@@ -492,15 +916,24 @@ class DjVuToPDFGUI:
 
         Args:
             successful (int): Liczba pomyślnie przekonwertowanych plików.
-            total (int): Całkowita liczba próbowanych plików.
+            total (int): Całkowita liczba próbowanych plików (bez szkiców).
+            drafts_left (list[str], optional): Pliki PDF, które wciąż są szkicami.
         """
         self.is_converting = False
+        self.eta = None
         self.convert_button.config(state=NORMAL, text="Rozpocznij konwersję")
+        self.update_files_list()
 
         self.log_message("=" * 50)
         self.log_message(f"📊 PODSUMOWANIE")
         self.log_message(f"✅ Pomyślnie skonwertowano: {successful}")
         self.log_message(f"❌ Błędy: {total - successful}")
+        if self.drafts:
+            self.log_message(f"📝 Utworzono szkiców: {self.drafts}")
+        if drafts_left:
+            self.log_message(f"📝 Wciąż szkice ({len(drafts_left)}):")
+            for pdf in drafts_left:
+                self.log_message(f"   {pdf}")
 
         self.status_label.config(text=f"Zakończono: {successful}/{total} plików skonwertowanych")
 
@@ -526,6 +959,16 @@ def main():
 
     app = DjVuToPDFGUI(root)
 
+    # Pomiar czasu do pokazania okna (patrz pomiar_startu.py)
+    startup_file = os.environ.get('DJVU_POMIAR_STARTU')
+    if startup_file:
+        def window_shown(event):
+            if event.widget is root:
+                with open(startup_file, 'w', encoding='utf-8') as f:
+                    f.write(repr(time.time()))
+                root.after(100, root.destroy)
+        root.bind('<Map>', window_shown)
+
     try:
         root.mainloop()
     except KeyboardInterrupt:
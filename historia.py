@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Historia konwersji i planowanie czasu trwania partii plików.
+
+Każda zakończona konwersja jest zapisywana w lokalnej bazie SQLite w katalogu
+pamięci podręcznej (rozmiar wejścia i wyjścia, liczba stron, jakość, silnik,
+czas trwania, nazwa komputera). Liczba stron jest odczytywana z nagłówków
+pliku (`sonda_djvu`), więc jest dostępna także przed konwersją. Na tej podstawie `zaplanuj` szacuje łączny
+czas i rozmiar wyników dla wybranej partii i liczby wątków, a `ETA`
+aktualizuje szacunek w trakcie konwersji, korygując go o rzeczywiste tempo.
+
+Plan bez konwersji (dry run):
+    python historia.py KATALOG [--jakosc normal] [--watki 1]
+"""
+
+import os
+import sys
+import time
+import heapq
+import sqlite3
+import argparse
+import platform
+import threading
+
+import djvu_core
+from sonda_djvu import sonduj
+
+# Nazwa pliku bazy historii w katalogu pamięci podręcznej
+NAZWA_BAZY = 'historia.sqlite'
+
+# Liczba ostatnich konwersji branych pod uwagę przy szacowaniu
+LICZBA_PROBEK = 200
+
+# Szacunek bez historii: sekundy na MB wejścia, narzut na plik, stosunek rozmiaru PDF do DjVu
+DOMYSLNY_SZACUNEK = {
+    'draft': (0.5, 0.5, 0.5),
+    'low': (1.0, 0.5, 1.5),
+    'normal': (2.0, 0.5, 3.0),
+    'high': (4.0, 0.5, 6.0)
+}
+
+
+def formatuj_czas(sekundy):
+    """Formatuje czas w sekundach jako np. '45 s', '12 min' lub '3 h 05 min'."""
+    sekundy = int(round(sekundy))
+    if sekundy < 60:
+        return f"{sekundy} s"
+    minuty = (sekundy + 30) // 60
+    if minuty < 60:
+        return f"{minuty} min"
+    return f"{minuty // 60} h {minuty % 60:02d} min"
+
+
+def formatuj_rozmiar(bajty):
+    """Formatuje rozmiar w bajtach jako MB lub GB."""
+    if bajty >= 1024 ** 3:
+        return f"{bajty / 1024 ** 3:.1f} GB"
+    return f"{bajty / 1024 ** 2:.1f} MB"
+
+
+def dopasuj_prosta(x, y):
+    """Dopasowuje y = narzut + nachylenie * x metodą najmniejszych kwadratów.
+
+    Przy zbyt małej liczbie lub zróżnicowaniu próbek (albo ujemnym wyniku)
+    zwraca model proporcjonalny bez narzutu.
+
+    Zwraca:
+        tuple[float, float]: Nachylenie i narzut.
+    """
+    n = len(x)
+    srednia_x = sum(x) / n
+    srednia_y = sum(y) / n
+    wariancja = sum((xi - srednia_x) ** 2 for xi in x)
+    if n >= 3 and wariancja > 0:
+        nachylenie = sum((xi - srednia_x) * (yi - srednia_y) for xi, yi in zip(x, y)) / wariancja
+        narzut = srednia_y - nachylenie * srednia_x
+        if nachylenie >= 0 and narzut >= 0:
+            return nachylenie, narzut
+    return sum(y) / max(sum(x), 1e-6), 0.0
+
+
+class Szacunek:
+    """Model czasu konwersji pliku: narzut + sekundy na stronę lub na MB wejścia.
+
+    Model stron jest używany, gdy historia zawiera liczby stron, a liczba stron
+    pliku jest znana; w przeciwnym razie czas jest liczony z rozmiaru pliku.
+
+    Atrybuty:
+        s_na_mb (float): Czas konwersji jednego MB pliku DjVu w sekundach.
+        narzut_s (float): Stały czas na plik (start procesu, otwarcie dokumentu).
+        wspolczynnik_wyjscia (float): Stosunek rozmiaru wyniku do rozmiaru wejścia.
+        liczba_probek (int): Liczba konwersji z historii, na których oparto model
+            (0 oznacza wartości domyślne).
+        s_na_strone (float | None): Czas konwersji jednej strony w sekundach.
+        narzut_strony_s (float): Stały czas na plik w modelu stron.
+    """
+    def __init__(self, s_na_mb, narzut_s, wspolczynnik_wyjscia, liczba_probek=0,
+                 s_na_strone=None, narzut_strony_s=0.0):
+        self.s_na_mb = s_na_mb
+        self.narzut_s = narzut_s
+        self.wspolczynnik_wyjscia = wspolczynnik_wyjscia
+        self.liczba_probek = liczba_probek
+        self.s_na_strone = s_na_strone
+        self.narzut_strony_s = narzut_strony_s
+
+    def czas_pliku(self, bajty, strony=None):
+        """Zwraca szacowany czas konwersji pliku o podanym rozmiarze i liczbie stron (w sekundach)."""
+        if self.s_na_strone is not None and strony:
+            return self.narzut_strony_s + self.s_na_strone * strony
+        return self.narzut_s + self.s_na_mb * bajty / (1024 * 1024)
+
+    def rozmiar_wyjscia(self, bajty):
+        """Zwraca szacowany rozmiar wyniku dla pliku o podanym rozmiarze."""
+        return int(bajty * self.wspolczynnik_wyjscia)
+
+
+class Historia:
+    """Trwała historia konwersji w bazie SQLite (bezpieczna wątkowo).
+
+    Atrybuty:
+        sciezka (str): Ścieżka do pliku bazy.
+        maszyna (str): Nazwa bieżącego komputera zapisywana z każdą konwersją.
+    """
+    def __init__(self, sciezka=None):
+        """Otwiera (i w razie potrzeby tworzy) bazę historii.
+
+        Args:
+            sciezka (str, optional): Plik bazy. Domyślnie `NAZWA_BAZY` w katalogu
+                pamięci podręcznej aplikacji.
+        """
+        self.sciezka = sciezka or os.path.join(djvu_core.katalog_pamieci_podrecznej(), NAZWA_BAZY)
+        self.maszyna = platform.node() or 'localhost'
+        os.makedirs(os.path.dirname(os.path.abspath(self.sciezka)), exist_ok=True)
+        self._blokada = threading.Lock()
+        self._polaczenie = sqlite3.connect(self.sciezka, check_same_thread=False)
+        self._polaczenie.execute(
+            "CREATE TABLE IF NOT EXISTS konwersje ("
+            "data REAL, maszyna TEXT, backend TEXT, jakosc TEXT, plik TEXT, "
+            "bajty INTEGER, strony INTEGER, bajty_wyjscia INTEGER, czas_s REAL, ok INTEGER)")
+        self._polaczenie.execute(
+            "CREATE INDEX IF NOT EXISTS konwersje_maszyna ON konwersje (maszyna, jakosc, data)")
+        self._szacunki = {}
+
+    def zapisz(self, plik_djvu, wynik, strony=None):
+        """Zapisuje wynik konwersji pliku.
+
+        Args:
+            plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+            wynik (djvu_core.WynikKonwersji): Wynik konwersji.
+            strony (int, optional): Liczba stron dokumentu. Domyślnie odczytywana
+                z nagłówków pliku.
+        """
+        if strony is None:
+            strony = sonduj(plik_djvu).strony
+        try:
+            bajty = os.path.getsize(plik_djvu)
+            bajty_wyjscia = os.path.getsize(wynik.plik_wyjsciowy) if wynik.ok else 0
+        except OSError:
+            return
+        with self._blokada, self._polaczenie:
+            self._polaczenie.execute(
+                "INSERT INTO konwersje VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), self.maszyna, wynik.backend, wynik.jakosc, os.path.abspath(plik_djvu),
+                 bajty, strony, bajty_wyjscia, wynik.czas_s, int(bool(wynik.ok))))
+            self._szacunki.clear()
+
+    def szacunek(self, jakosc='normal'):
+        """Zwraca model czasu konwersji dla jakości na podstawie historii.
+
+        Używa ostatnich udanych konwersji na bieżącym komputerze, a jeśli ich
+        brak - na dowolnym komputerze. Czas jest dopasowywany metodą
+        najmniejszych kwadratów jako narzut + sekundy na MB.
+
+        Args:
+            jakosc (str, optional): Profil jakości. Domyślnie 'normal'.
+
+        Zwraca:
+            Szacunek: Model czasu i rozmiaru wyniku.
+        """
+        with self._blokada:
+            if jakosc in self._szacunki:
+                return self._szacunki[jakosc]
+            probki = []
+            for warunek, parametry in (("maszyna = ? AND jakosc = ?", (self.maszyna, jakosc)),
+                                       ("jakosc = ?", (jakosc,))):
+                probki = self._polaczenie.execute(
+                    f"SELECT bajty, bajty_wyjscia, czas_s, strony FROM konwersje WHERE ok = 1 AND {warunek} "
+                    "ORDER BY data DESC LIMIT ?", parametry + (LICZBA_PROBEK,)).fetchall()
+                if probki:
+                    break
+            szacunek = self._dopasuj(probki, jakosc)
+            self._szacunki[jakosc] = szacunek
+            return szacunek
+
+    @staticmethod
+    def _dopasuj(probki, jakosc):
+        s_na_mb, narzut_s, wspolczynnik = DOMYSLNY_SZACUNEK.get(jakosc, DOMYSLNY_SZACUNEK['normal'])
+        if not probki:
+            return Szacunek(s_na_mb, narzut_s, wspolczynnik)
+        s_na_mb, narzut_s = dopasuj_prosta([bajty / (1024 * 1024) for bajty, _, _, _ in probki],
+                                           [czas_s for _, _, czas_s, _ in probki])
+        ze_stronami = [(strony, czas_s) for _, _, czas_s, strony in probki if strony]
+        s_na_strone, narzut_strony_s = None, 0.0
+        if len(ze_stronami) >= 3:
+            s_na_strone, narzut_strony_s = dopasuj_prosta(*zip(*ze_stronami))
+        bajty_wejscia = sum(bajty for bajty, _, _, _ in probki)
+        if bajty_wejscia:
+            wspolczynnik = sum(wyjscie for _, wyjscie, _, _ in probki) / bajty_wejscia
+        return Szacunek(s_na_mb, narzut_s, wspolczynnik, len(probki), s_na_strone, narzut_strony_s)
+
+    def zamknij(self):
+        """Zamyka połączenie z bazą."""
+        with self._blokada:
+            self._polaczenie.close()
+
+
+def otworz_historie(sciezka=None):
+    """Otwiera historię konwersji lub zwraca None, gdy jej baza jest niedostępna.
+
+    Niedostępna historia (np. katalog bez prawa zapisu, zablokowana lub
+    uszkodzona baza) nie blokuje konwersji - odbywa się ona wtedy bez planu
+    i szacowania czasu.
+
+    Args:
+        sciezka (str, optional): Plik bazy (patrz `Historia`).
+
+    Zwraca:
+        Historia | None: Otwarta historia lub None.
+    """
+    try:
+        return Historia(sciezka)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Historia konwersji niedostępna ({e}) - konwersja bez szacowania czasu.")
+        return None
+
+
+class Plan:
+    """Szacunek czasu i rozmiaru wyników partii plików.
+
+    Atrybuty:
+        pliki (list[tuple[str, int, float]]): Trójki (plik, bajty, szacowany czas w s).
+        strony (int): Łączna liczba stron (bez dokumentów wieloplikowych).
+        liczba_watkow (int): Liczba równoległych konwersji.
+        bajty_wejscia (int): Łączny rozmiar plików DjVu.
+        bajty_wyjscia (int): Szacowany łączny rozmiar wyników.
+        czas_s (float): Szacowany czas trwania całej partii.
+        szacunek (Szacunek): Model użyty do szacowania.
+    """
+    def __init__(self, pliki, liczba_watkow, bajty_wyjscia, czas_s, szacunek, strony=0):
+        self.pliki = pliki
+        self.liczba_watkow = liczba_watkow
+        self.bajty_wejscia = sum(bajty for _, bajty, _ in pliki)
+        self.strony = strony
+        self.bajty_wyjscia = bajty_wyjscia
+        self.czas_s = czas_s
+        self.szacunek = szacunek
+
+    def opis(self):
+        """Zwraca jednowierszowy opis planu do wyświetlenia użytkownikowi."""
+        zrodlo = (f"na podstawie {self.szacunek.liczba_probek} konwersji" if self.szacunek.liczba_probek
+                  else "brak historii - szacunek orientacyjny")
+        return (f"ok. {formatuj_czas(self.czas_s)}, wyniki ok. {formatuj_rozmiar(self.bajty_wyjscia)} "
+                f"({zrodlo})")
+
+
+def czas_partii(czasy, liczba_watkow):
+    """Szacuje czas przetworzenia zadań przez kilka wątków.
+
+    Zadania są przydzielane kolejno pierwszemu wolnemu wątkowi, tak jak robi to
+    kolejka konwersji, więc jeden duży plik na końcu partii wydłuża cały przebieg.
+
+    Args:
+        czasy (list[float]): Czasy kolejnych zadań.
+        liczba_watkow (int): Liczba wątków.
+
+    Zwraca:
+        float: Czas do zakończenia ostatniego zadania.
+    """
+    watki = [0.0] * max(1, min(liczba_watkow, len(czasy)))
+    for czas in czasy:
+        heapq.heapreplace(watki, watki[0] + czas)
+    return max(watki)
+
+
+def zaplanuj(pliki, jakosc='normal', liczba_watkow=1, historia=None):
+    """Szacuje czas konwersji i rozmiar wyników partii plików.
+
+    Args:
+        pliki (list[str]): Ścieżki plików DjVu w kolejności konwersji.
+        jakosc (str, optional): Profil jakości. Domyślnie 'normal'.
+        liczba_watkow (int, optional): Liczba równoległych konwersji. Domyślnie 1.
+        historia (Historia, optional): Historia konwersji. Bez niej używane są
+            wartości domyślne.
+
+    Zwraca:
+        Plan: Plan partii.
+    """
+    if historia:
+        szacunek = historia.szacunek(jakosc)
+    else:
+        szacunek = Szacunek(*DOMYSLNY_SZACUNEK.get(jakosc, DOMYSLNY_SZACUNEK['normal']))
+    pozycje = []
+    strony_razem = 0
+    for plik in pliki:
+        try:
+            bajty = os.path.getsize(plik)
+        except OSError:
+            bajty = 0
+        strony = sonduj(plik).strony
+        strony_razem += strony or 0
+        pozycje.append((plik, bajty, szacunek.czas_pliku(bajty, strony)))
+    bajty_wyjscia = sum(szacunek.rozmiar_wyjscia(bajty) for _, bajty, _ in pozycje)
+    czas_s = czas_partii([czas for _, _, czas in pozycje], liczba_watkow)
+    return Plan(pozycje, liczba_watkow, bajty_wyjscia, czas_s, szacunek, strony_razem)
+
+
+class ETA:
+    """Szacowanie pozostałego czasu w trakcie konwersji.
+
+    Pozostała praca jest liczona z modelu `Szacunek`, a następnie korygowana
+    o stosunek rzeczywistego czasu do szacowanego dla już zakończonych plików,
+    więc szacunek poprawia się z każdym plikiem. Pliki można dopisywać w
+    trakcie konwersji (np. z kolejki GUI).
+    """
+    def __init__(self, szacunek, liczba_watkow=1, pliki=()):
+        """Inicjalizuje ETA i rozpoczyna pomiar czasu.
+
+        Args:
+            szacunek (Szacunek): Model czasu konwersji.
+            liczba_watkow (int, optional): Liczba równoległych konwersji. Domyślnie 1.
+            pliki (iterable[str], optional): Pliki zaplanowane na starcie.
+        """
+        self.szacunek = szacunek
+        self.liczba_watkow = max(1, liczba_watkow)
+        self._blokada = threading.Lock()
+        self._pozostalo_s = 0.0
+        self._wykonano_s = 0.0
+        self._start = time.monotonic()
+        for plik in pliki:
+            self.dodaj(plik)
+
+    def _czas(self, plik, bajty=None):
+        if bajty is not None:
+            return self.szacunek.czas_pliku(bajty)
+        try:
+            return self.szacunek.czas_pliku(os.path.getsize(plik), sonduj(plik).strony)
+        except OSError:
+            return self.szacunek.narzut_s
+
+    def dodaj(self, plik, bajty=None):
+        """Dopisuje plik do pozostałej pracy.
+
+        Rozmiar `bajty` podaje się dla plików, których jeszcze nie ma na dysku
+        (np. członków archiwum); ten sam rozmiar trzeba podać w `zakonczono`.
+        """
+        with self._blokada:
+            self._pozostalo_s += self._czas(plik, bajty)
+
+    def ustaw_pozostale(self, pliki):
+        """Zastępuje pozostałą pracę podaną listą plików (np. bieżącą zawartością kolejki)."""
+        czas = sum(self._czas(plik) for plik in pliki)
+        with self._blokada:
+            self._pozostalo_s = czas
+
+    def zakonczono(self, plik, bajty=None):
+        """Oznacza plik jako przetworzony."""
+        with self._blokada:
+            czas = self._czas(plik, bajty)
+            self._pozostalo_s = max(0.0, self._pozostalo_s - czas)
+            self._wykonano_s += czas
+
+    def pozostalo_s(self):
+        """Zwraca szacowany pozostały czas w sekundach."""
+        with self._blokada:
+            korekta = 1.0
+            if self._wykonano_s > 0:
+                # Stosunek rzeczywistego czasu do szacowanego dla wykonanej już pracy
+                korekta = (time.monotonic() - self._start) * self.liczba_watkow / self._wykonano_s
+            return self._pozostalo_s * korekta / self.liczba_watkow
+
+    def opis(self):
+        """Zwraca tekst w rodzaju 'pozostało ok. 12 min'."""
+        return f"pozostało ok. {formatuj_czas(self.pozostalo_s())}"
+
+
+def wypisz_plan(plan):
+    """Wypisuje szczegółowy plan partii (tryb bez konwersji).
+
+    Args:
+        plan (Plan): Plan do wypisania.
+    """
+    print(f"\n🗓️  Plan konwersji ({len(plan.pliki)} plików, wątki: {plan.liczba_watkow}):")
+    print("-" * 60)
+    for i, (plik, bajty, czas_s) in enumerate(plan.pliki, 1):
+        print(f"{i:3d}. {os.path.basename(plik)} ({formatuj_rozmiar(bajty)}, {sonduj(plik).opis()}) "
+              f"~ {formatuj_czas(czas_s)}")
+    print("-" * 60)
+    print(f"   Wejście: {formatuj_rozmiar(plan.bajty_wejscia)}, {plan.strony} stron")
+    print(f"   Szacunek: {plan.opis()}")
+
+
+def main():
+    """Wypisuje plan konwersji plików DjVu z katalogu bez ich konwertowania."""
+    parser = argparse.ArgumentParser(description="Plan konwersji plików DjVu na podstawie historii (bez konwersji).")
+    parser.add_argument('katalog', help="katalog z plikami DjVu")
+    parser.add_argument('--jakosc', default='normal', choices=['low', 'normal', 'high'],
+                        help="jakość konwersji (domyślnie normal)")
+    parser.add_argument('--watki', type=int, default=1, help="liczba równoległych konwersji (domyślnie 1)")
+    argumenty = parser.parse_args()
+
+    if not os.path.isdir(argumenty.katalog):
+        print(f"❌ Podany katalog nie istnieje: {argumenty.katalog}")
+        sys.exit(1)
+
+    pliki = djvu_core.znajdz_pliki_djvu(argumenty.katalog)
+    if not pliki:
+        print("❌ Nie znaleziono plików DjVu w podanym katalogu.")
+        sys.exit(1)
+    historia = Historia()
+    try:
+        wypisz_plan(zaplanuj(pliki, argumenty.jakosc, argumenty.watki, historia))
+    finally:
+        historia.zamknij()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indeks pełnotekstowy warstwy tekstowej (OCR) plików DjVu.
+
+Tekst każdej strony jest wyodrębniany narzędziem `djvutxt` (z pakietu
+DjVuLibre, instalowanego razem z `ddjvu`) i zapisywany w bazie SQLite z
+indeksem FTS5. Ścieżki dokumentów i numery stron są w zwykłych tabelach
+z indeksami (`dokumenty`, `numery_stron`), a tabela FTS5 `tekst_stron`
+zawiera tylko tekst, z identyfikatorem wiersza równym identyfikatorowi
+strony - dzięki temu ponowne indeksowanie dokumentu usuwa jego strony
+przez indeks, bez przeglądania całej tabeli. Ekstrakcja może działać
+w tle, równolegle z konwersją do PDF.
+
+Wyszukiwanie z wiersza poleceń:
+    python indeks_tekstu.py "zapytanie" [--baza indeks_tekstu.sqlite] [--limit 20]
+"""
+
+import os
+import sys
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from djvu_core import znajdz_narzedzie
+
+# Domyślna nazwa pliku bazy indeksu
+NAZWA_BAZY = 'indeks_tekstu.sqlite'
+
+# Liczba dokumentów zapisywanych w jednej transakcji
+ROZMIAR_PARTII = 50
+
+
+def znajdz_djvutxt(sciezka_ddjvu=None):
+    """Znajduje ścieżkę do pliku wykonywalnego djvutxt.
+
+    Sprawdza najpierw katalog, w którym znajduje się ddjvu, a następnie PATH.
+
+    Args:
+        sciezka_ddjvu (str, optional): Ścieżka do ddjvu z tej samej instalacji.
+
+    Zwraca:
+        str: Pełna ścieżka do djvutxt lub None, jeśli nie znaleziono.
+    """
+    return znajdz_narzedzie('djvutxt', sciezka_ddjvu)
+
+
+def wyodrebnij_tekst(sciezka_djvutxt, plik_djvu, timeout_s=300):
+    """Wyodrębnia ukryty tekst z każdej strony pliku DjVu.
+
+    `djvutxt` oddziela kolejne strony znakiem nowej strony (form feed).
+
+    Args:
+        sciezka_djvutxt (str): Ścieżka do pliku wykonywalnego djvutxt.
+        plik_djvu (str): Ścieżka do pliku DjVu.
+        timeout_s (int, optional): Limit czasu w sekundach. Domyślnie 300.
+
+    Zwraca:
+        list[str]: Tekst kolejnych stron (pusty napis dla stron bez tekstu).
+
+    Wyjątki:
+        RuntimeError: Gdy djvutxt zakończy się błędem.
+        subprocess.TimeoutExpired: Gdy przekroczono limit czasu.
+    """
+    wynik = subprocess.run([sciezka_djvutxt, plik_djvu], capture_output=True, timeout=timeout_s)
+    if wynik.returncode != 0:
+        raise RuntimeError(wynik.stderr.decode('utf-8', 'replace').strip()
+                           or f"djvutxt zakończył się kodem {wynik.returncode}")
+    strony = wynik.stdout.decode('utf-8', 'replace').split('\f')
+    if strony and not strony[-1].strip():
+        strony.pop()
+    return [strona.strip() for strona in strony]
+
+
+def otworz_indeks(sciezka_bazy):
+    """Otwiera (i w razie potrzeby tworzy) bazę indeksu pełnotekstowego.
+
+    Args:
+        sciezka_bazy (str): Ścieżka do pliku bazy SQLite.
+
+    Zwraca:
+        sqlite3.Connection: Połączenie z bazą.
+    """
+    polaczenie = sqlite3.connect(sciezka_bazy)
+    with polaczenie:
+        polaczenie.execute("CREATE TABLE IF NOT EXISTS dokumenty (id INTEGER PRIMARY KEY, sciezka TEXT UNIQUE)")
+        polaczenie.execute("CREATE TABLE IF NOT EXISTS numery_stron ("
+                           "id INTEGER PRIMARY KEY, dokument INTEGER NOT NULL, strona INTEGER NOT NULL)")
+        polaczenie.execute("CREATE INDEX IF NOT EXISTS numery_stron_dokument ON numery_stron (dokument)")
+        polaczenie.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tekst_stron USING fts5("
+            "tekst, tokenize='unicode61 remove_diacritics 1')")
+    return polaczenie
+
+
+def _zapisz_dokument(polaczenie, dokument, strony):
+    """Zastępuje strony dokumentu w indeksie (wywoływana w transakcji).
+
+    Args:
+        polaczenie (sqlite3.Connection): Połączenie z bazą indeksu.
+        dokument (str): Ścieżka dokumentu.
+        strony (list[tuple[int, str]]): Pary (numer strony, tekst) stron z tekstem.
+    """
+    wiersz = polaczenie.execute("SELECT id FROM dokumenty WHERE sciezka = ?", (dokument,)).fetchone()
+    if wiersz:
+        # Usuwane są tylko strony dokumentu, który był już zindeksowany
+        id_dokumentu = wiersz[0]
+        polaczenie.execute("DELETE FROM tekst_stron WHERE rowid IN "
+                           "(SELECT id FROM numery_stron WHERE dokument = ?)", (id_dokumentu,))
+        polaczenie.execute("DELETE FROM numery_stron WHERE dokument = ?", (id_dokumentu,))
+    else:
+        id_dokumentu = polaczenie.execute("INSERT INTO dokumenty (sciezka) VALUES (?)", (dokument,)).lastrowid
+    for numer, tekst in strony:
+        id_strony = polaczenie.execute("INSERT INTO numery_stron (dokument, strona) VALUES (?, ?)",
+                                       (id_dokumentu, numer)).lastrowid
+        polaczenie.execute("INSERT INTO tekst_stron (rowid, tekst) VALUES (?, ?)", (id_strony, tekst))
+
+
+def zapisz_dokumenty(polaczenie, dokumenty):
+    """Zapisuje tekst stron kilku dokumentów w jednej transakcji.
+
+    Wcześniejsze wpisy tych samych dokumentów są zastępowane.
+
+    Args:
+        polaczenie (sqlite3.Connection): Połączenie z bazą indeksu.
+        dokumenty (list[tuple[str, list[str]]]): Pary (dokument, teksty stron).
+
+    Zwraca:
+        int: Liczba zapisanych stron.
+    """
+    liczba_stron = 0
+    with polaczenie:
+        for dokument, strony in dokumenty:
+            z_tekstem = [(numer, tekst) for numer, tekst in enumerate(strony, 1) if tekst]
+            _zapisz_dokument(polaczenie, dokument, z_tekstem)
+            liczba_stron += len(z_tekstem)
+    return liczba_stron
+
+
+def szukaj(polaczenie, zapytanie, limit=20):
+    """Wyszukuje strony pasujące do zapytania FTS5.
+
+    Args:
+        polaczenie (sqlite3.Connection): Połączenie z bazą indeksu.
+        zapytanie (str): Zapytanie w składni FTS5 (np. 'kopernik AND toruń').
+        limit (int, optional): Maksymalna liczba wyników. Domyślnie 20.
+
+    Zwraca:
+        list[tuple[str, int, str]]: Trójki (dokument, strona, fragment) od najlepiej pasujących.
+    """
+    return polaczenie.execute(
+        "SELECT d.sciezka, n.strona, snippet(tekst_stron, 0, '[', ']', '…', 12) "
+        "FROM tekst_stron "
+        "JOIN numery_stron n ON n.id = tekst_stron.rowid "
+        "JOIN dokumenty d ON d.id = n.dokument "
+        "WHERE tekst_stron MATCH ? ORDER BY tekst_stron.rank LIMIT ?",
+        (zapytanie, limit)).fetchall()
+
+
+class IndeksowanieWTle:
+    """Wyodrębnia tekst plików DjVu w tle i zapisuje go w indeksie.
+
+    Ekstrakcja działa w puli wątków, a zapis do bazy odbywa się w jednym
+    wątku piszącym, który grupuje dokumenty w transakcje po `ROZMIAR_PARTII`.
+
+    Atrybuty:
+        liczba_dokumentow (int): Liczba zindeksowanych dokumentów.
+        liczba_stron (int): Liczba zapisanych stron z tekstem.
+        bledy (list[tuple[str, str]]): Pary (plik, opis błędu) dla nieudanych ekstrakcji.
+    """
+    def __init__(self, sciezka_bazy, sciezka_djvutxt, liczba_watkow=2, timeout_s=300):
+        """Inicjalizuje indeksowanie i uruchamia wątek zapisujący.
+
+        Args:
+            sciezka_bazy (str): Ścieżka do pliku bazy SQLite.
+            sciezka_djvutxt (str): Ścieżka do pliku wykonywalnego djvutxt.
+            liczba_watkow (int, optional): Liczba równoległych ekstrakcji. Domyślnie 2.
+            timeout_s (int, optional): Limit czasu ekstrakcji jednego pliku. Domyślnie 300.
+        """
+        self.sciezka_bazy = sciezka_bazy
+        self.sciezka_djvutxt = sciezka_djvutxt
+        self.timeout_s = timeout_s
+        self.liczba_dokumentow = 0
+        self.liczba_stron = 0
+        self.bledy = []
+        self._pula = ThreadPoolExecutor(max_workers=liczba_watkow)
+        self._kolejka = queue.Queue()
+        self._pisarz = threading.Thread(target=self._zapisuj)
+        self._pisarz.daemon = True
+        self._pisarz.start()
+
+    def zlec(self, plik_djvu):
+        """Zleca wyodrębnienie tekstu z pliku DjVu."""
+        self._pula.submit(self._wyodrebnij, plik_djvu)
+
+    def _wyodrebnij(self, plik_djvu):
+        try:
+            strony = wyodrebnij_tekst(self.sciezka_djvutxt, plik_djvu, self.timeout_s)
+        except Exception as e:
+            self.bledy.append((plik_djvu, str(e) or e.__class__.__name__))
+            return
+        self._kolejka.put((os.path.abspath(plik_djvu), strony))
+
+    def _zapisuj(self):
+        polaczenie = otworz_indeks(self.sciezka_bazy)
+        try:
+            koniec = False
+            while not koniec:
+                partia = [self._kolejka.get()]
+                while len(partia) < ROZMIAR_PARTII and not self._kolejka.empty():
+                    partia.append(self._kolejka.get())
+                if partia[-1] is None:
+                    koniec = True
+                partia = [dokument for dokument in partia if dokument is not None]
+                if partia:
+                    self.liczba_stron += zapisz_dokumenty(polaczenie, partia)
+                    self.liczba_dokumentow += len(partia)
+        finally:
+            polaczenie.close()
+
+    def zakoncz(self):
+        """Czeka na zakończenie wszystkich ekstrakcji i zapisów."""
+        self._pula.shutdown(wait=True)
+        self._kolejka.put(None)
+        self._pisarz.join()
+
+
+def main():
+    """Wyszukuje w indeksie pełnotekstowym i wypisuje trafienia (dokument, strona)."""
+    parser = argparse.ArgumentParser(description="Wyszukiwanie w indeksie tekstu plików DjVu.")
+    parser.add_argument('zapytanie', help="zapytanie w składni FTS5, np. 'kopernik AND toruń'")
+    parser.add_argument('--baza', default=NAZWA_BAZY, help=f"plik bazy indeksu (domyślnie {NAZWA_BAZY})")
+    parser.add_argument('--limit', type=int, default=20, help="maksymalna liczba wyników (domyślnie 20)")
+    argumenty = parser.parse_args()
+
+    if not os.path.isfile(argumenty.baza):
+        print(f"❌ Nie znaleziono bazy indeksu: {argumenty.baza}")
+        sys.exit(1)
+
+    polaczenie = otworz_indeks(argumenty.baza)
+    start = time.perf_counter()
+    try:
+        trafienia = szukaj(polaczenie, argumenty.zapytanie, argumenty.limit)
+    except sqlite3.OperationalError as e:
+        print(f"❌ Nieprawidłowe zapytanie: {e}")
+        sys.exit(1)
+    czas_ms = (time.perf_counter() - start) * 1000
+
+    for dokument, strona, fragment in trafienia:
+        print(f"{os.path.basename(dokument)}  s. {strona}: {' '.join(fragment.split())}")
+        print(f"    {dokument}")
+    print(f"\n🔍 Trafień: {len(trafienia)} ({czas_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trwała kolejka zadań konwersji dla GUI konwertera.
+
+Kolejka jest współdzielona przez wątki konwertujące, które pobierają z niej
+kolejne pliki, oraz interfejs, który w dowolnej chwili (także w trakcie
+konwersji) może dodawać pliki, zmieniać ich kolejność i wstrzymywać wydawanie
+zadań. Zadania odłożone (np. końcowe konwersje w pełnej jakości po szybkim
+szkicu) są wydawane dopiero wtedy, gdy nie ma zwykłych zadań. Stan kolejki
+jest zapisywany na dysku, więc przetrwa ponowne uruchomienie programu.
+"""
+
+import os
+import json
+import threading
+
+
+class JobQueue:
+    """
+    Bezpieczna wątkowo, trwała kolejka plików do konwersji z priorytetami.
+
+    Atrybuty:
+        path (str | None): Plik JSON, w którym zapisywany jest stan kolejki.
+        on_change (callable | None): Wywoływana (bez argumentów) po każdej
+            zmianie kolejki, także z wątków konwertujących. Jest wywoływana
+            po zwolnieniu blokady kolejki, więc może bezpiecznie czekać na
+            wątek, który właśnie odczytuje kolejkę (np. główny wątek Tk).
+    """
+    def __init__(self, path=None, on_change=None):
+        """
+        Inicjalizuje kolejkę i wczytuje jej zapisany stan.
+
+        Pliki, które były w trakcie konwersji przy poprzednim zamknięciu
+        programu, wracają na początek kolejki - zadania odłożone na początek
+        listy zadań odłożonych.
+
+        Args:
+            path (str, optional): Plik stanu kolejki. Bez niego kolejka nie jest zapisywana.
+            on_change (callable, optional): Funkcja wywoływana po zmianie kolejki.
+        """
+        self.path = path
+        self.on_change = on_change
+        self._pending = []
+        self._deferred = []
+        self._running = []
+        # Zadania odłożone w trakcie konwersji (podzbiór `_running`)
+        self._running_deferred = []
+        self._paused = False
+        self._condition = threading.Condition()
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        running = list(state.get('running', []))
+        running_deferred = state.get('running_deferred', [])
+        for f in running_deferred:
+            if f in running:
+                running.remove(f)
+        files = running + state.get('pending', [])
+        self._pending = [f for f in dict.fromkeys(files) if os.path.exists(f)]
+        files = running_deferred + state.get('deferred', [])
+        self._deferred = [f for f in dict.fromkeys(files) if os.path.exists(f)]
+        self._paused = bool(state.get('paused', False))
+
+    def _changed(self):
+        """Zapisuje stan kolejki i budzi oczekujące wątki (wywoływana pod blokadą)."""
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'pending': self._pending, 'deferred': self._deferred,
+                               'running': self._running, 'running_deferred': self._running_deferred,
+                               'paused': self._paused}, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+        self._condition.notify_all()
+
+    def _notify(self):
+        """Powiadamia o zmianie kolejki (wywoływana po zwolnieniu blokady)."""
+        if self.on_change:
+            self.on_change()
+
+    def pending(self):
+        """Zwraca kopię listy plików oczekujących, w kolejności wydawania."""
+        with self._condition:
+            return list(self._pending)
+
+    def deferred(self):
+        """Zwraca kopię listy zadań odłożonych, w kolejności wydawania."""
+        with self._condition:
+            return list(self._deferred)
+
+    def running(self):
+        """Zwraca kopię listy plików aktualnie konwertowanych."""
+        with self._condition:
+            return list(self._running)
+
+    @property
+    def paused(self):
+        """True, jeśli wydawanie zadań jest wstrzymane."""
+        return self._paused
+
+    def add(self, files, front=False, deferred=False):
+        """
+        Dodaje pliki do kolejki, pomijając te, które już w niej są.
+
+        Args:
+            files (list[str]): Ścieżki plików DjVu.
+            front (bool, optional): Czy dodać na początek kolejki. Domyślnie na koniec.
+            deferred (bool, optional): Czy dodać jako zadania odłożone, wydawane
+                po wszystkich zwykłych zadaniach. Domyślnie False.
+
+        Zwraca:
+            int: Liczba faktycznie dodanych plików.
+        """
+        with self._condition:
+            if deferred:
+                known = set(self._deferred)
+            else:
+                known = set(self._pending) | set(self._running)
+            new = [f for f in dict.fromkeys(files) if f not in known]
+            if new:
+                queue = self._deferred if deferred else self._pending
+                queue[:] = new + queue if front else queue + new
+                self._changed()
+        if new:
+            self._notify()
+        return len(new)
+
+    def remove(self, files):
+        """Usuwa podane pliki z listy oczekujących i odłożonych."""
+        with self._condition:
+            files = set(files)
+            self._pending = [f for f in self._pending if f not in files]
+            self._deferred = [f for f in self._deferred if f not in files]
+            self._changed()
+        self._notify()
+
+    def clear(self):
+        """Usuwa wszystkie oczekujące i odłożone pliki (konwertowane pliki nie są przerywane)."""
+        with self._condition:
+            self._pending.clear()
+            self._deferred.clear()
+            self._changed()
+        self._notify()
+
+    def move(self, files, delta):
+        """
+        Przesuwa podane pliki o `delta` pozycji w kolejce (ujemne - w stronę początku).
+
+        Zadania odłożone są przesuwane w obrębie listy zadań odłożonych.
+
+        Args:
+            files (list[str]): Pliki do przesunięcia.
+            delta (int): Przesunięcie, np. -1 (w górę) lub 1 (w dół).
+        """
+        with self._condition:
+            files = set(files)
+            for queue in (self._pending, self._deferred):
+                order = range(len(queue)) if delta < 0 else range(len(queue) - 1, -1, -1)
+                for index in order:
+                    if queue[index] not in files:
+                        continue
+                    target = min(max(index + delta, 0), len(queue) - 1)
+                    # Nie przeskakuj innych przesuwanych plików, aby zachować ich kolejność
+                    if queue[target] in files:
+                        continue
+                    queue.insert(target, queue.pop(index))
+            self._changed()
+        self._notify()
+
+    def bump(self, files):
+        """Przenosi podane pliki na początek ich listy (oczekujących lub odłożonych), zachowując ich kolejność."""
+        with self._condition:
+            files = set(files)
+            for queue in (self._pending, self._deferred):
+                queue[:] = [f for f in queue if f in files] + [f for f in queue if f not in files]
+            self._changed()
+        self._notify()
+
+    def pause(self):
+        """Wstrzymuje wydawanie zadań (trwające konwersje są kończone)."""
+        with self._condition:
+            self._paused = True
+            self._changed()
+        self._notify()
+
+    def resume(self):
+        """Wznawia wydawanie zadań."""
+        with self._condition:
+            self._paused = False
+            self._changed()
+        self._notify()
+
+    def get(self):
+        """
+        Pobiera następne zadanie konwersji.
+
+        Zadania odłożone są wydawane dopiero, gdy nie ma zwykłych zadań. Gdy
+        kolejka jest wstrzymana, czeka na wznowienie. Gdy kolejka jest pusta,
+        czeka, dopóki inne wątki wciąż konwertują pliki (ich praca może się
+        zakończyć dodaniem nowych zadań), a potem zwraca None.
+
+        Zwraca:
+            tuple[str, bool] | None: Ścieżka pliku i informacja, czy było to
+            zadanie odłożone, lub None, jeśli nie ma już nic do zrobienia.
+        """
+        with self._condition:
+            while True:
+                if not self._paused and (self._pending or self._deferred):
+                    deferred = not self._pending
+                    file = (self._deferred if deferred else self._pending).pop(0)
+                    self._running.append(file)
+                    if deferred:
+                        self._running_deferred.append(file)
+                    self._changed()
+                    break
+                if not self._paused and not self._running:
+                    return None
+                self._condition.wait()
+        self._notify()
+        return file, deferred
+
+    def done(self, file, deferred=False):
+        """
+        Oznacza plik jako przetworzony (niezależnie od wyniku konwersji).
+
+        Args:
+            file (str): Plik zwrócony przez `get`.
+            deferred (bool, optional): Czy było to zadanie odłożone (jak zwróciła `get`).
+        """
+        with self._condition:
+            if file in self._running:
+                self._running.remove(file)
+            if deferred and file in self._running_deferred:
+                self._running_deferred.remove(file)
+            self._changed()
+        self._notify()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pomiar czasu startu GUI (czas do pokazania pierwszego okna).
+
+Skrypt uruchamia aplikację kilka razy ze zmienną środowiskową
+DJVU_POMIAR_STARTU wskazującą plik, do którego GUI zapisuje znacznik czasu
+w chwili pokazania głównego okna, po czym samo się zamyka. Mierzony czas
+obejmuje więc także rozpakowywanie pakietu PyInstaller i start interpretera.
+Wyniki są dopisywane do pliku CSV, aby można je było porównywać między wydaniami.
+
+Użycie:
+    python pomiar_startu.py [--etykieta 1.2] [--powtorzenia 5] [POLECENIE ...]
+
+Bez POLECENIA mierzony jest skrypt djvu_to_pdf_gui.py, np.:
+    python pomiar_startu.py --etykieta onefile dist/DJVU_Converter.exe
+    python pomiar_startu.py --etykieta onedir dist/DJVU_Converter/DJVU_Converter.exe
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+# Domyślny plik z historią pomiarów
+PLIK_WYNIKOW = 'pomiary_startu.csv'
+
+
+def zmierz_start(polecenie, timeout_s=60):
+    """Uruchamia aplikację i mierzy czas do pokazania jej głównego okna.
+
+    Args:
+        polecenie (list[str]): Polecenie uruchamiające GUI.
+        timeout_s (int, optional): Maksymalny czas oczekiwania. Domyślnie 60.
+
+    Zwraca:
+        float | None: Czas w sekundach lub None, jeśli okno się nie pojawiło.
+    """
+    uchwyt, znacznik = tempfile.mkstemp(suffix='.txt')
+    os.close(uchwyt)
+    os.remove(znacznik)
+    srodowisko = dict(os.environ, DJVU_POMIAR_STARTU=znacznik)
+    try:
+        start = time.time()
+        proces = subprocess.Popen(polecenie, env=srodowisko)
+        try:
+            proces.wait(timeout=timeout_s)
+        except subprocess.TimeoutExpired:
+            proces.kill()
+            return None
+        try:
+            with open(znacznik, encoding='utf-8') as f:
+                return float(f.read()) - start
+        except (OSError, ValueError):
+            return None
+    finally:
+        if os.path.exists(znacznik):
+            os.remove(znacznik)
+
+
+def main():
+    """Wykonuje serię pomiarów i dopisuje wynik do pliku CSV."""
+    parser = argparse.ArgumentParser(description="Pomiar czasu do pokazania okna GUI.")
+    parser.add_argument('polecenie', nargs='*', help="polecenie uruchamiające GUI (domyślnie djvu_to_pdf_gui.py)")
+    parser.add_argument('--etykieta', default='', help="etykieta pomiaru, np. numer wydania")
+    parser.add_argument('--powtorzenia', type=int, default=5, help="liczba uruchomień (domyślnie 5)")
+    parser.add_argument('--wyniki', default=PLIK_WYNIKOW, help=f"plik CSV z wynikami (domyślnie {PLIK_WYNIKOW})")
+    argumenty = parser.parse_args()
+
+    polecenie = argumenty.polecenie or [sys.executable,
+                                        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'djvu_to_pdf_gui.py')]
+    czasy = []
+    for numer in range(1, argumenty.powtorzenia + 1):
+        czas = zmierz_start(polecenie)
+        if czas is None:
+            print(f"❌ Pomiar {numer}: okno nie pojawiło się")
+            continue
+        czasy.append(czas)
+        print(f"⏱️ Pomiar {numer}: {czas * 1000:.0f} ms")
+
+    if not czasy:
+        sys.exit(1)
+
+    # Pierwsze uruchomienie bywa wolniejsze (zimna pamięć podręczna dysku)
+    mediana_ms = statistics.median(czasy) * 1000
+    print(f"\n📊 Mediana: {mediana_ms:.0f} ms, pierwsze: {czasy[0] * 1000:.0f} ms, "
+          f"najlepsze: {min(czasy) * 1000:.0f} ms")
+
+    nowy_plik = not os.path.exists(argumenty.wyniki)
+    with open(argumenty.wyniki, 'a', newline='', encoding='utf-8') as f:
+        zapis = csv.writer(f)
+        if nowy_plik:
+            zapis.writerow(['data', 'etykieta', 'polecenie', 'powtorzenia', 'mediana_ms', 'pierwsze_ms', 'min_ms'])
+        zapis.writerow([datetime.now().isoformat(timespec='seconds'), argumenty.etykieta, ' '.join(polecenie),
+                        len(czasy), round(mediana_ms), round(czasy[0] * 1000), round(min(czasy) * 1000)])
+    print(f"📁 Zapisano w: {argumenty.wyniki}")
+
+
+if __name__ == "__main__":
+    main()
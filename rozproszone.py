@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rozproszona konwersja DjVu -> PDF na wielu komputerach (koordynator/worker).
+
+Koordynator wyszukuje pliki DjVu, przechowuje listę zadań i rozdaje je
+workerom przez prosty protokół HTTP/JSON. Każde przydzielone zadanie ma
+dzierżawę, którą worker przedłuża pulsami; zadania workerów, które przestały
+odpowiadać, wracają do kolejki. Workery konwertują pliki na współdzielonym
+magazynie plików, więc ścieżki muszą być takie same na wszystkich węzłach.
+Worker wykonuje jedną próbę zadania (ponowieniami zarządza koordynator) i
+publikuje plik PDF tylko wtedy, gdy wciąż ma dzierżawę.
+
+Protokół przeznaczony jest dla zaufanej sieci wewnętrznej (brak uwierzytelniania).
+
+Użycie:
+    python rozproszone.py koordynator KATALOG [--wyjscie KATALOG] [--port 8765]
+    python rozproszone.py worker http://koordynator:8765 [--nazwa NAZWA]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import djvu_core
+
+# Domyślny port koordynatora
+PORT = 8765
+
+# Domyślny czas dzierżawy zadania w sekundach
+DZIERZAWA_S = 60
+
+
+class Koordynator:
+    """Przechowuje zadania konwersji i przydziela je workerom z dzierżawą.
+
+    Atrybuty:
+        zadania (dict[int, dict]): Zadania według identyfikatora. Każde zadanie
+            ma pola 'plik', 'stan' ('oczekuje', 'w_toku', 'gotowe', 'blad'),
+            'worker', 'wygasa', 'proby', 'czas_s', 'rozmiar' i 'opis'.
+        workery (dict[str, dict]): Statystyki workerów (gotowe, bledy, czas_s, ostatni_kontakt).
+        dzierzawa_s (int): Czas dzierżawy zadania bez pulsu.
+        max_prob (int): Liczba przydziałów, po której zadanie jest uznawane za błędne.
+    """
+    def __init__(self, pliki, katalog_wyjsciowy=None, jakosc='normal', timeout_s=300,
+                 dzierzawa_s=DZIERZAWA_S, max_prob=3):
+        """Inicjalizuje koordynatora z listą plików do konwersji.
+
+        Args:
+            pliki (list[str]): Ścieżki plików DjVu (na współdzielonym magazynie).
+            katalog_wyjsciowy (str, optional): Katalog na pliki PDF. Domyślnie
+                katalog pliku źródłowego.
+            jakosc (str, optional): Jakość konwersji. Domyślnie 'normal'.
+            timeout_s (int, optional): Timeout konwersji jednego pliku. Domyślnie 300.
+            dzierzawa_s (int, optional): Czas dzierżawy w sekundach. Domyślnie 60.
+            max_prob (int, optional): Maksymalna liczba przydziałów zadania. Domyślnie 3.
+        """
+        self.katalog_wyjsciowy = katalog_wyjsciowy
+        self.jakosc = jakosc
+        self.timeout_s = timeout_s
+        self.dzierzawa_s = dzierzawa_s
+        self.max_prob = max_prob
+        self.start = time.time()
+        self.zadania = {}
+        self.workery = {}
+        self._kolejka = deque()
+        self._blokada = threading.Lock()
+        for numer, plik in enumerate(pliki, 1):
+            self.zadania[numer] = {'plik': os.path.abspath(plik), 'stan': 'oczekuje', 'worker': None,
+                                   'wygasa': 0.0, 'proby': 0, 'czas_s': 0.0, 'rozmiar': 0, 'opis': ''}
+            self._kolejka.append(numer)
+
+    def _worker(self, nazwa):
+        statystyki = self.workery.setdefault(nazwa, {'gotowe': 0, 'bledy': 0, 'czas_s': 0.0,
+                                                     'ostatni_kontakt': 0.0})
+        statystyki['ostatni_kontakt'] = time.time()
+        return statystyki
+
+    def zakonczony(self):
+        """Zwraca True, jeśli wszystkie zadania są gotowe lub ostatecznie błędne."""
+        with self._blokada:
+            return all(z['stan'] in ('gotowe', 'blad') for z in self.zadania.values())
+
+    def przydziel(self, worker):
+        """Przydziela workerowi następne oczekujące zadanie.
+
+        Zwraca:
+            dict: {'zadanie': {...} lub None, 'koniec': bool, 'dzierzawa_s': int}.
+        """
+        with self._blokada:
+            self._worker(worker)
+            while self._kolejka:
+                numer = self._kolejka.popleft()
+                zadanie = self.zadania[numer]
+                if zadanie['stan'] != 'oczekuje':
+                    continue
+                zadanie.update(stan='w_toku', worker=worker, wygasa=time.time() + self.dzierzawa_s)
+                zadanie['proby'] += 1
+                katalog = self.katalog_wyjsciowy or os.path.dirname(zadanie['plik'])
+                return {'zadanie': {'id': numer, 'plik': zadanie['plik'], 'katalog_wyjsciowy': katalog,
+                                    'jakosc': self.jakosc, 'timeout_s': self.timeout_s},
+                        'koniec': False, 'dzierzawa_s': self.dzierzawa_s}
+            koniec = all(z['stan'] in ('gotowe', 'blad') for z in self.zadania.values())
+            return {'zadanie': None, 'koniec': koniec, 'dzierzawa_s': self.dzierzawa_s}
+
+    def puls(self, worker, numer):
+        """Przedłuża dzierżawę zadania.
+
+        Zwraca:
+            bool: False, jeśli worker utracił dzierżawę (zadanie wróciło do kolejki).
+        """
+        with self._blokada:
+            self._worker(worker)
+            zadanie = self.zadania.get(numer)
+            if not zadanie or zadanie['stan'] != 'w_toku' or zadanie['worker'] != worker:
+                return False
+            zadanie['wygasa'] = time.time() + self.dzierzawa_s
+            return True
+
+    def wynik(self, worker, numer, ok, czas_s=0.0, rozmiar=0, opis=''):
+        """Zapisuje wynik zadania.
+
+        Spóźnione wyniki już zakończonych zadań są pomijane. Błąd zgłoszony
+        przez workera, który utracił dzierżawę, też jest pomijany - zadanie
+        jest już w kolejce lub u innego workera i ponowne odłożenie
+        przydzieliłoby je kilku workerom naraz. Spóźniony sukces jest
+        przyjmowany, bo plik PDF jest publikowany atomowo.
+
+        Zwraca:
+            bool: True, jeśli wynik został przyjęty.
+        """
+        with self._blokada:
+            statystyki = self._worker(worker)
+            zadanie = self.zadania.get(numer)
+            if not zadanie or zadanie['stan'] in ('gotowe', 'blad'):
+                return False
+            if not ok and (zadanie['stan'] != 'w_toku' or zadanie['worker'] != worker):
+                return False
+            statystyki['czas_s'] += czas_s
+            if ok:
+                statystyki['gotowe'] += 1
+                zadanie.update(stan='gotowe', worker=worker, czas_s=czas_s, rozmiar=rozmiar)
+            else:
+                statystyki['bledy'] += 1
+                zadanie['opis'] = opis
+                self._odloz(numer)
+            return True
+
+    def _odloz(self, numer):
+        """Zwraca zadanie do kolejki lub oznacza je jako błędne po `max_prob` próbach."""
+        zadanie = self.zadania[numer]
+        if zadanie['proby'] >= self.max_prob:
+            zadanie['stan'] = 'blad'
+        else:
+            zadanie.update(stan='oczekuje', worker=None)
+            self._kolejka.append(numer)
+
+    def odzyskaj_wygasle(self):
+        """Zwraca do kolejki zadania, których dzierżawa wygasła.
+
+        Zwraca:
+            list[int]: Identyfikatory odzyskanych zadań.
+        """
+        teraz = time.time()
+        with self._blokada:
+            wygasle = [n for n, z in self.zadania.items() if z['stan'] == 'w_toku' and z['wygasa'] < teraz]
+            for numer in wygasle:
+                self.zadania[numer]['opis'] = f"wygasła dzierżawa workera {self.zadania[numer]['worker']}"
+                self._odloz(numer)
+            return wygasle
+
+    def stan(self):
+        """Zwraca metryki postępu w postaci słownika gotowego do serializacji JSON."""
+        with self._blokada:
+            liczniki = {'oczekuje': 0, 'w_toku': 0, 'gotowe': 0, 'blad': 0}
+            for zadanie in self.zadania.values():
+                liczniki[zadanie['stan']] += 1
+            czas = time.time() - self.start
+            return {
+                'zadania': liczniki,
+                'razem': len(self.zadania),
+                'czas_s': round(czas, 1),
+                'plikow_na_godzine': round(liczniki['gotowe'] * 3600 / czas, 1) if czas > 0 else 0.0,
+                'bajty_wyjsciowe': sum(z['rozmiar'] for z in self.zadania.values()),
+                'workery': {nazwa: dict(s) for nazwa, s in self.workery.items()},
+                'bledy': {z['plik']: z['opis'] for z in self.zadania.values() if z['stan'] == 'blad'},
+            }
+
+
+def _utworz_handler(koordynator):
+    """Tworzy klasę obsługi żądań HTTP powiązaną z koordynatorem."""
+    class Handler(BaseHTTPRequestHandler):
+        def _odpowiedz(self, dane, kod=200):
+            tresc = json.dumps(dane, ensure_ascii=False).encode('utf-8')
+            self.send_response(kod)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(tresc)))
+            self.end_headers()
+            self.wfile.write(tresc)
+
+        def do_GET(self):
+            if self.path == '/stan':
+                self._odpowiedz(koordynator.stan())
+            else:
+                self._odpowiedz({'blad': 'nieznana ścieżka'}, 404)
+
+        def do_POST(self):
+            try:
+                dlugosc = int(self.headers.get('Content-Length', 0))
+                dane = json.loads(self.rfile.read(dlugosc) or b'{}')
+                worker = str(dane.get('worker', '?'))
+            except (ValueError, json.JSONDecodeError):
+                self._odpowiedz({'blad': 'nieprawidłowe żądanie'}, 400)
+                return
+            if self.path == '/zadanie':
+                self._odpowiedz(koordynator.przydziel(worker))
+            elif self.path == '/puls':
+                self._odpowiedz({'ok': koordynator.puls(worker, dane.get('id'))})
+            elif self.path == '/wynik':
+                przyjety = koordynator.wynik(worker, dane.get('id'), bool(dane.get('ok')),
+                                             float(dane.get('czas_s', 0)), int(dane.get('rozmiar', 0)),
+                                             str(dane.get('opis', '')))
+                self._odpowiedz({'ok': przyjety})
+            else:
+                self._odpowiedz({'blad': 'nieznana ścieżka'}, 404)
+
+        def log_message(self, format, *args):
+            # Wyciszenie domyślnego logu każdego żądania
+            pass
+
+    return Handler
+
+
+def uruchom_koordynatora(koordynator, host='0.0.0.0', port=PORT):
+    """Uruchamia serwer koordynatora i czeka na zakończenie wszystkich zadań.
+
+    Args:
+        koordynator (Koordynator): Koordynator z listą zadań.
+        host (str, optional): Adres nasłuchiwania. Domyślnie wszystkie interfejsy.
+        port (int, optional): Port nasłuchiwania. Domyślnie 8765.
+
+    Zwraca:
+        dict: Końcowe metryki (patrz `Koordynator.stan`).
+    """
+    serwer = ThreadingHTTPServer((host, port), _utworz_handler(koordynator))
+    watek = threading.Thread(target=serwer.serve_forever)
+    watek.daemon = True
+    watek.start()
+    print(f"📡 Koordynator nasłuchuje na {host}:{serwer.server_address[1]} "
+          f"({len(koordynator.zadania)} zadań)")
+
+    ostatni_raport = 0.0
+    try:
+        while not koordynator.zakonczony():
+            time.sleep(1)
+            for numer in koordynator.odzyskaj_wygasle():
+                print(f"⚠️  Zadanie {numer} wraca do kolejki: {koordynator.zadania[numer]['opis']}")
+            if time.time() - ostatni_raport >= 10:
+                ostatni_raport = time.time()
+                stan = koordynator.stan()
+                z = stan['zadania']
+                print(f"📊 Gotowe {z['gotowe']}/{stan['razem']}, w toku {z['w_toku']}, "
+                      f"błędy {z['blad']}, workery {len(stan['workery'])}, "
+                      f"{stan['plikow_na_godzine']} plików/h")
+        # Chwila na odebranie informacji o końcu pracy przez workery
+        time.sleep(2)
+    finally:
+        serwer.shutdown()
+        serwer.server_close()
+    return koordynator.stan()
+
+
+def _wyslij(adres, sciezka, dane, timeout_s=30):
+    """Wysyła żądanie POST z danymi JSON do koordynatora i zwraca odpowiedź."""
+    zadanie = urllib.request.Request(adres.rstrip('/') + sciezka,
+                                     data=json.dumps(dane).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(zadanie, timeout=timeout_s) as odpowiedz:
+        return json.loads(odpowiedz.read())
+
+
+def uruchom_workera(adres, sciezka_ddjvu, nazwa=None, max_przerwa_s=300):
+    """Pobiera zadania od koordynatora i konwertuje pliki, aż praca się skończy.
+
+    Args:
+        adres (str): Adres koordynatora, np. 'http://10.0.0.5:8765'.
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+        nazwa (str, optional): Nazwa workera. Domyślnie 'host:pid'.
+        max_przerwa_s (int, optional): Jak długo ponawiać połączenie z
+            niedostępnym koordynatorem. Domyślnie 300.
+
+    Zwraca:
+        int: Liczba pomyślnie skonwertowanych plików.
+    """
+    nazwa = nazwa or f"{socket.gethostname()}:{os.getpid()}"
+    backend = djvu_core.pobierz_backend(sciezka_ddjvu)
+    # Jedna próba bez kwarantanny - ponowienia (także na innych workerach) należą do koordynatora
+    polityka = djvu_core.PolitykaPonowien(1, kwarantanna=False)
+    sukcesy = 0
+    brak_polaczenia_od = None
+    while True:
+        try:
+            odpowiedz = _wyslij(adres, '/zadanie', {'worker': nazwa})
+            brak_polaczenia_od = None
+        except (urllib.error.URLError, OSError) as e:
+            brak_polaczenia_od = brak_polaczenia_od or time.time()
+            if time.time() - brak_polaczenia_od > max_przerwa_s:
+                print(f"❌ Koordynator niedostępny od {max_przerwa_s}s: {e}")
+                break
+            time.sleep(5)
+            continue
+
+        zadanie = odpowiedz['zadanie']
+        if zadanie is None:
+            if odpowiedz['koniec']:
+                break
+            time.sleep(2)
+            continue
+
+        # Pulsy przedłużające dzierżawę w trakcie konwersji
+        stop = threading.Event()
+        utracona = threading.Event()
+
+        def pulsuj():
+            while not stop.wait(odpowiedz['dzierzawa_s'] / 3):
+                try:
+                    if not _wyslij(adres, '/puls', {'worker': nazwa, 'id': zadanie['id']}).get('ok'):
+                        # Zadanie wróciło do kolejki i mógł je dostać inny worker
+                        utracona.set()
+                        return
+                except (urllib.error.URLError, OSError):
+                    pass
+
+        watek_pulsu = threading.Thread(target=pulsuj)
+        watek_pulsu.daemon = True
+        watek_pulsu.start()
+
+        start = time.monotonic()
+        plik_pdf = djvu_core.sciezka_pdf(zadanie['plik'], zadanie['katalog_wyjsciowy'])
+        prywatny = None
+        rozmiar = 0
+        print(f"🔄 Konwertuję: {os.path.basename(zadanie['plik'])} -> {os.path.basename(plik_pdf)}")
+        try:
+            os.makedirs(zadanie['katalog_wyjsciowy'], exist_ok=True)
+            # Wynik trafia najpierw do prywatnego pliku - po utracie dzierżawy ten
+            # sam plik może konwertować inny worker
+            prywatny = djvu_core.plik_tymczasowy(plik_pdf, '.pdf.worker')
+            wynik = djvu_core.konwertuj_z_ponowieniami(backend, zadanie['plik'], prywatny, zadanie['jakosc'],
+                                                       zadanie['timeout_s'], polityka, komunikat=print)
+            ok = wynik.ok
+            opis = '' if ok else (wynik.opis or djvu_core.ogon(wynik.stderr, 5) or wynik.blad)
+            if ok:
+                rozmiar = os.path.getsize(prywatny)
+        except Exception as e:
+            ok, opis = False, str(e)
+        finally:
+            stop.set()
+            watek_pulsu.join()
+        czas_s = time.monotonic() - start
+
+        if ok and not utracona.is_set():
+            # Publikacja tylko po potwierdzeniu, że dzierżawa jest wciąż ważna
+            try:
+                if _wyslij(adres, '/puls', {'worker': nazwa, 'id': zadanie['id']}).get('ok'):
+                    os.replace(prywatny, plik_pdf)
+                    djvu_core.oznacz_szkic(plik_pdf, False)
+                    prywatny = None
+                else:
+                    utracona.set()
+            except (urllib.error.URLError, OSError) as e:
+                ok, opis = False, str(e)
+        if prywatny and os.path.exists(prywatny):
+            try:
+                os.remove(prywatny)
+            except OSError:
+                pass
+
+        if utracona.is_set():
+            print(f"⚠️  Utracono dzierżawę zadania {os.path.basename(zadanie['plik'])} - wynik jest odrzucany")
+            continue
+
+        if ok:
+            sukcesy += 1
+            print(f"✅ Utworzono: {os.path.basename(plik_pdf)}")
+        else:
+            print(f"❌ {os.path.basename(zadanie['plik'])}: {opis}")
+        try:
+            _wyslij(adres, '/wynik', {'worker': nazwa, 'id': zadanie['id'], 'ok': ok,
+                                      'czas_s': czas_s, 'rozmiar': rozmiar, 'opis': opis})
+        except (urllib.error.URLError, OSError):
+            # Zadanie wróci do kolejki po wygaśnięciu dzierżawy
+            pass
+    return sukcesy
+
+
+def main():
+    """Uruchamia koordynatora lub workera zgodnie z argumentami wiersza poleceń."""
+    parser = argparse.ArgumentParser(description="Rozproszona konwersja DjVu -> PDF.")
+    podkomendy = parser.add_subparsers(dest='tryb', required=True)
+
+    koord = podkomendy.add_parser('koordynator', help="rozdziela zadania między workery")
+    koord.add_argument('katalog', help="katalog z plikami DjVu (na współdzielonym magazynie)")
+    koord.add_argument('--wyjscie', help="katalog na pliki PDF (domyślnie katalog źródłowy)")
+    koord.add_argument('--jakosc', choices=['low', 'normal', 'high'], default='normal')
+    koord.add_argument('--timeout', type=int, default=300, help="timeout konwersji pliku w sekundach")
+    koord.add_argument('--host', default='0.0.0.0')
+    koord.add_argument('--port', type=int, default=PORT)
+    koord.add_argument('--dzierzawa', type=int, default=DZIERZAWA_S, help="czas dzierżawy zadania w sekundach")
+
+    worker = podkomendy.add_parser('worker', help="konwertuje pliki przydzielone przez koordynatora")
+    worker.add_argument('adres', help="adres koordynatora, np. http://10.0.0.5:8765")
+    worker.add_argument('--nazwa', help="nazwa workera (domyślnie host:pid)")
+
+    argumenty = parser.parse_args()
+
+    if argumenty.tryb == 'koordynator':
+        pliki = djvu_core.znajdz_pliki_djvu(argumenty.katalog)
+        if not pliki:
+            print("❌ Nie znaleziono plików DjVu w podanym katalogu.")
+            sys.exit(1)
+        koordynator = Koordynator(pliki, argumenty.wyjscie, argumenty.jakosc, argumenty.timeout,
+                                  argumenty.dzierzawa)
+        stan = uruchom_koordynatora(koordynator, argumenty.host, argumenty.port)
+
+        print("\n" + "=" * 60)
+        print("📊 PODSUMOWANIE")
+        print("=" * 60)
+        print(f"✅ Pomyślnie skonwertowano: {stan['zadania']['gotowe']}")
+        print(f"❌ Błędy: {stan['zadania']['blad']}")
+        print(f"⏱️ Czas: {stan['czas_s']}s ({stan['plikow_na_godzine']} plików/h)")
+        for nazwa, s in sorted(stan['workery'].items()):
+            print(f"   🖥️  {nazwa}: {s['gotowe']} gotowych, {s['bledy']} błędów, {s['czas_s']:.0f}s pracy")
+        for plik, opis in stan['bledy'].items():
+            print(f"   ⚠️  {os.path.basename(plik)}: {opis}")
+    else:
+        sciezka_ddjvu = djvu_core.znajdz_ddjvu()
+        if not sciezka_ddjvu:
+            print("❌ Nie znaleziono programu ddjvu — dodaj go do PATH lub ustaw DJVU_PATH.")
+            sys.exit(1)
+        sukcesy = uruchom_workera(argumenty.adres, sciezka_ddjvu, argumenty.nazwa)
+        print(f"\n👋 Worker zakończył pracę ({sukcesy} plików skonwertowanych).")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⏹️  Program przerwany przez użytkownika.")
+        sys.exit(0)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Szybkie odczytywanie metadanych plików DjVu bez uruchamiania procesów.
+
+Plik jest mapowany do pamięci (mmap), a parser przechodzi tylko po nagłówkach
+bloków IFF (`AT&TFORM`, katalog DIRM, bloki INFO stron), pomijając dane
+obrazów. Pozwala to w ułamku milisekundy ustalić rodzaj dokumentu, liczbę
+stron, ich wymiary, rozdzielczość i to, czy są dwukolorowe, oraz wykryć pliki
+obcięte lub uszkodzone, zanim zostanie uruchomione `ddjvu`.
+
+Użycie:
+    python sonda_djvu.py PLIK [PLIK ...]
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+import threading
+
+# Rozdzielczość przyjmowana, gdy blok INFO zawiera nieprawidłową wartość (jak w DjVuLibre)
+DOMYSLNE_DPI = 300
+
+# Bloki strony z danymi koloru (tło lub kolory pierwszego planu)
+BLOKI_KOLORU = {b'BG44', b'BGjp', b'BG2k', b'FG44', b'FGjp', b'FG2k', b'FGbz'}
+
+# Liczba zapamiętanych wyników sondowania
+ROZMIAR_PAMIECI = 4096
+
+
+class BladFormatu(Exception):
+    """Błąd zgłaszany, gdy struktura IFF pliku jest nieprawidłowa lub obcięta."""
+
+
+class InformacjeDjvu:
+    """Metadane dokumentu DjVu odczytane z nagłówków.
+
+    Atrybuty:
+        rodzaj (str | None): 'strona', 'dokument', 'indeks', 'dolaczany'
+            (jak w `djvu_core.rodzaj_djvu`) lub None dla nieczytelnego pliku.
+        strony (int | None): Liczba stron; None dla indeksu dokumentu
+            wieloplikowego, którego strony są w osobnych plikach.
+        rozmiary (list[tuple[int, int]]): Szerokość i wysokość kolejnych stron w pikselach.
+        dpi (list[int]): Rozdzielczość kolejnych stron.
+        kolorowe (list[bool]): Czy kolejne strony mają dane koloru (False - strona dwukolorowa).
+        blad (str | None): Opis uszkodzenia pliku lub None, jeśli struktura jest poprawna.
+    """
+    def __init__(self, rodzaj=None, strony=None, blad=None):
+        self.rodzaj = rodzaj
+        self.strony = strony
+        self.rozmiary = []
+        self.dpi = []
+        self.kolorowe = []
+        self.blad = blad
+
+    @property
+    def poprawny(self):
+        """True, jeśli struktura pliku jest poprawna."""
+        return self.blad is None
+
+    @property
+    def megapiksele(self):
+        """Łączna liczba megapikseli wszystkich stron (miara kosztu dekodowania)."""
+        return sum(szerokosc * wysokosc for szerokosc, wysokosc in self.rozmiary) / 1e6
+
+    def opis(self):
+        """Zwraca krótki opis, np. '120 s., 300 dpi, kolor' lub opis błędu."""
+        if self.blad:
+            return f"uszkodzony: {self.blad}"
+        if self.strony is None:
+            return "dokument wieloplikowy"
+        czesci = [f"{self.strony} s."]
+        if self.dpi:
+            czesci.append(f"{max(set(self.dpi), key=self.dpi.count)} dpi")
+        if self.kolorowe:
+            czesci.append("kolor" if any(self.kolorowe) else "czarno-biały")
+        return ", ".join(czesci)
+
+
+def _bloki(dane, poczatek, koniec):
+    """Generuje bloki IFF (identyfikator, początek danych, rozmiar) z zakresu danych."""
+    pozycja = poczatek
+    while pozycja + 8 <= koniec:
+        identyfikator = bytes(dane[pozycja:pozycja + 4])
+        rozmiar, = struct.unpack_from('>I', dane, pozycja + 4)
+        if pozycja + 8 + rozmiar > koniec:
+            raise BladFormatu(f"blok {identyfikator.decode('latin-1')} wykracza poza koniec pliku "
+                              f"(przesunięcie {pozycja})")
+        yield identyfikator, pozycja + 8, rozmiar
+        # Bloki IFF są wyrównane do parzystych przesunięć
+        pozycja += 8 + rozmiar + (rozmiar & 1)
+
+
+def _strona(dane, poczatek, koniec, informacje):
+    """Odczytuje blok INFO i rodzaj danych obrazu formularza FORM:DJVU."""
+    info = None
+    kolor = False
+    for identyfikator, start, rozmiar in _bloki(dane, poczatek, koniec):
+        if identyfikator == b'INFO' and rozmiar >= 4:
+            info = (start, rozmiar)
+        elif identyfikator in BLOKI_KOLORU:
+            kolor = True
+    if info is None:
+        raise BladFormatu("strona bez bloku INFO")
+    start, rozmiar = info
+    szerokosc, wysokosc = struct.unpack_from('>HH', dane, start)
+    dpi = struct.unpack_from('<H', dane, start + 6)[0] if rozmiar >= 8 else 0
+    if not 25 <= dpi <= 6000:
+        dpi = DOMYSLNE_DPI
+    informacje.rozmiary.append((szerokosc, wysokosc))
+    informacje.dpi.append(dpi)
+    informacje.kolorowe.append(kolor)
+
+
+def sonduj_dane(dane):
+    """Analizuje zawartość pliku DjVu (bytes, mmap lub memoryview).
+
+    Args:
+        dane: Zawartość pliku.
+
+    Zwraca:
+        InformacjeDjvu: Odczytane metadane (z opisem błędu dla uszkodzonych danych).
+    """
+    if len(dane) < 16 or dane[:8] != b'AT&TFORM':
+        return InformacjeDjvu(blad="brak nagłówka AT&TFORM")
+    rozmiar, = struct.unpack_from('>I', dane, 8)
+    typ = bytes(dane[12:16])
+    koniec = 12 + rozmiar
+    # Obcięty plik jest analizowany do końca dostępnych danych, aby ustalić jego rodzaj
+    obciety = koniec > len(dane)
+    if obciety:
+        koniec = len(dane)
+    informacje = InformacjeDjvu()
+    try:
+        if typ == b'DJVU':
+            informacje.rodzaj = 'strona'
+            _strona(dane, 16, koniec, informacje)
+        elif typ == b'DJVI':
+            informacje.rodzaj = 'dolaczany'
+            informacje.strony = 0
+        elif typ == b'DJVM':
+            bloki = _bloki(dane, 16, koniec)
+            identyfikator, start, dlugosc = next(bloki, (None, 0, 0))
+            if identyfikator != b'DIRM' or dlugosc < 3:
+                raise BladFormatu("brak katalogu DIRM")
+            if not dane[start] & 0x80:
+                # Dokument wieloplikowy: strony są w osobnych plikach
+                informacje.rodzaj = 'indeks'
+                return informacje
+            informacje.rodzaj = 'dokument'
+            for identyfikator, start, dlugosc in bloki:
+                if identyfikator == b'FORM' and dlugosc >= 4 and dane[start:start + 4] == b'DJVU':
+                    _strona(dane, start + 4, start + dlugosc, informacje)
+        else:
+            raise BladFormatu(f"nieznany typ formularza {typ.decode('latin-1')}")
+    except BladFormatu as e:
+        informacje.blad = str(e)
+    if obciety:
+        informacje.blad = f"plik obcięty ({len(dane)} z {12 + rozmiar} bajtów)"
+    if informacje.strony is None:
+        informacje.strony = len(informacje.rozmiary)
+    if informacje.rodzaj in ('strona', 'dokument') and not informacje.strony and not informacje.blad:
+        informacje.blad = "dokument bez stron"
+    return informacje
+
+
+_pamiec = {}
+_blokada_pamieci = threading.Lock()
+
+
+def sonduj(plik_djvu):
+    """Odczytuje metadane pliku DjVu, mapując go do pamięci.
+
+    Wyniki są zapamiętywane według ścieżki, rozmiaru i czasu modyfikacji, więc
+    ponowne sondowanie niezmienionego pliku (np. przy odświeżaniu listy) nie
+    czyta go ponownie.
+
+    Args:
+        plik_djvu (str): Ścieżka do pliku DjVu.
+
+    Zwraca:
+        InformacjeDjvu: Odczytane metadane.
+    """
+    try:
+        stat = os.stat(plik_djvu)
+    except OSError as e:
+        return InformacjeDjvu(blad=e.strerror or str(e))
+    klucz = (os.path.abspath(plik_djvu), stat.st_size, stat.st_mtime_ns)
+    with _blokada_pamieci:
+        if klucz in _pamiec:
+            return _pamiec[klucz]
+
+    if stat.st_size == 0:
+        informacje = InformacjeDjvu(blad="pusty plik")
+    else:
+        try:
+            with open(plik_djvu, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dane:
+                informacje = sonduj_dane(dane)
+        except (OSError, ValueError) as e:
+            informacje = InformacjeDjvu(blad=str(e))
+
+    with _blokada_pamieci:
+        if len(_pamiec) >= ROZMIAR_PAMIECI:
+            _pamiec.pop(next(iter(_pamiec)))
+        _pamiec[klucz] = informacje
+    return informacje
+
+
+def main():
+    """Wypisuje metadane podanych plików DjVu i czas ich odczytu."""
+    parser = argparse.ArgumentParser(description="Metadane plików DjVu odczytane z nagłówków IFF.")
+    parser.add_argument('pliki', nargs='+', help="pliki DjVu")
+    argumenty = parser.parse_args()
+
+    uszkodzone = 0
+    for plik in argumenty.pliki:
+        start = time.perf_counter()
+        informacje = sonduj(plik)
+        czas_us = (time.perf_counter() - start) * 1e6
+        print(f"{os.path.basename(plik)}: {informacje.rodzaj or '?'}, {informacje.opis()} ({czas_us:.0f} µs)")
+        uszkodzone += not informacje.poprawny
+        for numer, ((szerokosc, wysokosc), dpi, kolor) in enumerate(
+                zip(informacje.rozmiary, informacje.dpi, informacje.kolorowe), 1):
+            print(f"    s. {numer}: {szerokosc}x{wysokosc}, {dpi} dpi, {'kolor' if kolor else 'czarno-biała'}")
+    if uszkodzone:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
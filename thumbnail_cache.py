@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Podręczna pamięć miniatur stron DjVu dla GUI konwertera.
+
+Miniatury są renderowane przez silnik konwersji z `djvu_core` (np. `ddjvu`
+z opcjami `-page` i `-size`) do plików PPM, które tkinter wyświetla bez
+dodatkowych bibliotek. Pliki trafiają do katalogu
+pamięci podręcznej, a ich klucz zależy od ścieżki, rozmiaru i czasu modyfikacji
+pliku źródłowego, więc zmieniony plik DjVu automatycznie dostaje nowe miniatury.
+Najdawniej używane wpisy są usuwane po przekroczeniu limitu.
+"""
+
+import os
+import hashlib
+import threading
+import tempfile
+
+from djvu_core import katalog_pamieci_podrecznej
+
+
+def default_cache_dir():
+    """
+    Zwraca domyślny katalog pamięci podręcznej miniatur dla bieżącego systemu.
+
+    Zwraca:
+        str: %LOCALAPPDATA%\\konwerter_djvutopdf\\miniatury w Windows lub
+            $XDG_CACHE_HOME/konwerter_djvutopdf/miniatury (domyślnie ~/.cache) w pozostałych.
+    """
+    return katalog_pamieci_podrecznej('miniatury')
+
+
+class ThumbnailCache:
+    """
+    Pamięć podręczna miniatur na dysku z usuwaniem najdawniej używanych (LRU).
+
+    Czas ostatniego użycia wpisu jest przechowywany jako czas modyfikacji pliku
+    miniatury, dzięki czemu stan LRU przetrwa ponowne uruchomienie programu.
+
+    Atrybuty:
+        directory (str): Katalog z plikami miniatur.
+        max_entries (int): Maksymalna liczba przechowywanych miniatur.
+        max_bytes (int): Maksymalny łączny rozmiar miniatur w bajtach.
+    """
+    def __init__(self, directory=None, max_entries=2000, max_bytes=200 * 1024 * 1024):
+        """
+        Inicjalizuje pamięć podręczną i tworzy jej katalog.
+
+        Args:
+            directory (str, optional): Katalog pamięci podręcznej.
+                Domyślnie `default_cache_dir()`.
+            max_entries (int, optional): Limit liczby wpisów. Domyślnie 2000.
+            max_bytes (int, optional): Limit rozmiaru w bajtach. Domyślnie 200 MB.
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, djvu_file, page, size):
+        """
+        Wyznacza klucz wpisu na podstawie ścieżki, rozmiaru i czasu modyfikacji pliku.
+
+        Args:
+            djvu_file (str): Ścieżka do pliku DjVu.
+            page (int): Numer strony (od 1).
+            size (tuple[int, int]): Maksymalna szerokość i wysokość miniatury.
+
+        Zwraca:
+            str: Szesnastkowy skrót SHA-1 identyfikujący miniaturę.
+        """
+        st = os.stat(djvu_file)
+        ident = f"{os.path.abspath(djvu_file)}|{st.st_size}|{st.st_mtime_ns}|{page}|{size[0]}x{size[1]}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.ppm")
+
+    def get(self, djvu_file, page, size):
+        """
+        Zwraca ścieżkę do zapisanej miniatury i oznacza ją jako ostatnio użytą.
+
+        Zwraca:
+            str | None: Ścieżka do pliku PPM lub None, jeśli miniatury nie ma.
+        """
+        path = self._path(self.key(djvu_file, page, size))
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def render(self, backend, djvu_file, page, size, timeout_s=60):
+        """
+        Zwraca miniaturę z pamięci podręcznej, renderując ją w razie potrzeby.
+
+        Args:
+            backend (djvu_core.Backend): Silnik renderujący stronę.
+            djvu_file (str): Ścieżka do pliku DjVu.
+            page (int): Numer strony (od 1).
+            size (tuple[int, int]): Maksymalna szerokość i wysokość miniatury.
+            timeout_s (int, optional): Limit czasu renderowania. Domyślnie 60.
+
+        Zwraca:
+            str: Ścieżka do pliku PPM z miniaturą.
+
+        Wyjątki:
+            RuntimeError: Gdy silnik nie wyrenderuje strony (np. strona nie istnieje).
+            subprocess.TimeoutExpired: Gdy przekroczono limit czasu.
+        """
+        cached = self.get(djvu_file, page, size)
+        if cached:
+            return cached
+
+        path = self._path(self.key(djvu_file, page, size))
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        try:
+            backend.renderuj_strone(djvu_file, page, size, tmp_path, timeout_s)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """Usuwa najdawniej używane miniatury ponad limit liczby wpisów lub rozmiaru."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.ppm'):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            count = len(entries)
+            for _, size, path in entries:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                count -= 1
+                total -= size
+
+
+class ThumbnailWorker:
+    """
+    Wątek w tle renderujący miniatury, aby nie blokować pętli zdarzeń Tk.
+
+    Żądania bieżącego wyboru mają pierwszeństwo przed wstępnym renderowaniem
+    pierwszych stron pozostałych plików z listy. Nowe żądanie bieżącego wyboru
+    zastępuje poprzednie, które nie zostało jeszcze obsłużone.
+
+    Atrybuty:
+        cache (ThumbnailCache): Pamięć podręczna miniatur.
+        backend (djvu_core.Backend | None): Silnik renderujący strony.
+        size (tuple[int, int]): Maksymalny rozmiar miniatur.
+    """
+    def __init__(self, cache, backend, size, callback):
+        """
+        Inicjalizuje i uruchamia wątek renderujący.
+
+        Args:
+            cache (ThumbnailCache): Pamięć podręczna miniatur.
+            backend (djvu_core.Backend | None): Silnik renderujący strony.
+            size (tuple[int, int]): Maksymalny rozmiar miniatur.
+            callback (callable): Wywoływana w wątku roboczym jako
+                `callback(djvu_file, page, path, error)` po obsłużeniu bieżącego żądania.
+        """
+        self.cache = cache
+        self.backend = backend
+        self.size = size
+        self.callback = callback
+        self._condition = threading.Condition()
+        self._current = None
+        self._prefetch = []
+
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    def request(self, djvu_file, page=1):
+        """Zleca wyrenderowanie strony bieżąco wybranego pliku."""
+        with self._condition:
+            self._current = (djvu_file, page)
+            self._condition.notify()
+
+    def prefetch(self, djvu_files):
+        """Zleca wstępne wyrenderowanie pierwszych stron podanych plików."""
+        with self._condition:
+            self._prefetch = list(djvu_files)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._current is None and not self._prefetch:
+                    self._condition.wait()
+                if self._current is not None:
+                    job, self._current = self._current, None
+                    urgent = True
+                else:
+                    job = (self._prefetch.pop(0), 1)
+                    urgent = False
+
+            djvu_file, page = job
+            path, error = None, None
+            try:
+                if not self.backend:
+                    raise RuntimeError("ddjvu nie znaleziony")
+                path = self.cache.render(self.backend, djvu_file, page, self.size)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            if urgent:
+                self.callback(djvu_file, page, path, error)
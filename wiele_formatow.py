@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Konwersja DjVu do wielu formatów wyjściowych z jednego dekodowania.
+
+Dokument jest dekodowany przez `ddjvu` tylko raz - do bezstratnego,
+wielostronicowego pliku TIFF - a następnie każda zdekodowana strona jest
+rozsyłana do kilku koderów (PDF, TIFF, pomniejszone PNG/JPEG). Dodanie
+kolejnego formatu kosztuje więc tylko czas kodowania, a nie kolejne pełne
+dekodowanie dokumentu.
+
+Formaty inne niż sam TIFF wymagają biblioteki Pillow (`pip install pillow`).
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from djvu_core import JAKOSC_JPEG, plik_tymczasowy, podprobkowanie, zapisz_pdf
+
+# Obsługiwane formaty wyjściowe w kolejności wyświetlania
+FORMATY = ('pdf', 'tiff', 'png', 'jpg')
+
+# Domyślny dłuższy bok pomniejszonych obrazów stron (w pikselach)
+ROZMIAR_PODGLADU = 1024
+
+
+class BladKonwersji(Exception):
+    """Błąd zgłaszany, gdy `ddjvu` zakończy się niezerowym kodem wyjścia
+    lub gdy brakuje zależności potrzebnej dla wybranego formatu.
+
+    Atrybuty:
+        kod (int | None): Kod wyjścia `ddjvu` lub None.
+        stdout (str): Standardowe wyjście procesu.
+        stderr (str): Standardowe wyjście błędów procesu.
+    """
+    def __init__(self, komunikat, kod=None, stdout='', stderr=''):
+        super().__init__(komunikat)
+        self.kod = kod
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class BrakZaleznosci(BladKonwersji):
+    """Błąd zgłaszany, gdy wybrany format wymaga niezainstalowanej biblioteki."""
+
+
+def normalizuj_formaty(formaty):
+    """Zamienia listę lub napis z formatami na uporządkowaną krotkę formatów.
+
+    Akceptuje napis rozdzielony przecinkami (np. "pdf, tiff,png") lub listę.
+    Aliasy 'tif' i 'jpeg' są zamieniane na 'tiff' i 'jpg'.
+
+    Args:
+        formaty (str | list[str]): Formaty wyjściowe.
+
+    Zwraca:
+        tuple[str]: Unikalne formaty w kolejności z `FORMATY`.
+
+    Wyjątki:
+        ValueError: Jeśli podano nieznany format lub lista jest pusta.
+    """
+    if isinstance(formaty, str):
+        formaty = formaty.split(',')
+    aliasy = {'tif': 'tiff', 'jpeg': 'jpg'}
+    wybrane = set()
+    for format_ in formaty:
+        format_ = format_.strip().lower()
+        if not format_:
+            continue
+        format_ = aliasy.get(format_, format_)
+        if format_ not in FORMATY:
+            raise ValueError(f"Nieznany format: {format_}")
+        wybrane.add(format_)
+    if not wybrane:
+        raise ValueError("Nie podano żadnego formatu")
+    return tuple(f for f in FORMATY if f in wybrane)
+
+
+def _importuj_pillow():
+    """Importuje Pillow na żądanie, zgłaszając czytelny błąd, gdy jej brak."""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError:
+        raise BrakZaleznosci("Formaty PDF/PNG/JPG z jednego dekodowania wymagają "
+                            "biblioteki Pillow (pip install pillow)")
+    return Image, ImageSequence
+
+
+class _KoderObrazow:
+    """Zapisuje pomniejszone obrazy stron (PNG lub JPEG) do podkatalogu."""
+    def __init__(self, katalog, nazwa_bazowa, format_, jakosc, rozmiar):
+        self.katalog = katalog
+        self.nazwa_bazowa = nazwa_bazowa
+        self.format = format_
+        self.jakosc = JAKOSC_JPEG.get(jakosc, 75)
+        self.rozmiar = rozmiar
+        self.pliki = []
+
+    def strona(self, ramka, numer, dpi):
+        os.makedirs(self.katalog, exist_ok=True)
+        obraz = ramka.convert('L') if ramka.mode == '1' else ramka.copy()
+        if obraz.mode not in ('L', 'RGB'):
+            obraz = obraz.convert('RGB')
+        obraz.thumbnail((self.rozmiar, self.rozmiar))
+        sciezka = os.path.join(self.katalog, f"{self.nazwa_bazowa}_{numer:04d}.{self.format}")
+        if self.format == 'jpg':
+            obraz.save(sciezka, 'JPEG', quality=self.jakosc)
+        else:
+            obraz.save(sciezka, 'PNG')
+        self.pliki.append(sciezka)
+
+    def zakoncz(self):
+        return self.pliki
+
+
+def _uruchom(cmd, timeout_s):
+    """Uruchamia `ddjvu` i zgłasza `BladKonwersji` przy niezerowym kodzie wyjścia."""
+    wynik = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
+    if wynik.returncode != 0:
+        raise BladKonwersji(f"ddjvu zakończył się kodem {wynik.returncode}",
+                            wynik.returncode, wynik.stdout, wynik.stderr)
+
+
+def konwertuj_wiele(sciezka_ddjvu, plik_djvu, katalog_wyjsciowy, formaty,
+                    jakosc='normal', timeout_s=300, rozmiar_podgladu=ROZMIAR_PODGLADU):
+    """Konwertuje plik DjVu do kilku formatów, dekodując każdą stronę raz.
+
+    Pliki wynikowe:
+        - pdf:  <katalog>/<nazwa>.pdf
+        - tiff: <katalog>/<nazwa>.tif (bezstratny wynik dekodowania)
+        - png/jpg: <katalog>/<nazwa>_strony/<nazwa>_0001.png itd.
+
+    Wyniki są zapisywane do plików tymczasowych i zastępują wcześniejsze
+    pliki (`os.replace`) dopiero po udanej konwersji wszystkich formatów.
+
+    Args:
+        sciezka_ddjvu (str): Ścieżka do pliku wykonywalnego ddjvu.
+        plik_djvu (str): Ścieżka do źródłowego pliku DjVu.
+        katalog_wyjsciowy (str): Katalog na pliki wynikowe.
+        formaty (str | list[str]): Formaty wyjściowe (patrz `FORMATY`).
+        jakosc (str, optional): 'low', 'normal', 'high' lub 'draft' (dekodowanie
+            w połowie rozdzielczości). Domyślnie 'normal'.
+        timeout_s (int, optional): Łączny limit czasu dekodowania i kodowania
+            w sekundach. Domyślnie 300.
+        rozmiar_podgladu (int, optional): Dłuższy bok obrazów PNG/JPEG.
+
+    Zwraca:
+        list[str]: Ścieżki utworzonych plików.
+
+    Wyjątki:
+        BladKonwersji: Gdy `ddjvu` zgłosi błąd.
+        BrakZaleznosci: Gdy wybrane formaty wymagają Pillow, której brakuje.
+        subprocess.TimeoutExpired: Gdy przekroczono limit czasu.
+    """
+    formaty = normalizuj_formaty(formaty)
+    nazwa_bazowa = os.path.splitext(os.path.basename(plik_djvu))[0]
+    koniec = time.monotonic() + timeout_s
+
+    # Kodery potrzebne poza samym TIFF-em - Pillow importujemy tylko gdy trzeba
+    pozostale = [f for f in formaty if f != 'tiff']
+    if pozostale:
+        Image, ImageSequence = _importuj_pillow()
+
+    # Wszystko jest zapisywane do plików tymczasowych i publikowane (`os.replace`)
+    # dopiero po udanej konwersji, więc błąd nie zostawia niepełnych plików ani
+    # nie niszczy wcześniejszych wyników
+    plik_tiff = os.path.join(katalog_wyjsciowy, f"{nazwa_bazowa}.tif")
+    plik_pdf = os.path.join(katalog_wyjsciowy, f"{nazwa_bazowa}.pdf")
+    katalog_stron = os.path.join(katalog_wyjsciowy, f"{nazwa_bazowa}_strony")
+    tymczasowe = {}
+    katalog_roboczy = None
+    try:
+        tymczasowe[plik_tiff] = plik_tymczasowy(plik_tiff, '.tif.part')
+        # Jedyne dekodowanie dokumentu - profil szkicu dekoduje w zmniejszonej rozdzielczości
+        dzielnik = podprobkowanie(jakosc)
+        parametry = [f'-subsample={dzielnik}'] if dzielnik > 1 else []
+        _uruchom([sciezka_ddjvu, '-format=tiff'] + parametry + [plik_djvu, tymczasowe[plik_tiff]], timeout_s)
+
+        kodery = []
+        if any(f != 'pdf' for f in pozostale):
+            katalog_roboczy = tempfile.mkdtemp(prefix=f"{nazwa_bazowa}_strony.", suffix='.part',
+                                               dir=katalog_wyjsciowy)
+        for format_ in pozostale:
+            if format_ != 'pdf':
+                kodery.append(_KoderObrazow(katalog_roboczy, nazwa_bazowa, format_, jakosc, rozmiar_podgladu))
+
+        if pozostale:
+            # Rozesłanie każdej zdekodowanej strony do wszystkich koderów
+            with Image.open(tymczasowe[plik_tiff]) as obraz:
+                def strony():
+                    for numer, ramka in enumerate(ImageSequence.Iterator(obraz), 1):
+                        if time.monotonic() > koniec:
+                            raise subprocess.TimeoutExpired(plik_djvu, timeout_s)
+                        dpi = round(ramka.info.get('dpi', (300, 300))[0])
+                        for koder in kodery:
+                            koder.strona(ramka, numer, dpi)
+                        yield ramka, dpi
+
+                if 'pdf' in formaty:
+                    # PDF pobiera strony z generatora i zapisuje je jednym przebiegiem,
+                    # a pozostałe kodery dostają każdą stronę po drodze
+                    tymczasowe[plik_pdf] = plik_tymczasowy(plik_pdf, '.pdf.part')
+                    zapisz_pdf(tymczasowe[plik_pdf], strony(), getattr(obraz, 'n_frames', 1), jakosc)
+                else:
+                    for _ in strony():
+                        pass
+
+        # Publikacja wyników
+        utworzone = []
+        if 'tiff' in formaty:
+            os.replace(tymczasowe.pop(plik_tiff), plik_tiff)
+            utworzone.append(plik_tiff)
+        if 'pdf' in formaty:
+            os.replace(tymczasowe.pop(plik_pdf), plik_pdf)
+            utworzone.append(plik_pdf)
+        if kodery:
+            os.makedirs(katalog_stron, exist_ok=True)
+            for koder in kodery:
+                for sciezka in koder.zakoncz():
+                    docelowa = os.path.join(katalog_stron, os.path.basename(sciezka))
+                    os.replace(sciezka, docelowa)
+                    utworzone.append(docelowa)
+        return utworzone
+    finally:
+        for sciezka in tymczasowe.values():
+            if os.path.exists(sciezka):
+                os.remove(sciezka)
+        if katalog_roboczy:
+            shutil.rmtree(katalog_roboczy, ignore_errors=True)